@@ -0,0 +1,140 @@
+"""Avaliação em lote de muitas entradas contra uma mesma máquina.
+
+As entradas são distribuídas por um pool de processos. Cada processo recebe a
+máquina já carregada e compilada uma única vez, no inicializador, e depois
+apenas as strings de entrada. Os resultados voltam à medida que terminam.
+"""
+import multiprocessing
+import os
+import time
+
+from nondeterministic import run_nondeterministic
+from profiler import ExecutionProfile
+from trace_file import record_trace
+
+_worker_tm = None
+_worker_max_steps = None
+_worker_options = None
+
+
+def evaluate_input(tm, input_str, max_steps, search=None, detect_loops=False, trace=None,
+                   profile=False, **search_options):
+    """Executa uma entrada e devolve o registro com veredito, passos e tempo.
+
+    Com `search` ('bfs' ou 'iddfs') todos os ramos não determinísticos são
+    explorados por run_nondeterministic(). Com `detect_loops` execuções que
+    comprovadamente não terminam saem com o veredito 'loops'. Com `trace` o
+    rastro binário da execução é gravado nesse caminho (veja trace_file). Com
+    `profile` o registro inclui o perfil da execução (veja profiler).
+    """
+    start = time.perf_counter()
+    invalids = tm.invalid_symbols(input_str)
+    if invalids:
+        return {
+            "input": input_str,
+            "verdict": "invalid",
+            "invalid_symbols": sorted(invalids),
+        }
+
+    tm.load_content(input_str)
+    return _execute(tm, input_str, start, max_steps, search, detect_loops, trace, profile,
+                    **search_options)
+
+
+def evaluate_file(tm, path, max_steps, search=None, detect_loops=False, trace=None,
+                  profile=False, **search_options):
+    """Como evaluate_input(), com a entrada lida do arquivo `path` direto para a fita.
+
+    O campo "input" do registro é o caminho do arquivo.
+    """
+    start = time.perf_counter()
+    invalids = tm.load_content_file(path)
+    if invalids:
+        return {
+            "input": path,
+            "verdict": "invalid",
+            "invalid_symbols": sorted(invalids),
+        }
+    return _execute(tm, path, start, max_steps, search, detect_loops, trace, profile,
+                    **search_options)
+
+
+def _execute(tm, input_str, start, max_steps, search, detect_loops, trace, profile,
+             **search_options):
+    # Executa a máquina já carregada e monta o registro
+    tm.profile = ExecutionProfile() if profile else None
+    if search:
+        search_result = run_nondeterministic(tm, max_steps, search, **search_options)
+        verdict = "timeout" if search_result.verdict == "limit" else search_result.verdict
+    elif trace:
+        record_trace(tm, trace, max_steps, detect_loops=detect_loops)
+        verdict = tm.verdict()
+    else:
+        tm.run(max_steps, detect_loops=detect_loops)
+        verdict = tm.verdict()
+    record = result_record(tm, input_str, verdict, start)
+    if tm.profile is not None:
+        record["profile"] = tm.profile.to_dict(tm.rules)
+        tm.profile = None
+    return record
+
+
+def result_record(tm, input_str, verdict, start):
+    """Registro da configuração final de `tm`, com o tempo desde `start` (perf_counter)"""
+    record = {
+        "input": input_str,
+        "verdict": verdict,
+        "result": tm.result,
+        "steps": tm.steps,
+        "state": tm.state,
+        "head": tm.head_pos,
+        "tape": tm.get_tape_content(),
+        "elapsed": time.perf_counter() - start,
+    }
+    if tm.tape_count > 1:
+        record["tapes"] = tm.tape_contents()
+        record["heads"] = list(tm.heads)
+    return record
+
+
+def _init_worker(tm, max_steps, options):
+    global _worker_tm, _worker_max_steps, _worker_options
+    _worker_tm = tm
+    _worker_max_steps = max_steps
+    _worker_options = options
+
+
+def _evaluate_indexed(item):
+    index, input_str = item
+    record = evaluate_input(_worker_tm, input_str, _worker_max_steps, **_worker_options)
+    record["index"] = index
+    return record
+
+
+def run_batch(tm, inputs, max_steps, workers=None, chunksize=None, **options):
+    """Avalia `inputs` em paralelo, gerando os registros conforme terminam.
+
+    A ordem de chegada não é a das entradas; cada registro traz "index" com a
+    posição original. Com workers=1 tudo roda no processo atual. Opções extras
+    (como `search`) são repassadas a evaluate_input().
+    """
+    workers = workers or os.cpu_count() or 1
+    if tm.compiled is None:
+        tm.compile()
+
+    if workers == 1:
+        for index, input_str in enumerate(inputs):
+            record = evaluate_input(tm, input_str, max_steps, **options)
+            record["index"] = index
+            yield record
+        return
+
+    if chunksize is None:
+        # Lotes pequenos o bastante para equilibrar a carga entre processos
+        try:
+            chunksize = max(1, min(256, len(inputs) // (workers * 8)))
+        except TypeError:
+            chunksize = 16
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(tm, max_steps, options)) as pool:
+        yield from pool.imap_unordered(_evaluate_indexed, enumerate(inputs), chunksize)
@@ -0,0 +1,322 @@
+"""Benchmark do simulador sobre as máquinas do repositório e máquinas sintéticas.
+
+Para cada máquina e tamanho de entrada mede o tempo de cada fase (leitura e
+parsing do .tmc, compilação, carga da fita, execução, execução com histórico e
+formatação do histórico), passos por segundo e o pico de memória. Os
+resultados podem ser salvos em JSON e comparados com uma execução anterior:
+
+    python benchmark.py --output antes.json
+    python benchmark.py --output depois.json --compare antes.json
+    python benchmark.py aNbNcN.tmc --sizes 64,256 --repeat 3
+    python benchmark.py --backend codegen --compare antes.json
+
+O pico de memória é medido numa passada separada com tracemalloc, para não
+distorcer os tempos. Como tracemalloc deixa o laço de execução dezenas de
+vezes mais lento, essa passada cobre o parsing, a carga e a execução com
+histórico (limitada por --history-steps), onde a memória cresce com a
+execução; da execução sem histórico é informado o tamanho do buffer da fita.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from codegen import generated_runner
+from turing_machine import load_config, machine_from_config
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _with_start_marker(rules):
+    # Nas máquinas sintéticas o ⊳ da posição 0 é lido como mais um branco
+    extra = [line.replace(" _ ", " ⊳ ", 1) for line in rules if line.split()[1] == "_"]
+    return "\n".join(rules + extra)
+
+
+def _synthetic(rules, halting="qH", alphabet="1"):
+    states = sorted({part for line in rules for part in line.split()[::4]} | {halting})
+    return {
+        "states": " ".join(states),
+        "tape_alphabet": alphabet,
+        "initial_state": rules[0].split()[0],
+        "blank_symbol": "_",
+        "halting_states": halting,
+        "step_limit": "1000",
+        "rules": _with_start_marker(rules),
+        "input": "",
+    }
+
+
+# Máquinas de estresse: campeãs de busy beaver (4 e 5 estados; a de 5 para
+# após 47.176.870 passos, então na prática é limitada por --max-steps) e uma
+# varredura que vai e volta sobre a fita, crescendo um símbolo por volta
+SYNTHETIC_MACHINES = {
+    "busy-beaver-4": _synthetic([
+        "A _ 1 R B", "A 1 1 L B",
+        "B _ 1 L A", "B 1 _ L C",
+        "C _ 1 R qH", "C 1 1 L D",
+        "D _ 1 R D", "D 1 _ R A",
+    ]),
+    "busy-beaver-5": _synthetic([
+        "A _ 1 R B", "A 1 1 L C",
+        "B _ 1 R C", "B 1 1 R B",
+        "C _ 1 R D", "C 1 _ L E",
+        "D _ 1 L A", "D 1 1 L D",
+        "E _ 1 R qH", "E 1 _ L A",
+    ]),
+    "sweep": _synthetic([
+        "S _ _ R R", "R 1 1 R R", "R _ 1 L L", "L 1 1 L L", "L _ _ R R",
+    ]),
+}
+
+
+def _anbncn(n):
+    return "a" * n + "b" * n + "c" * n
+
+
+def _wcw(n):
+    w = ("ab" * n)[:n]
+    return w + "c" + w[::-1]
+
+
+# Entradas de tamanho crescente para as máquinas do repositório, pelo nome do arquivo
+INPUT_GENERATORS = {
+    "aNbNcN.tmc": _anbncn,
+    "wcw(reverso).tmc": _wcw,
+    "Número par de 1's.tmc": lambda n: "1" * n,
+    "a elevado n  b elevado n.tmc": lambda n: "a" * n + "b" * n,
+    "Comparação unária de dois números.tmc": lambda n: "1" * n + "#" + "1" * max(n - 1, 0),
+}
+
+
+def generated_inputs(name, config, sizes):
+    """Pares (tamanho, entrada) para a máquina `name`"""
+    if name in SYNTHETIC_MACHINES:
+        # Busy beavers começam na fita vazia; a varredura recebe n símbolos
+        if name == "sweep":
+            return [(n, "1" * n) for n in sizes]
+        return [(0, "")]
+    generator = INPUT_GENERATORS.get(name)
+    if generator is None:
+        # Máquina desconhecida: repete a entrada salva no .tmc
+        sample = config.get("input", "") or ""
+        if not sample:
+            return [(0, "")]
+        generator = lambda n: (sample * (n // len(sample) + 1))[:n]
+    return [(n, generator(n)) for n in sizes]
+
+
+def _history_formatter():
+    # A formatação da interface está em main.py, que importa PyQt5
+    try:
+        from main import format_configuration
+    except ImportError:
+        return "texto", lambda state, tape, head_pos: f"{state} {tape.content()} {head_pos}"
+    return "html", format_configuration
+
+
+def _best(timings):
+    return min(timings) if timings else 0.0
+
+
+def measure(name, config, input_str, max_steps, history_steps, repeat, formatter,
+            backend="table"):
+    """Tempos de cada fase (o melhor de `repeat`) e resultado de uma execução"""
+    text = json.dumps(config, ensure_ascii=False)
+    phases = {key: [] for key in ("parse", "compile", "load", "run", "record", "history")}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tm = machine_from_config(json.loads(text))
+        tm.backend = backend
+        phases["parse"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        tm.compile()
+        if backend == "codegen":
+            generated_runner(tm)
+        phases["compile"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        tm.load_content(input_str)
+        phases["load"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        result = tm.run(max_steps)
+        phases["run"].append(time.perf_counter() - start)
+
+        # Execução registrando histórico, como na interface, e formatação de
+        # todas as linhas do histórico
+        recorder = machine_from_config(json.loads(text))
+        recorder.load_content(input_str)
+        start = time.perf_counter()
+        recorder.run(history_steps, record=True)
+        phases["record"].append(time.perf_counter() - start)
+
+        history = recorder.history
+        start = time.perf_counter()
+        for i in range(len(history)):
+            formatter(*history.configuration(i))
+            if i < history.steps:
+                history.transition_info(i)
+        phases["history"].append(time.perf_counter() - start)
+
+    timings = {key: _best(values) for key, values in phases.items()}
+    return {
+        "machine": name,
+        "input_length": len(input_str),
+        "steps": result.steps,
+        "verdict": tm.verdict(),
+        "history_rows": len(history),
+        "phases": timings,
+        "tape_bytes": len(tm.tape.cells),
+        "steps_per_sec": result.steps / timings["run"] if timings["run"] else None,
+        "record_steps_per_sec": history.steps / timings["record"] if timings["record"] else None,
+    }
+
+
+def peak_memory(config, input_str, history_steps):
+    """Pico de memória (bytes, tracemalloc) de parsing, carga e execução com histórico"""
+    tracemalloc.start()
+    try:
+        tm = machine_from_config(config)
+        tm.load_content(input_str)
+        tm.run(history_steps, record=True)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bundled_machines():
+    paths = sorted(glob.glob(os.path.join(HERE, "*.tmc")))
+    return [(os.path.basename(path), load_config(path)) for path in paths]
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_suite(machines, sizes, max_steps, history_steps, repeat=1, memory=True,
+              progress=None, backend="table"):
+    """Executa o benchmark e devolve o dicionário salvo em JSON"""
+    formatter_name, formatter = _history_formatter()
+    cases = []
+    for name, config in machines:
+        for size, input_str in generated_inputs(name, config, sizes):
+            case = measure(name, config, input_str, max_steps, history_steps, repeat, formatter,
+                           backend)
+            case["size"] = size
+            if memory:
+                case["peak_memory"] = peak_memory(config, input_str, history_steps)
+            cases.append(case)
+            if progress:
+                progress(case)
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "max_steps": max_steps,
+        "history_steps": history_steps,
+        "repeat": repeat,
+        "backend": backend,
+        "history_formatter": formatter_name,
+        "cases": cases,
+    }
+
+
+def format_case(case):
+    phases = case["phases"]
+    rate = case["steps_per_sec"]
+    memory = case.get("peak_memory")
+    return (f"{case['machine']:<40} n={case['input_length']:<6} "
+            f"passos={case['steps']:<9} {case['verdict']:<8} "
+            f"{(rate or 0):>12,.0f} passos/s  "
+            f"parse {phases['parse'] * 1000:.2f} ms, load {phases['load'] * 1000:.2f} ms, "
+            f"run {phases['run'] * 1000:.1f} ms, histórico {phases['history'] * 1000:.1f} ms"
+            + (f", pico {memory / 1024:,.0f} KiB" if memory is not None else ""))
+
+
+def compare(results, baseline):
+    """Linhas com a razão de passos/s entre `results` e `baseline`, por caso"""
+    previous = {(case["machine"], case["input_length"]): case for case in baseline["cases"]}
+    lines = []
+    for case in results["cases"]:
+        old = previous.get((case["machine"], case["input_length"]))
+        if not old or not old.get("steps_per_sec") or not case["steps_per_sec"]:
+            continue
+        ratio = case["steps_per_sec"] / old["steps_per_sec"]
+        lines.append(f"{case['machine']:<40} n={case['input_length']:<6} {ratio:6.2f}x")
+    return lines
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Mede a velocidade do simulador sobre máquinas .tmc e máquinas sintéticas."
+    )
+    parser.add_argument("machines", nargs="*",
+                        help="arquivos .tmc ou nomes sintéticos (padrão: todas as máquinas "
+                             "do repositório e " + ", ".join(SYNTHETIC_MACHINES) + ")")
+    parser.add_argument("--sizes", default="16,64,256",
+                        help="tamanhos de entrada separados por vírgula (padrão: 16,64,256)")
+    parser.add_argument("--max-steps", type=int, default=2_000_000,
+                        help="limite de passos da fase de execução (padrão: 2000000)")
+    parser.add_argument("--history-steps", type=int, default=20_000,
+                        help="passos registrados e formatados na fase de histórico (padrão: 20000)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="repetições de cada caso; vale o menor tempo")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="não mede o pico de memória (passada extra com tracemalloc)")
+    parser.add_argument("--backend", choices=("table", "codegen"), default="table",
+                        help="laço da fase de execução: tabela compilada ou código gerado")
+    parser.add_argument("--output", metavar="ARQUIVO", help="salva os resultados em JSON")
+    parser.add_argument("--compare", metavar="ARQUIVO",
+                        help="JSON de uma execução anterior para comparar passos/s")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        sizes = [int(value) for value in args.sizes.split(",") if value.strip()]
+        if args.machines:
+            machines = []
+            for value in args.machines:
+                if value in SYNTHETIC_MACHINES:
+                    machines.append((value, SYNTHETIC_MACHINES[value]))
+                else:
+                    machines.append((os.path.basename(value), load_config(value)))
+        else:
+            machines = bundled_machines() + list(SYNTHETIC_MACHINES.items())
+        baseline = None
+        if args.compare:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    results = run_suite(machines, sizes, args.max_steps, args.history_steps,
+                        repeat=max(args.repeat, 1), memory=args.memory, backend=args.backend,
+                        progress=lambda case: print(format_case(case), flush=True))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    if baseline:
+        print("\nPassos/s em relação a", args.compare)
+        for line in compare(results, baseline):
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
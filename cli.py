@@ -0,0 +1,239 @@
+"""Execução de máquinas .tmc pela linha de comando, sem interface gráfica.
+
+Exemplos:
+    python cli.py aNbNcN.tmc aabbcc abc
+    python cli.py aNbNcN.tmc --inputs-file entradas.txt --format json
+    python cli.py aNbNcN.tmc --inputs-file entradas.txt --jobs 0
+    echo aabbcc | python cli.py aNbNcN.tmc -
+    python cli.py aNbNcN.tmc aabbcc --trace execucao.tmt
+    python cli.py aNbNcN.tmc --inputs-file entradas.txt --lockstep
+    python cli.py aNbNcN.tmc --tape-file entrada_grande.txt --no-detect-loops
+    python cli.py gerada.tmc --inputs-file entradas.txt --optimize
+    python cli.py longa.tmc w --max-steps 5000000000 --snapshot longa.tms
+    python cli.py longa.tmc --max-steps 5000000000 --resume longa.tms
+
+Este módulo não importa PyQt5: apenas o núcleo em turing_machine.py.
+"""
+import argparse
+import json
+import sys
+import time
+
+from batch import evaluate_file, evaluate_input, result_record, run_batch
+from optimizer import optimize, report_lines as optimization_lines
+from profiler import report_lines
+from snapshot import load_snapshot, machine_config, run_with_snapshots
+from turing_machine import load_config, machine_from_config
+
+
+def read_inputs(args, config):
+    """Entradas na ordem: argumentos, arquivo (uma por linha) e stdin ('-')"""
+    inputs = []
+    for value in args.inputs:
+        if value == "-":
+            inputs.extend(line.rstrip("\r\n") for line in sys.stdin)
+        else:
+            inputs.append(value)
+    if args.inputs_file:
+        with open(args.inputs_file, 'r', encoding='utf-8') as f:
+            inputs.extend(line.rstrip("\r\n") for line in f)
+    if not inputs and not args.inputs_file:
+        # Sem entradas explícitas, usa a entrada salva no .tmc
+        inputs.append(config.get("input", ""))
+    return inputs
+
+
+def format_text(record):
+    if record["verdict"] == "invalid":
+        symbols_str = ", ".join(record["invalid_symbols"])
+        return f"{record['input']}: símbolos fora de Γ: {symbols_str}"
+    text = (f"{record['input']}: {record['verdict']} "
+            f"(resultado: {record['result']}, passos: {record['steps']}, "
+            f"estado: {record['state']}, fita: {record['tape']})")
+    for i, tape in enumerate(record.get("tapes", [])[1:], start=2):
+        text += f"\n  fita {i}: {tape}"
+    if "profile" in record:
+        text += "".join("\n  " + line for line in report_lines(record["profile"]))
+    return text
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Executa uma Máquina de Turing (.tmc) sem interface gráfica."
+    )
+    parser.add_argument("config", help="arquivo .tmc gerado por 'Save Config'")
+    parser.add_argument("inputs", nargs="*",
+                        help="entradas w a executar; '-' lê uma entrada por linha do stdin")
+    parser.add_argument("--inputs-file", metavar="ARQUIVO",
+                        help="arquivo com uma entrada por linha")
+    parser.add_argument("--tape-file", metavar="ARQUIVO",
+                        help="lê a entrada (uma só) de um arquivo UTF-8, carregado direto na "
+                             "fita em blocos via mmap; para entradas muito grandes")
+    parser.add_argument("--max-steps", type=int, default=1_000_000,
+                        help="limite de passos por entrada (padrão: 1000000)")
+    parser.add_argument("--format", choices=("text", "json"), default="text",
+                        help="formato de saída; json imprime um objeto por linha")
+    parser.add_argument("--nondeterministic", choices=("bfs", "iddfs"), metavar="BUSCA",
+                        help="explora todas as transições não determinísticas em largura (bfs) "
+                             "ou por aprofundamento iterativo (iddfs)")
+    parser.add_argument("--max-configs", type=int, default=1_000_000,
+                        help="máximo de configurações distintas na busca não determinística")
+    parser.add_argument("--max-branches", type=int, default=100_000,
+                        help="máximo de ramos abertos na busca não determinística")
+    parser.add_argument("--no-detect-loops", dest="detect_loops", action="store_false",
+                        help="não tenta provar laços infinitos (veredito 'loops'); "
+                             "usa o laço de execução mais rápido")
+    parser.add_argument("--backend", choices=("table", "codegen"), default="table",
+                        help="laço de execução sem histórico: tabela compilada ou código Python "
+                             "gerado para a máquina (codegen); vale com --no-detect-loops")
+    parser.add_argument("--lockstep", action="store_true",
+                        help="avalia as entradas juntas com NumPy, todas avançando um passo por "
+                             "vez; rápido para muitas entradas curtas (sem detecção de laços)")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="processos em paralelo; 0 usa todos os núcleos. Com N != 1 "
+                             "os resultados saem na ordem em que terminam")
+    parser.add_argument("--trace", metavar="ARQUIVO",
+                        help="grava o rastro binário da execução (com o índice ARQUIVO.idx) "
+                             "para inspeção com trace_file.py; exige uma única entrada. Com "
+                             "--resume, o rastro do snapshot continua no mesmo arquivo")
+    parser.add_argument("--profile", action="store_true",
+                        help="conta passos por regra, por estado e por posição do cabeçote e "
+                             "mostra as transições mais executadas e um mapa de calor da fita")
+    parser.add_argument("--optimize", action="store_true",
+                        help="antes de executar, remove estados e regras inalcançáveis, encurta "
+                             "renomeações de estado e funde estados equivalentes; o relatório, "
+                             "com os laços comprováveis, sai no stderr")
+    parser.add_argument("--snapshot", metavar="ARQUIVO",
+                        help="grava a configuração da execução (uma única entrada) neste "
+                             "arquivo periodicamente e no fim, para retomá-la com --resume")
+    parser.add_argument("--snapshot-interval", type=float, default=60.0, metavar="SEGUNDOS",
+                        help="intervalo entre snapshots (padrão: 60)")
+    parser.add_argument("--resume", metavar="ARQUIVO",
+                        help="retoma a execução gravada por --snapshot, até --max-steps passos "
+                             "no total; os snapshots seguintes vão para o mesmo arquivo, ou "
+                             "para --snapshot")
+    return parser
+
+
+def run_snapshotted(tm, args, inputs, parser):
+    """Registro de uma execução com --snapshot ou --resume"""
+    trace, trace_position = args.trace, None
+    start = time.perf_counter()
+    if args.resume:
+        try:
+            resumed, header = load_snapshot(args.resume)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"snapshot ilegível: {e}")
+        if header["machine"] != machine_config(tm):
+            parser.error("o snapshot é de outra máquina")
+        resumed.backend = tm.backend
+        tm = resumed
+        input_str = header.get("input", "")
+        # O rastro gravado junto com o snapshot continua no mesmo arquivo, a
+        # menos que --trace indique outro, que começa na configuração retomada
+        saved = header.get("trace")
+        if saved and args.trace in (None, saved["path"]):
+            trace, trace_position = saved["path"], saved
+    elif args.tape_file:
+        input_str = args.tape_file
+        try:
+            invalids = tm.load_content_file(input_str)
+        except OSError as e:
+            parser.error(str(e))
+    else:
+        input_str = inputs[0]
+        invalids = tm.invalid_symbols(input_str)
+        if not invalids:
+            tm.load_content(input_str)
+    if not args.resume and invalids:
+        return {"input": input_str, "verdict": "invalid", "invalid_symbols": sorted(invalids)}
+    try:
+        run_with_snapshots(tm, args.snapshot or args.resume, args.max_steps,
+                           args.snapshot_interval, args.detect_loops, input_str,
+                           trace, trace_position)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    return result_record(tm, input_str, tm.verdict(), start)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        config = load_config(args.config)
+        inputs = [] if args.tape_file or args.resume else read_inputs(args, config)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if args.tape_file and (args.inputs or args.inputs_file or args.lockstep or args.jobs != 1):
+        parser.error("--tape-file substitui as entradas e não se combina com --lockstep nem --jobs")
+    if args.trace and ((len(inputs) != 1 and not args.tape_file and not args.resume)
+                       or args.nondeterministic):
+        parser.error("--trace exige uma única entrada e execução determinística")
+    if args.profile and (args.trace or args.nondeterministic):
+        parser.error("--profile não se combina com --trace nem com --nondeterministic")
+    if args.lockstep and (args.trace or args.nondeterministic or args.profile or args.jobs != 1):
+        parser.error("--lockstep não se combina com --trace, --nondeterministic, --profile "
+                     "nem --jobs")
+
+    if (args.snapshot or args.resume) and (
+            args.nondeterministic or args.profile or args.lockstep
+            or args.jobs != 1 or (args.resume and (args.inputs or args.inputs_file))
+            or (not args.resume and not args.tape_file and len(inputs) != 1)):
+        parser.error("--snapshot e --resume exigem uma única entrada e execução determinística, "
+                     "sem --profile, --lockstep nem --jobs")
+
+    tm = machine_from_config(config)
+    tm.backend = args.backend
+    if tm.tape_count > 1 and (args.trace or args.nondeterministic or args.lockstep):
+        parser.error("--trace, --nondeterministic e --lockstep ainda não valem para máquinas "
+                     "de várias fitas")
+    if args.optimize:
+        if tm.tape_count > 1 or args.nondeterministic:
+            parser.error("--optimize vale só para máquinas determinísticas de uma fita")
+        for line in optimization_lines(optimize(tm)):
+            print(line, file=sys.stderr)
+    search_options = {"detect_loops": args.detect_loops}
+    if args.nondeterministic:
+        search_options = {
+            "search": args.nondeterministic,
+            "max_configs": args.max_configs,
+            "max_branches": args.max_branches,
+        }
+    if args.trace:
+        search_options["trace"] = args.trace
+    if args.profile:
+        search_options["profile"] = True
+    if args.snapshot or args.resume:
+        records = [run_snapshotted(tm, args, inputs, parser)]
+    elif args.tape_file:
+        try:
+            records = [evaluate_file(tm, args.tape_file, args.max_steps, **search_options)]
+        except OSError as e:
+            parser.error(str(e))
+    elif args.lockstep:
+        # Importado só aqui: carregar o NumPy custa mais que o resto da inicialização
+        from lockstep import run_lockstep
+        try:
+            records = run_lockstep(tm, inputs, args.max_steps)
+        except RuntimeError as e:
+            parser.error(str(e))
+    elif args.jobs == 1 or args.trace:
+        records = (evaluate_input(tm, input_str, args.max_steps, **search_options)
+                   for input_str in inputs)
+    else:
+        records = run_batch(tm, inputs, args.max_steps, workers=args.jobs or None,
+                            **search_options)
+
+    status = 0
+    for record in records:
+        if record["verdict"] == "invalid":
+            status = 1
+        if args.format == "json":
+            print(json.dumps(record, ensure_ascii=False))
+        else:
+            print(format_text(record))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""Backend que gera código Python especializado para uma máquina.
+
+A partir da tabela compilada (TuringMachine.compile()) é gerada uma função
+com um bloco de código por estado e os ramos por símbolo inline: ler a
+célula, escrever, mover e trocar de estado viram comparações e atribuições
+de inteiros, sem buscar entradas na tabela a cada passo. Enquanto a máquina
+permanece no mesmo estado, o laço interno do bloco nem volta ao despacho.
+Regras que só atravessam células (mesmo estado, mesmo símbolo escrito e
+sempre no mesmo sentido) viram uma varredura do buffer com bytes.lstrip/
+rstrip, em vez de um passo interpretado por célula.
+
+O fonte é compilado com compile()/exec e guardado num cache pelo hash da
+definição (turing_machine.definition_key) e pelos códigos dos símbolos, de
+modo que várias execuções (e várias máquinas com a mesma definição) geram e
+compilam o código uma vez só. O cache guarda as CACHE_SIZE funções usadas
+mais recentemente. Para usar:
+
+    tm.backend = "codegen"
+    tm.run(10_000_000)
+
+O resultado é o mesmo de TuringMachine.run() com a tabela, que por sua vez
+é o mesmo de step().
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from turing_machine import RunResult, MOVE_CONTINUE, MOVE_ACCEPT, MOVE_REJECT
+
+# Motivos de saída da função gerada, além dos tipos MOVE_* que param a máquina
+EXIT_BUDGET = -1  # Acabaram os passos
+EXIT_NO_RULE = -2  # Nenhuma regra para (estado, símbolo)
+EXIT_GROW = -3  # O cabeçote saiu do buffer; a fita precisa crescer
+
+# Acima deste número de casos o despacho vira uma busca binária de ifs
+_LEAF_SIZE = 8
+
+# Funções geradas guardadas, da menos à mais usada recentemente; o servidor e a
+# interface mantêm o processo vivo entre muitas definições
+CACHE_SIZE = 128
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _skip_right(cells, i, stop, skip):
+    """Primeiro índice em i..stop - 1 cujo código não está em `skip` (ou stop)"""
+    width = 16
+    while i < stop:
+        end = min(i + width, stop)
+        rest = len(cells[i:end].lstrip(skip))
+        if rest:
+            return end - rest
+        i = end
+        width = min(width << 1, 1 << 16)
+    return stop
+
+
+def _skip_left(cells, i, stop, skip):
+    """Primeiro índice de i para baixo, até stop + 1, cujo código não está em `skip` (ou stop)"""
+    width = 16
+    while i > stop:
+        start = max(i - width, stop)
+        rest = len(cells[start + 1:i + 1].rstrip(skip))
+        if rest:
+            return start + rest
+        i = start
+        width = min(width << 1, 1 << 16)
+    return stop
+
+
+def _dispatch(var, cases, default, indent):
+    """Linhas que escolhem entre `cases` [(valor, linhas)] comparando `var`"""
+    pad = "    " * indent
+    if not cases:
+        # Máquina sem regras: um else sozinho não compila
+        return [pad + line for line in default]
+    if len(cases) > _LEAF_SIZE:
+        middle = len(cases) // 2
+        return ([f"{pad}if {var} < {cases[middle][0]}:"]
+                + _dispatch(var, cases[:middle], default, indent + 1)
+                + [f"{pad}else:"]
+                + _dispatch(var, cases[middle:], default, indent + 1))
+    lines = []
+    for n, (value, body) in enumerate(cases):
+        lines.append(f"{pad}{'if' if n == 0 else 'elif'} {var} == {value}:")
+        lines.extend("    " * (indent + 1) + line for line in body)
+    lines.append(f"{pad}else:")
+    lines.extend("    " * (indent + 1) + line for line in default)
+    return lines
+
+
+def _sweep(state, delta, skip):
+    """Corpo de um ramo que atravessa todas as células com códigos em `skip`"""
+    if delta == 1:
+        return ["stop = i + remaining",
+                "if stop > size:",
+                "    stop = size",
+                f"j = skip_right(cells, i, stop, {skip!r})",
+                "remaining -= j - i",
+                "i = j",
+                "if i > hi:",
+                "    hi = i",
+                "    if i >= size:",
+                f"        return i, lo, hi, {state}, remaining, {EXIT_GROW}",
+                "continue"]
+    return ["stop = i - remaining",
+            "if stop < -1:",
+            "    stop = -1",
+            f"j = skip_left(cells, i, stop, {skip!r})",
+            "remaining -= i - j",
+            "i = j",
+            "if i < lo:",
+            "    lo = i",
+            "    if i < 0:",
+            f"        return i, lo, hi, {state}, remaining, {EXIT_GROW}",
+            "continue"]
+
+
+def _transition(state, code, entry):
+    """Corpo de um ramo (estado, símbolo) do laço interno"""
+    write, delta, next_state, kind = entry
+    lines = []
+    if write != code:
+        lines.append(f"cells[i] = {write}")
+    lines.append("remaining -= 1")
+    if delta == 1:
+        lines += ["i += 1"]
+    elif delta == -1:
+        lines += ["i -= 1"]
+    if kind:
+        lines.append(f"return i, lo, hi, {next_state}, remaining, {kind}")
+        return lines
+    if delta == 1:
+        lines += ["if i > hi:",
+                  "    hi = i",
+                  "    if i >= size:",
+                  f"        return i, lo, hi, {next_state}, remaining, {EXIT_GROW}"]
+    elif delta == -1:
+        lines += ["if i < lo:",
+                  "    lo = i",
+                  "    if i < 0:",
+                  f"        return i, lo, hi, {next_state}, remaining, {EXIT_GROW}"]
+    if next_state == state:
+        lines.append("continue")
+    else:
+        lines += [f"state = {next_state}", "break"]
+    return lines
+
+
+def generate_source(table):
+    """Fonte da função run(cells, i, lo, hi, state, remaining).
+
+    A função devolve (i, lo, hi, estado, passos restantes, motivo), onde o
+    motivo é EXIT_* ou o tipo MOVE_* do passo que parou a máquina.
+    """
+    rows = {}
+    for index, entry in enumerate(table):
+        if entry is not None:
+            rows.setdefault(index >> 8, []).append((index & 0xFF, entry))
+
+    states = []
+    for state, entries in sorted(rows.items()):
+        no_rule = [f"return i, lo, hi, {state}, remaining, {EXIT_NO_RULE}"]
+        sweeps = {}
+        for code, (write, delta, next_state, kind) in entries:
+            if write == code and delta and next_state == state and not kind:
+                sweeps.setdefault(delta, bytearray()).append(code)
+        symbols = []
+        for code, entry in entries:
+            delta = entry[1]
+            if code in sweeps.get(delta, ()):
+                symbols.append((code, _sweep(state, delta, bytes(sweeps[delta]))))
+            else:
+                symbols.append((code, _transition(state, code, entry)))
+        body = ["while remaining:", "    c = cells[i]"] + _dispatch("c", symbols, no_rule, 1)
+        states.append((state, body))
+
+    lines = [
+        "def run(cells, i, lo, hi, state, remaining):",
+        "    size = len(cells)",
+        "    while remaining:",
+    ]
+    lines += _dispatch("state", states,
+                       [f"return i, lo, hi, state, remaining, {EXIT_NO_RULE}"], 2)
+    lines.append(f"    return i, lo, hi, state, remaining, {EXIT_BUDGET}")
+    return "\n".join(lines) + "\n"
+
+
+def _cache_key(tm, table):
+    # Os códigos dos símbolos dependem da ordem em que a fita os internou
+    symbols = tm.tape.symbols
+    codes = sorted({index & 0xFF for index, entry in enumerate(table) if entry is not None}
+                   | {entry[0] for entry in table if entry is not None})
+    key = tm.definition_key
+    if key is None:
+        key = hashlib.sha256(repr(table).encode("utf-8")).hexdigest()
+    return key, tuple((code, symbols[code]) for code in codes)
+
+
+def generated_runner(tm):
+    """Função gerada para a tabela compilada de `tm`, do cache quando possível"""
+    table = (tm.compiled or tm.compile())[0]
+    if tm.generated is not None and tm.generated[0] is table:
+        return tm.generated[1]
+    key = _cache_key(tm, table)
+    with _cache_lock:
+        runner = _cache.get(key)
+        if runner is not None:
+            _cache.move_to_end(key)
+    if runner is None:
+        namespace = {"skip_right": _skip_right, "skip_left": _skip_left}
+        code = compile(generate_source(table), f"<codegen {key[0][:12]}>", "exec")
+        exec(code, namespace)
+        runner = namespace["run"]
+        with _cache_lock:
+            _cache[key] = runner
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    tm.generated = (table, runner)
+    return runner
+
+
+def run_generated(tm, max_steps):
+    """Mesmo que TuringMachine.run() sem registro, executando o código gerado"""
+    table, halting, state_codes, state_names = tm.compiled or tm.compile()
+    runner = generated_runner(tm)
+    tm.history.clear()
+    state = state_codes.get(tm.state)
+    if tm.halted or state is None or halting[state]:
+        tm.halted = True
+        return RunResult(tm.result, True, 0, tm.state, tm.tape, tm.head_pos)
+
+    tape = tm.tape
+    tape._reserve(tm.head_pos, tm.head_pos)
+    origin = tape.origin
+    i = tm.head_pos + origin
+    lo = hi = i
+    kind = MOVE_CONTINUE
+    halted = False
+    remaining = max_steps
+    while True:
+        i, lo, hi, state, remaining, reason = runner(tape.cells, i, lo, hi, state, remaining)
+        if reason == EXIT_GROW:
+            tape._reserve(i - origin, i - origin)
+            shift = tape.origin - origin
+            origin = tape.origin
+            i += shift
+            lo += shift
+            hi += shift
+            continue
+        if reason != EXIT_BUDGET:
+            halted = True
+            if reason > 0:
+                kind = reason
+        break
+
+    lo -= origin
+    hi -= origin
+    if tape:
+        lo = min(lo, tape.lo)
+        hi = max(hi, tape.hi)
+    tape.lo, tape.hi = lo, hi
+    tape._shrink()
+
+    steps = max_steps - remaining
+    tm.head_pos = i - origin
+    tm.state = state_names[state]
+    tm.halted = halted
+    if kind == MOVE_ACCEPT:
+        tm.result = "Aceita"
+    elif kind == MOVE_REJECT:
+        tm.result = "Rejeita"
+    tm.steps += steps
+    return RunResult(tm.result, halted, steps, tm.state, tape, tm.head_pos)
@@ -0,0 +1,296 @@
+"""Verificação de equivalência de duas máquinas sobre todas as entradas até um tamanho.
+
+    python equivalence.py antiga.tmc nova.tmc --max-length 8
+    python equivalence.py antiga.tmc nova.tmc --max-length 12 --alphabet a,b,c \\
+        --jobs 0 --checkpoint progresso.json
+
+As entradas são enumeradas em ordem shortlex (por tamanho e, no mesmo
+tamanho, pela ordem do alfabeto), e cada uma corresponde a um índice: o
+índice é convertido direto na string, então a enumeração pode começar de
+qualquer posição (--start) e ser dividida em blocos entre processos. Cada
+entrada roda nas duas máquinas com o mesmo limite de passos; a primeira
+entrada em que uma aceita e a outra não (rejeita ou comprovadamente não
+para) é o contraexemplo. Entradas em que alguma máquina estoura o limite de
+passos ficam como inconclusivas e não interrompem a verificação.
+
+Com --checkpoint o índice da próxima entrada a verificar é gravado no
+arquivo a cada bloco concluído, e uma nova execução com os mesmos
+parâmetros continua de lá.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque, namedtuple
+
+from batch import evaluate_input
+from turing_machine import definition_key, load_config, machine_from_config
+
+EquivalenceResult = namedtuple(
+    "EquivalenceResult",
+    "equivalent counterexample checked inconclusive first_inconclusive offset total",
+)
+
+# Símbolos de Γ que não aparecem numa entrada
+MARKERS = ("⊳", "_")
+
+_worker_machines = None
+_worker_max_steps = None
+
+
+def shortlex_total(size, max_length):
+    """Quantidade de strings de tamanho 0..max_length sobre um alfabeto de `size` símbolos"""
+    if size == 1:
+        return max_length + 1
+    return (size ** (max_length + 1) - 1) // (size - 1) if size else 1
+
+
+def shortlex_string(index, alphabet):
+    """A string de posição `index` na ordem shortlex sobre `alphabet`"""
+    size = len(alphabet)
+    length = 0
+    count = 1
+    while index >= count:
+        index -= count
+        length += 1
+        count *= size
+    chars = []
+    for _ in range(length):
+        index, digit = divmod(index, size)
+        chars.append(alphabet[digit])
+    return "".join(reversed(chars))
+
+
+def input_alphabet(config_a, config_b):
+    """Símbolos de Γ comuns às duas máquinas, sem ⊳ e os brancos, na ordem da primeira"""
+    def gamma(config):
+        blank = config.get("blank_symbol", "_")
+        return [symbol.strip() for symbol in config.get("tape_alphabet", "").split(",")
+                if symbol.strip() and symbol.strip() not in MARKERS + (blank,)]
+    other = set(gamma(config_b))
+    return list(dict.fromkeys(symbol for symbol in gamma(config_a) if symbol in other))
+
+
+def _init_worker(machines, max_steps):
+    global _worker_machines, _worker_max_steps
+    _worker_machines = machines
+    _worker_max_steps = max_steps
+
+
+def _check_block(block):
+    """Verifica as entradas start..stop - 1; para na primeira divergência do bloco"""
+    start, stop, alphabet = block
+    tm_a, tm_b = _worker_machines
+    inconclusive = 0
+    first_inconclusive = None
+    for index in range(start, stop):
+        input_str = shortlex_string(index, alphabet)
+        a = evaluate_input(tm_a, input_str, _worker_max_steps, detect_loops=True)
+        b = evaluate_input(tm_b, input_str, _worker_max_steps, detect_loops=True)
+        if "timeout" in (a["verdict"], b["verdict"]):
+            inconclusive += 1
+            if first_inconclusive is None:
+                first_inconclusive = input_str
+        elif (a["verdict"] == "accept") != (b["verdict"] == "accept"):
+            return index, {"input": input_str, "index": index, "a": a, "b": b}, \
+                inconclusive, first_inconclusive
+    return stop, None, inconclusive, first_inconclusive
+
+
+def _blocks(start, total, chunk_size, alphabet):
+    for block_start in range(start, total, chunk_size):
+        yield block_start, min(block_start + chunk_size, total), alphabet
+
+
+def check_equivalence(config_a, config_b, max_length, alphabet=None, max_steps=100_000,
+                      workers=None, start=0, chunk_size=512, progress=None):
+    """Compara as máquinas de dois .tmc em todas as entradas até `max_length`.
+
+    Sem `alphabet`, usa input_alphabet(). `progress` recebe o resultado
+    parcial (EquivalenceResult) a cada bloco concluído; `offset` é o índice
+    da próxima entrada a verificar, que pode ser passado em `start` para
+    retomar. Devolve o EquivalenceResult final, com o contraexemplo (as
+    duas execuções) quando as máquinas divergem.
+    """
+    alphabet = list(alphabet) if alphabet is not None else input_alphabet(config_a, config_b)
+    total = shortlex_total(len(alphabet), max_length)
+    machines = []
+    for config in (config_a, config_b):
+        tm = machine_from_config(config)
+        tm.compile()
+        machines.append(tm)
+
+    workers = workers or os.cpu_count() or 1
+    blocks = _blocks(start, total, chunk_size, alphabet)
+    checked = inconclusive = 0
+    first_inconclusive = None
+    offset = start
+    counterexample = None
+
+    def results():
+        if workers == 1:
+            _init_worker(machines, max_steps)
+            yield from map(_check_block, blocks)
+            return
+        with multiprocessing.Pool(workers, initializer=_init_worker,
+                                  initargs=(machines, max_steps)) as pool:
+            # Poucos blocos em andamento por vez: a enumeração pode ser enorme
+            pending = deque()
+            for block in blocks:
+                pending.append(pool.apply_async(_check_block, (block,)))
+                if len(pending) >= workers * 4:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+
+    for stop, found, block_inconclusive, block_first in results():
+        # Os blocos chegam em ordem, então o primeiro contraexemplo é o menor
+        checked += stop - offset
+        offset = stop
+        inconclusive += block_inconclusive
+        if first_inconclusive is None:
+            first_inconclusive = block_first
+        if found is not None:
+            counterexample = found
+            break
+        if progress is not None:
+            progress(EquivalenceResult(None, None, checked, inconclusive, first_inconclusive,
+                                       offset, total))
+
+    return EquivalenceResult(counterexample is None, counterexample, checked, inconclusive,
+                             first_inconclusive, offset, total)
+
+
+def _checkpoint_params(config_a, config_b, alphabet, args):
+    return {
+        "machines": [definition_key(config_a), definition_key(config_b)],
+        "alphabet": alphabet,
+        "max_length": args.max_length,
+        "max_steps": args.max_steps,
+    }
+
+
+def _write_checkpoint(path, data):
+    # Grava num temporário e troca de uma vez: o arquivo nunca fica pela metade
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def format_result(result):
+    lines = []
+    if result.equivalent:
+        lines.append(f"Equivalentes em {result.checked} entrada(s) verificadas "
+                     f"({result.offset} de {result.total})")
+    else:
+        found = result.counterexample
+        lines.append(f"Contraexemplo: '{found['input']}' (índice {found['index']})")
+        for name in ("a", "b"):
+            record = found[name]
+            lines.append(f"  máquina {name.upper()}: {record['verdict']} "
+                         f"(passos: {record['steps']}, estado: {record['state']})")
+    if result.inconclusive:
+        lines.append(f"Inconclusivas (limite de passos): {result.inconclusive}, "
+                     f"a primeira: '{result.first_inconclusive}'")
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Verifica se duas Máquinas de Turing (.tmc) aceitam as mesmas entradas "
+                    "até um tamanho máximo."
+    )
+    parser.add_argument("config_a", help="primeira máquina (.tmc)")
+    parser.add_argument("config_b", help="segunda máquina (.tmc)")
+    parser.add_argument("--max-length", type=int, required=True, metavar="N",
+                        help="verifica todas as entradas de tamanho 0 a N")
+    parser.add_argument("--alphabet", metavar="SÍMBOLOS",
+                        help="símbolos das entradas, separados por vírgula (padrão: os de Γ "
+                             "comuns às duas máquinas, sem ⊳ e o branco)")
+    parser.add_argument("--max-steps", type=int, default=100_000,
+                        help="limite de passos por entrada em cada máquina (padrão: 100000)")
+    parser.add_argument("--jobs", type=int, default=0, metavar="N",
+                        help="processos em paralelo; 0 (padrão) usa todos os núcleos")
+    parser.add_argument("--start", type=int, default=0, metavar="ÍNDICE",
+                        help="índice shortlex da primeira entrada a verificar")
+    parser.add_argument("--chunk-size", type=int, default=512,
+                        help="entradas por bloco enviado a cada processo (padrão: 512)")
+    parser.add_argument("--checkpoint", metavar="ARQUIVO",
+                        help="grava o progresso neste arquivo e, se ele existir com os mesmos "
+                             "parâmetros, continua de onde parou")
+    parser.add_argument("--format", choices=("text", "json"), default="text",
+                        help="formato do resultado")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.max_length < 0 or args.chunk_size < 1 or args.start < 0:
+        parser.error("--max-length, --start e --chunk-size não podem ser negativos")
+    try:
+        config_a = load_config(args.config_a)
+        config_b = load_config(args.config_b)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if args.alphabet is not None:
+        alphabet = list(dict.fromkeys(s.strip() for s in args.alphabet.split(",") if s.strip()))
+    else:
+        alphabet = input_alphabet(config_a, config_b)
+
+    start = args.start
+    params = _checkpoint_params(config_a, config_b, alphabet, args)
+    saved = {}
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        try:
+            with open(args.checkpoint, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            parser.error(f"checkpoint ilegível: {e}")
+        if {key: saved.get(key) for key in params} != params:
+            parser.error("o checkpoint é de outras máquinas ou outros parâmetros")
+        start = max(start, saved["offset"])
+
+    def carried(partial):
+        # Soma as entradas inconclusivas das execuções anteriores do checkpoint
+        return partial._replace(
+            inconclusive=partial.inconclusive + saved.get("inconclusive", 0),
+            first_inconclusive=saved.get("first_inconclusive") or partial.first_inconclusive,
+        )
+
+    def save(partial):
+        _write_checkpoint(args.checkpoint, dict(
+            params, offset=partial.offset, inconclusive=partial.inconclusive,
+            first_inconclusive=partial.first_inconclusive))
+
+    last_report = [0.0]
+
+    def progress(partial):
+        partial = carried(partial)
+        if args.checkpoint:
+            save(partial)
+        now = time.monotonic()
+        if now - last_report[0] >= 1:
+            last_report[0] = now
+            print(f"{partial.offset}/{partial.total} entradas "
+                  f"({partial.offset / (partial.total or 1):.1%}), "
+                  f"{partial.inconclusive} inconclusiva(s)", file=sys.stderr, flush=True)
+
+    result = check_equivalence(config_a, config_b, args.max_length, alphabet, args.max_steps,
+                               workers=args.jobs or None, start=start,
+                               chunk_size=args.chunk_size, progress=progress)
+    result = carried(result)
+    if args.checkpoint:
+        save(result)
+    if args.format == "json":
+        print(json.dumps(result._asdict(), ensure_ascii=False))
+    else:
+        print(format_result(result))
+    return 0 if result.equivalent else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
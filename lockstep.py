@@ -0,0 +1,212 @@
+"""Execução em lote com NumPy: muitas entradas avançando juntas, passo a passo.
+
+Cada entrada é uma linha de uma matriz de fitas (uint8, os mesmos códigos de
+Tape), com vetores de estado, cabeçote e passos. A tabela compilada da
+máquina vira arrays de consulta, e cada passo avança de uma vez todas as
+linhas que ainda não pararam; as que param saem do conjunto ativo. Quando
+restam poucas linhas ativas o custo fixo de cada passo do NumPy deixa de
+compensar, e elas terminam no laço escalar de TuringMachine.run().
+
+NumPy é opcional; sem ele run_lockstep() levanta RuntimeError. A detecção
+de laços não se aplica aqui: execuções que não param saem como 'timeout'.
+"""
+import time
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional
+    np = None
+
+from turing_machine import MOVE_ACCEPT, MOVE_REJECT
+
+# Tipo das posições da tabela sem regra
+_NO_RULE = 4
+
+
+def lookup_arrays(tm):
+    """Arrays (escrita, deslocamento, próximo estado, tipo) indexados por (estado << 8) | código"""
+    table = (tm.compiled or tm.compile())[0]
+    size = len(table)
+    write = np.zeros(size, dtype=np.uint8)
+    delta = np.zeros(size, dtype=np.int64)
+    next_state = np.zeros(size, dtype=np.int64)
+    kind = np.full(size, _NO_RULE, dtype=np.uint8)
+    for index, entry in enumerate(table):
+        if entry is not None:
+            write[index], delta[index], next_state[index], kind[index] = entry
+    return write, delta, next_state, kind
+
+
+def _encode(tm, input_str):
+    # Mesmos códigos de load_content(): ⊳ na posição 0, ⊔ explícito na 1
+    tape = tm.tape
+    table = {ord(ch): 0 if ch == tm.blank_symbol else tape.intern(ch) for ch in set(input_str)}
+    return (bytes((tape.intern("⊳"), tape.intern("_")))
+            + input_str.translate(table).encode("latin-1"))
+
+
+def _content(symbols, codes):
+    # Mesmo texto de Tape.content(): do primeiro ao último código não vazio
+    written = np.flatnonzero(codes)
+    if not written.size:
+        return ""
+    return "".join(map(symbols.__getitem__, codes[written[0]:written[-1] + 1].tolist()))
+
+
+def _record(input_str, result, halted, steps, state, head, tape):
+    if result == "Aceita":
+        verdict = "accept"
+    elif halted:
+        verdict = "reject"
+    else:
+        verdict = "timeout"
+    return {
+        "input": input_str,
+        "verdict": verdict,
+        "result": result,
+        "steps": steps,
+        "state": state,
+        "head": head,
+        "tape": tape,
+    }
+
+
+def _finish_scalar(tm, input_str, max_steps, state, head, steps, codes, origin):
+    # Continua uma linha no laço escalar, a partir da configuração da matriz
+    tm.load_content("")
+    tm.tape.clear()
+    tm.tape.write_codes(-origin, codes.tobytes())
+    tm.head_pos = head
+    tm.state = state
+    tm.steps = steps
+    tm.run(max_steps - steps)
+    return _record(input_str, tm.result, tm.halted, tm.steps, tm.state, tm.head_pos,
+                   tm.get_tape_content())
+
+
+def _run_rows(tm, inputs, encoded, max_steps, arrays, scalar_below):
+    """Registros de um bloco de entradas válidas, na ordem de `inputs`"""
+    write, delta, next_state, kind = arrays
+    table, halting, state_codes, state_names = tm.compiled
+    rows = len(encoded)
+    margin = 16
+    origin = margin
+    width = margin + max(map(len, encoded)) + margin
+    tapes = np.zeros((rows, width), dtype=np.uint8)
+    for row, data in enumerate(encoded):
+        tapes[row, origin:origin + len(data)] = np.frombuffer(data, dtype=np.uint8)
+
+    start = state_codes[tm.initial_state]
+    states = np.full(rows, start, dtype=np.int64)
+    heads = np.full(rows, origin + 1, dtype=np.int64)
+    steps = np.zeros(rows, dtype=np.int64)
+    results = [None] * rows
+    halted = np.full(rows, halting[start], dtype=bool)
+    active = np.arange(0 if halting[start] else rows)
+
+    taken = 0
+    while active.size > scalar_below and taken < max_steps:
+        index = (states[active] << 8) | tapes[active, heads[active]]
+        kinds = kind[index]
+        stuck = kinds == _NO_RULE
+        if stuck.any():
+            halted[active[stuck]] = True
+            moving = ~stuck
+            active, index, kinds = active[moving], index[moving], kinds[moving]
+
+        head = heads[active]
+        tapes[active, head] = write[index]
+        head += delta[index]
+        heads[active] = head
+        states[active] = next_state[index]
+        steps[active] += 1
+        taken += 1
+
+        stopped = kinds != 0
+        if stopped.any():
+            for row, k in zip(active[stopped].tolist(), kinds[stopped].tolist()):
+                halted[row] = True
+                if k == MOVE_ACCEPT:
+                    results[row] = "Aceita"
+                elif k == MOVE_REJECT:
+                    results[row] = "Rejeita"
+            active = active[~stopped]
+            head = heads[active]
+
+        if active.size and (head.min() <= 0 or head.max() >= width - 1):
+            # Algum cabeçote chegou à borda: a matriz cresce dos dois lados
+            tapes = np.pad(tapes, ((0, 0), (width, width)))
+            heads += width
+            origin += width
+            width *= 3
+
+    records = []
+    unfinished = set(active.tolist()) if taken < max_steps else set()
+    for row, input_str in enumerate(inputs):
+        state = state_names[states[row]]
+        head = int(heads[row]) - origin
+        if row in unfinished:
+            records.append(_finish_scalar(tm, input_str, max_steps, state, head,
+                                          int(steps[row]), tapes[row], origin))
+        else:
+            records.append(_record(input_str, results[row], bool(halted[row]),
+                                   int(steps[row]), state, head,
+                                   _content(tm.tape.symbols, tapes[row])))
+    return records
+
+
+def run_lockstep(tm, inputs, max_steps, batch_size=4096, scalar_below=64):
+    """Avalia `inputs` em blocos de `batch_size` linhas; devolve um gerador de registros em ordem.
+
+    Os registros têm os mesmos campos de batch.evaluate_input() (sem o perfil)
+    e "index" com a posição da entrada. Linhas que ainda rodam quando sobram
+    `scalar_below` ou menos terminam no laço escalar.
+    """
+    if np is None:
+        raise RuntimeError("A execução em lote com NumPy exige o pacote numpy")
+    if tm.compiled is None:
+        tm.compile()
+    return _run_blocks(tm, inputs, max_steps, lookup_arrays(tm), batch_size, scalar_below)
+
+
+def _run_blocks(tm, inputs, max_steps, arrays, batch_size, scalar_below):
+    block = []
+    for index, input_str in enumerate(inputs):
+        block.append((index, input_str))
+        if len(block) >= batch_size:
+            yield from _run_block(tm, block, max_steps, arrays, scalar_below)
+            block = []
+    if block:
+        yield from _run_block(tm, block, max_steps, arrays, scalar_below)
+
+
+def _run_block(tm, block, max_steps, arrays, scalar_below):
+    start = time.perf_counter()
+    valid = []
+    records = {}
+    for index, input_str in block:
+        invalids = tm.invalid_symbols(input_str)
+        if invalids:
+            records[index] = {
+                "input": input_str,
+                "verdict": "invalid",
+                "invalid_symbols": sorted(invalids),
+            }
+        else:
+            valid.append((index, input_str))
+
+    if valid:
+        inputs = [input_str for _, input_str in valid]
+        encoded = [_encode(tm, input_str) for input_str in inputs]
+        for (index, _), record in zip(valid, _run_rows(tm, inputs, encoded, max_steps,
+                                                       arrays, scalar_below)):
+            records[index] = record
+
+    # Tempo médio por entrada do bloco: as linhas rodam juntas
+    elapsed = (time.perf_counter() - start) / len(block)
+    for index, _ in block:
+        record = records[index]
+        if record["verdict"] != "invalid":
+            record["elapsed"] = elapsed
+        record["index"] = index
+        yield record
@@ -1,247 +1,441 @@
 import sys
 import json
+import html
+import math
+import os
+import threading
+import time
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget,
     QVBoxLayout, QHBoxLayout, QLabel,
     QLineEdit, QPushButton, QTextEdit,
-    QFileDialog, QMessageBox, QScrollArea, QFrame
+    QFileDialog, QMessageBox, QSizePolicy, QSlider,
+    QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+)
+from PyQt5.QtCore import (
+    Qt, QObject, QThread, pyqtSignal,
+    QAbstractListModel, QModelIndex, QSize, QTimer
+)
+from PyQt5.QtGui import (
+    QPalette, QColor, QTextDocument, QPainter, QPen, QTextCursor, QTextFormat
 )
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPalette, QColor
+
+from turing_machine import TuringMachine, definition_key, tape_count
+from multitape import MultiTapeTuringMachine
+from profiler import ExecutionProfile
+from validation import RulesValidator, ERROR
 
 
 class TapeWidget(QWidget):
+    """Fita desenhada diretamente em paintEvent.
+
+    Só as células visíveis são lidas da fita, então o custo de redesenhar não
+    depende do tamanho da fita. Com a roda do mouse muda-se o zoom, de 60 px
+    até 1 px por célula; abaixo de MIN_TEXT_WIDTH as células viram faixas de
+    cor, sem texto. A faixa inferior (minimapa) resume a região escrita.
+    Com o perfil ligado, uma barra laranja na base de cada célula (e no topo
+    do minimapa) mostra quantas vezes o cabeçote passou por ali.
+    """
+
+    ARROW_HEIGHT = 20
+    CELL_HEIGHT = 40
+    MINIMAP_HEIGHT = 14
+    MIN_CELL_WIDTH = 1
+    MAX_CELL_WIDTH = 60
+    MIN_TEXT_WIDTH = 12
+    ZOOM_LEVELS = (1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 40, 50, 60)
+
+    BACKGROUND = QColor("#1e1e1e")
+    CELL_COLOR = QColor("#2d2d2d")
+    HEAD_CELL_COLOR = QColor("#3d3d3d")
+    BORDER_COLOR = QColor("#444444")
+    HEAD_COLOR = QColor("#ff5555")
+    TEXT_COLOR = QColor("#ffffff")
+    VIEW_COLOR = QColor(255, 255, 255, 60)
+    HEAT_HEIGHT = 6
+    SYMBOL_COLORS = [QColor(c) for c in (
+        "#4e9af1", "#f1c94e", "#6ad17a", "#c77ee8", "#f18a4e",
+        "#4ed6d1", "#e86a8f", "#a3b86c", "#8f8ff0", "#d1a36a",
+    )]
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.cells = []
-        self.head_pos = 0
-        self.visible_cells = 31
-        self.layout = QVBoxLayout()
-        self.layout.setContentsMargins(0, 0, 0, 0)
-        self.layout.setSpacing(0)
-        self.setLayout(self.layout)
-        self.init_tape()
-
-    def init_tape(self):
-        for i in reversed(range(self.layout.count())):
-            self.layout.itemAt(i).widget().setParent(None)
-
-        self.cells = []
-        for _ in range(self.visible_cells):
-            cell = QLabel("_")
-            cell.setAlignment(Qt.AlignCenter)
-            cell.setFixedSize(40, 40)
-            cell.setStyleSheet("""
-                QLabel {
-                    border: 1px solid #444;
-                    background-color: #2d2d2d;
-                    color: #fff;
-                    font-weight: bold;
-                    font-size: 16px;
-                }
-            """)
-            self.cells.append(cell)
-
-        self.head_indicator = QLabel("↓")
-        self.head_indicator.setAlignment(Qt.AlignCenter)
-        self.head_indicator.setFixedSize(40, 20)
-        self.head_indicator.setStyleSheet("color: #ff5555; font-size: 16px;")
-
-        head_row = QWidget()
-        head_row_layout = QHBoxLayout()
-        head_row_layout.setContentsMargins(0, 0, 0, 0)
-        head_row_layout.setSpacing(0)
-        for i in range(self.visible_cells):
-            if i == self.visible_cells // 2:
-                head_row_layout.addWidget(self.head_indicator)
-            else:
-                spacer = QLabel("")
-                spacer.setFixedSize(40, 20)
-                head_row_layout.addWidget(spacer)
-        head_row.setLayout(head_row_layout)
-
-        tape_row = QWidget()
-        tape_row_layout = QHBoxLayout()
-        tape_row_layout.setContentsMargins(0, 0, 0, 0)
-        tape_row_layout.setSpacing(0)
-        for cell in self.cells:
-            tape_row_layout.addWidget(cell)
-        tape_row.setLayout(tape_row_layout)
-
-        self.layout.addWidget(head_row)
-        self.layout.addWidget(tape_row)
-
-    def update_tape(self, tape_data, head_pos, blank_symbol):
-        center_pos = self.visible_cells // 2
-        start_pos = head_pos - center_pos
-        for i in range(self.visible_cells):
-            pos = start_pos + i
-            if pos in tape_data:
-                self.cells[i].setText(tape_data[pos])
-            else:
-                self.cells[i].setText(blank_symbol)
-
-        for i, cell in enumerate(self.cells):
-            if i == center_pos:
-                cell.setStyleSheet("""
-                    QLabel {
-                        border: 2px solid #ff5555;
-                        background-color: #3d3d3d;
-                        color: #fff;
-                        font-weight: bold;
-                        font-size: 16px;
-                    }
-                """)
-            else:
-                cell.setStyleSheet("""
-                    QLabel {
-                        border: 1px solid #444;
-                        background-color: #2d2d2d;
-                        color: #fff;
-                        font-weight: bold;
-                        font-size: 16px;
-                    }
-                """)
-
-
-class TuringMachine:
-    def __init__(self):
-        self.tape = {}
-        self.head_pos = 0
-        self.rules = {}
-        self.state = "q0"
-        self.halting_states = set()
-        self.halted = False
-        self.history = []
-        self.step_limit = 1000
-        self.result = None  # Aceita, Rejeita ou None
-        self.transition_history = []  # Histórico detalhado das transições
-        self.states = set()
-        self.tape_alphabet = set()
-        self.initial_state = "q0"
-        self.blank_symbol = "_"
-
-    def reset(self):
-        self.tape = {}
+        self.tape = None
         self.head_pos = 0
-        self.state = self.initial_state
-        self.halted = False
-        self.history = []
-        self.result = None
-        self.transition_history = []
-
-    def load_machine_definition(self, states, tape_alphabet, initial_state, blank_symbol):
-        self.states = set(states.split())
-        self.tape_alphabet = set(tape_alphabet.split(','))
-        self.initial_state = initial_state
-        self.blank_symbol = blank_symbol
-        
-        # Adicionar símbolos especiais obrigatórios
-        self.tape_alphabet.update(['⊳', '_', self.blank_symbol])
-        
-    def load_rules(self, rules_text, halting_states_str):
-        self.rules = {}
-        self.halting_states = set(halting_states_str.split())
-        for line in rules_text.split('\n'):
-            linha = line.strip()
-            if not linha or linha.startswith('#'):
-                continue
-            parts = linha.split()
-            if len(parts) != 5:
-                continue
-            e_from, sym_read, sym_write, move, e_to = parts
-            move = move.upper()
-            key = (e_from, sym_read)
-            if key not in self.rules:
-                self.rules[key] = []
-            self.rules[key].append((sym_write, move, e_to))
-
-    def step(self):
-        if self.state in self.halting_states:
-            self.halted = True
-            return False
+        self.cell_width = 40
+        self.visits = None  # Cópia de ExecutionProfile.visits, ou None sem perfil
+        self.visit_scale = 1.0
+        self.setMinimumHeight(self.ARROW_HEIGHT + self.CELL_HEIGHT + self.MINIMAP_HEIGHT + 6)
+        self.setMinimumWidth(200)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+    def sizeHint(self):
+        return QSize(31 * 40, self.minimumHeight())
+
+    def update_tape(self, tape, head_pos, visits=None):
+        self.tape = tape
+        self.head_pos = head_pos
+        self.visits = visits or None
+        if self.visits:
+            self.visit_scale = math.log1p(max(self.visits.values()))
+        self.update()
+
+    def heat_color(self, count):
+        # Escala logarítmica: células pouco visitadas continuam visíveis
+        alpha = 60 + int(195 * math.log1p(count) / self.visit_scale)
+        return QColor(255, 140, 0, min(alpha, 255))
+
+    def set_cell_width(self, width):
+        width = min(max(width, self.MIN_CELL_WIDTH), self.MAX_CELL_WIDTH)
+        if width != self.cell_width:
+            self.cell_width = width
+            self.update()
+
+    def zoom_in(self):
+        for level in self.ZOOM_LEVELS:
+            if level > self.cell_width:
+                self.set_cell_width(level)
+                return
 
-        current_symbol = self.tape.get(self.head_pos, self.blank_symbol)
-        chave = (self.state, current_symbol)
-        
-        if chave not in self.rules:
-            self.halted = True
-            return False
+    def zoom_out(self):
+        for level in reversed(self.ZOOM_LEVELS):
+            if level < self.cell_width:
+                self.set_cell_width(level)
+                return
 
-        transitions = self.rules[chave]
-        if len(transitions) > 1:
-            # Não determinismo - usamos a primeira transição
-            pass
-        
-        sym_write, move, next_state = transitions[0]
+    def wheelEvent(self, event):
+        if event.angleDelta().y() > 0:
+            self.zoom_in()
+        elif event.angleDelta().y() < 0:
+            self.zoom_out()
+        event.accept()
+
+    def visible_range(self):
+        """Posições (primeira, última + 1) desenhadas e o x da primeira célula"""
+        cw = self.cell_width
+        head_x = (self.width() - cw) // 2
+        left = head_x // cw + 1
+        count = self.width() // cw + 3
+        first = self.head_pos - left
+        return first, first + count, head_x - left * cw
+
+    def symbol_color(self, code):
+        return self.SYMBOL_COLORS[(code - 1) % len(self.SYMBOL_COLORS)]
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.BACKGROUND)
+        if self.tape is None:
+            return
+        cw = self.cell_width
+        top = self.ARROW_HEIGHT
+        height = self.CELL_HEIGHT
+        first, stop, x0 = self.visible_range()
+        codes = self.tape.code_window(first, stop)
+        symbols = self.tape.symbols
+        head_x = x0 + (self.head_pos - first) * cw
+
+        if cw >= self.MIN_TEXT_WIDTH:
+            font = painter.font()
+            font.setBold(True)
+            font.setPixelSize(max(8, min(16, cw * 2 // 5)))
+            painter.setFont(font)
+            painter.setPen(self.BORDER_COLOR)
+            for i, code in enumerate(codes):
+                x = x0 + i * cw
+                painter.fillRect(x, top, cw, height, self.CELL_COLOR)
+                painter.drawRect(x, top, cw - 1, height - 1)
+            painter.fillRect(head_x, top, cw, height, self.HEAD_CELL_COLOR)
+            painter.setPen(self.TEXT_COLOR)
+            for i, code in enumerate(codes):
+                painter.drawText(x0 + i * cw, top, cw, height, Qt.AlignCenter, symbols[code])
+        else:
+            # Células estreitas: faixas de cor, agrupando códigos iguais vizinhos
+            painter.fillRect(0, top, self.width(), height, self.CELL_COLOR)
+            blank = symbols[0]
+            i = 0
+            n = len(codes)
+            while i < n:
+                code = codes[i]
+                j = i + 1
+                while j < n and codes[j] == code:
+                    j += 1
+                if code and symbols[code] != blank:
+                    painter.fillRect(x0 + i * cw, top, (j - i) * cw, height, self.symbol_color(code))
+                i = j
+
+        if self.visits:
+            visits = self.visits
+            bar_top = top + height - self.HEAT_HEIGHT
+            for i in range(stop - first):
+                count = visits.get(first + i)
+                if count:
+                    painter.fillRect(x0 + i * cw, bar_top, cw, self.HEAT_HEIGHT,
+                                     self.heat_color(count))
+
+        # Cabeça: moldura vermelha e seta acima da célula
+        pen = QPen(self.HEAD_COLOR)
+        pen.setWidth(2)
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRect(head_x + 1, top + 1, max(cw - 2, 1), height - 2)
+        font = painter.font()
+        font.setPixelSize(16)
+        painter.setFont(font)
+        center = head_x + cw // 2
+        painter.drawText(center - 20, 0, 40, top, Qt.AlignCenter, "↓")
+
+        self.paint_minimap(painter, top + height + 4, first, stop)
+
+    def paint_minimap(self, painter, top, first, stop):
+        """Faixa que amostra uma célula por coluna de pixel da região escrita"""
+        tape = self.tape
+        width = self.width()
+        height = self.MINIMAP_HEIGHT
+        lo = min(tape.lo, self.head_pos) if tape else self.head_pos
+        hi = max(tape.hi, self.head_pos) if tape else self.head_pos
+        lo = min(lo, first)
+        hi = max(hi, stop - 1)
+        span = hi - lo + 1
+        painter.fillRect(0, top, width, height, self.CELL_COLOR)
+
+        blank = tape.symbols[0]
+        previous = None
+        run_start = 0
+        for x in range(width + 1):
+            code = tape.code_at(lo + x * span // width) if x < width else None
+            if code != previous:
+                if previous and tape.symbols[previous] != blank:
+                    painter.fillRect(run_start, top, x - run_start, height,
+                                     self.symbol_color(previous))
+                previous = code
+                run_start = x
+
+        if self.visits:
+            visits = self.visits
+            for x in range(width):
+                count = visits.get(lo + x * span // width)
+                if count:
+                    painter.fillRect(x, top, 1, 3, self.heat_color(count))
+
+        # Janela visível e posição da cabeça
+        view_x = (first - lo) * width // span
+        view_w = max((stop - first) * width // span, 2)
+        painter.setPen(self.VIEW_COLOR)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRect(view_x, top, view_w - 1, height - 1)
+        head_x = (self.head_pos - lo) * width // span
+        painter.fillRect(head_x, top, 2, height, self.HEAD_COLOR)
+
+
+def format_configuration(estado, tape, head_pos, radius=40):
+    """HTML de uma configuração, mostrando só `radius` células de cada lado do cabeçote.
+
+    Em máquinas de várias fitas `tape` e `head_pos` são listas, uma por fita.
+    """
+    if isinstance(tape, list):
+        fitas = ", ".join(f"Fita {i} = {format_tape(t, h, radius)}"
+                          for i, (t, h) in enumerate(zip(tape, head_pos), 1))
+        return f"Estado = <b style='color: #55ff55'>{html.escape(estado)}</b>, {fitas}"
+    return (f"Estado = <b style='color: #55ff55'>{html.escape(estado)}</b>, "
+            f"Fita = {format_tape(tape, head_pos, radius)}")
+
+
+def format_tape(tape, head_pos, radius=40):
+    lo = max(tape.lo, head_pos - radius) if tape else head_pos
+    hi = min(tape.hi, head_pos + radius) if tape else head_pos
+    lo, hi = min(lo, head_pos), max(hi, head_pos)
+
+    # Formata a fita destacando a célula atual
+    formatted_tape = "…" if tape and lo > tape.lo else ""
+    for pos, char in enumerate(tape.window(lo, hi + 1), lo):
+        char = html.escape(char)
+        if pos == head_pos:
+            formatted_tape += f"[<b style='color: #ff5555'>{char}</b>]"
+        else:
+            formatted_tape += char
+    if tape and hi < tape.hi:
+        formatted_tape += "…"
+    return formatted_tape
 
-        # Salva histórico antes da transição
-        min_pos = min(self.tape.keys()) if self.tape else 0
-        max_pos = max(self.tape.keys()) if self.tape else 0
-        fita_str = "".join(self.tape.get(i, self.blank_symbol) for i in range(min_pos, max_pos + 1))
-        self.history.append((self.state, fita_str, self.head_pos))
-        
-        # Salva detalhes da transição para histórico
-        trans_info = f"δ({self.state}, {current_symbol}) = {next_state}, {sym_write}, {move}"
-        self.transition_history.append(trans_info)
 
-        # Aplica a transição
-        if sym_write != self.blank_symbol:
-            self.tape[self.head_pos] = sym_write
-        else:
-            self.tape.pop(self.head_pos, None)
-
-        # Trata os movimentos especiais
-        if move == "Y":
-            self.halted = True
-            self.result = "Aceita"
-        elif move == "N":
-            self.halted = True
-            self.result = "Rejeita"
-        else:  # R ou L
-            if move == "R":
-                self.head_pos += 1
-            elif move == "L":
-                self.head_pos -= 1
-            self.state = next_state
-
-            if self.state in self.halting_states:
-                self.halted = True
+class HistoryModel(QAbstractListModel):
+    """Linhas do histórico formatadas sob demanda a partir de tm.history.
 
-        return True
+    A linha 0 é a configuração inicial; a linha i mostra a configuração
+    anterior ao passo i e a transição aplicada; depois que a máquina para, a
+    última linha mostra a configuração final. Só as linhas que aparecem na
+    tela são formatadas, e as mais recentes ficam num cache pequeno.
+    """
 
-    def get_tape_content(self):
-        if not self.tape:
-            return ""
-        min_pos = min(self.tape.keys())
-        max_pos = max(self.tape.keys())
-        return "".join(self.tape.get(i, self.blank_symbol) for i in range(min_pos, max_pos + 1))
-
-    def load_content(self, input_str):
-        self.tape = {}
-        self.tape[0] = "⊳"
-        self.tape[1] = "_"  # Símbolo de espaço
-        
-        start_idx = 2  # Posição após ⊳⊔
-        for i, char in enumerate(input_str):
-            pos = start_idx + i
-            if char != self.blank_symbol:
-                self.tape[pos] = char
-                
-        self.head_pos = 1  # Começa no ⊔ (posição 1)
-        self.state = self.initial_state
-        self.halted = False
-        self.history = []
-        self.result = None
-        self.transition_history = []
+    def __init__(self, tm, cache_size=512):
+        super().__init__()
+        self.tm = tm
+        self.rows = 0
+        self.final = False
+        self.cache = {}
+        self.cache_size = cache_size
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.rows
+
+    def clear(self):
+        self.beginResetModel()
+        self.rows = 0
+        self.final = False
+        self.cache = {}
+        self.endResetModel()
+
+    def refresh(self, final=False):
+        # Atualiza o número de linhas sem formatar nenhuma delas
+        hist = self.tm.history
+        rows = 0 if hist.initial is None else hist.steps + 1 + (1 if final else 0)
+        if rows > self.rows and not self.final:
+            self.beginInsertRows(QModelIndex(), self.rows, rows - 1)
+            self.rows, self.final = rows, final
+            self.endInsertRows()
+        elif rows != self.rows or final != self.final:
+            self.beginResetModel()
+            self.rows, self.final = rows, final
+            self.cache = {}
+            self.endResetModel()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row = index.row()
+        linha = self.cache.get(row)
+        if linha is None:
+            if len(self.cache) >= self.cache_size:
+                self.cache.clear()
+            linha = self.cache[row] = self.format_row(row)
+        return linha
+
+    def format_row(self, row):
+        hist = self.tm.history
+        if row == 0:
+            estado, tape, head_pos = hist.configuration(0)
+            titulo, trans_info = "Setup", "Configuração inicial"
+        elif row <= hist.steps:
+            estado, tape, head_pos = hist.configuration(row - 1)
+            titulo, trans_info = f"Passo {row}", hist.transition_info(row - 1)
+        else:
+            estado, tape, head_pos = hist.configuration(hist.steps)
+            titulo, trans_info = f"Passo {hist.steps}", "Configuração final"
+        return (f"<div style='color: #dcdcdc'><b>{titulo}</b>: "
+                f"{format_configuration(estado, tape, head_pos)}"
+                f"<br><i style='color: #888'>{html.escape(trans_info)}</i></div>")
+
+
+class HtmlDelegate(QStyledItemDelegate):
+    """Desenha as linhas do histórico em HTML, todas com a mesma altura"""
+
+    def paint(self, painter, option, index):
+        painter.save()
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, QColor("#3d3d3d"))
+        doc = QTextDocument()
+        doc.setDefaultFont(option.font)
+        doc.setHtml(index.data())
+        painter.translate(option.rect.topLeft())
+        painter.setClipRect(0, 0, option.rect.width(), option.rect.height())
+        doc.drawContents(painter)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), 2 * option.fontMetrics.lineSpacing() + 10)
+
+
+class RunWorker(QObject):
+    """Executa a máquina fora da thread da interface.
+
+    Roda blocos curtos de passos (com histórico e detecção de laços) e publica
+    uma cópia da configuração no máximo `fps` vezes por segundo. Pausar e
+    cancelar valem a partir do próximo bloco.
+    """
+    progress = pyqtSignal(object)
+    limit_reached = pyqtSignal()
+    finished = pyqtSignal()
+
+    def __init__(self, tm, fps=30, chunk=2000):
+        super().__init__()
+        self.tm = tm
+        self.interval = 1.0 / fps
+        self.chunk = chunk
+        self.cancelled = False
+        self._resume = threading.Event()
+        self._resume.set()
+
+    def pause(self):
+        self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    def cancel(self):
+        self.cancelled = True
+        self._resume.set()
+
+    def snapshot(self, rate):
+        # Cópia da fita: a interface nunca lê a máquina enquanto ela roda
+        tm = self.tm
+        return {
+            "steps": tm.steps,
+            "state": tm.state,
+            "heads": list(tm.heads),
+            "tapes": [tape.copy() for tape in tm.tapes],
+            "visits": dict(tm.profile.visits) if tm.profile is not None else None,
+            "rate": rate,
+        }
+
+    def run(self):
+        tm = self.tm
+        last_emit = time.perf_counter()
+        last_steps = tm.steps
+        rate = 0.0
+        until_limit = max(tm.step_limit, 1)
+        try:
+            while not tm.halted and not self.cancelled:
+                self._resume.wait()
+                if self.cancelled:
+                    break
+                result = tm.run(min(self.chunk, until_limit), record=True, detect_loops=True)
+                until_limit -= result.steps
+
+                now = time.perf_counter()
+                if now - last_emit >= self.interval:
+                    rate = (tm.steps - last_steps) / (now - last_emit)
+                    last_emit, last_steps = now, tm.steps
+                    self.progress.emit(self.snapshot(rate))
+
+                if until_limit <= 0 and not tm.halted:
+                    # Espera a interface confirmar se deve continuar
+                    self.pause()
+                    self.progress.emit(self.snapshot(rate))
+                    self.limit_reached.emit()
+                    until_limit = max(tm.step_limit, 1)
+                    last_emit, last_steps = time.perf_counter(), tm.steps
+        finally:
+            # Devolve a interface mesmo se a execução levantar exceção
+            self.progress.emit(self.snapshot(rate))
+            self.finished.emit()
 
 
 class TuringMachineGUI(QMainWindow):
+    MAX_HIGHLIGHTS = 1000  # Linhas destacadas no editor de regras
+    RESULT_CELLS = 2000  # Células da fita final mostradas no diálogo de resultado
+
     def __init__(self):
         super().__init__()
         self.tm = TuringMachine()
         self.setup_done = False
         self.history_visible = True
+        self.run_thread = None
+        self.run_worker = None
+        self.definition_key = None  # Hash da definição já validada e carregada em self.tm
+        self.definition_dirty = True  # Algum campo da definição foi editado desde o hash
+        self.rules_validator = RulesValidator()  # Atualizado só nas linhas editadas
+        self.input_file = None  # Entrada lida de arquivo por "Load Input", no lugar do campo
         self.init_ui()
         self.setWindowTitle("Turing Machine Simulator")
         self.resize(1200, 650)
@@ -276,8 +470,9 @@ class TuringMachineGUI(QMainWindow):
             }
             QPushButton:hover { background-color: #4d4d4d; }
             QPushButton:pressed { background-color: #2d2d2d; }
+            QPushButton:checked { background-color: #6d4d2d; }
             QLabel { color: #fff; }
-            QTextEdit#historyBox {
+            QListView#historyBox {
                 background-color: #1e1e1e; 
                 color: #dcdcdc; 
                 font-family: monospace;
@@ -285,37 +480,71 @@ class TuringMachineGUI(QMainWindow):
             }
         """)
 
-        self.tape_widget = TapeWidget()
-        self.tape_scroll = QScrollArea()
-        self.tape_scroll.setFrameStyle(QFrame.NoFrame)
-        self.tape_scroll.setWidgetResizable(True)
-        self.tape_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
-        self.tape_scroll.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.tape_scroll.setWidget(self.tape_widget)
-        left_layout.addWidget(self.tape_scroll)
+        # Uma linha por fita; self.tape_widget é a fita 1
+        self.tape_widgets = []
+        self.tapes_layout = QVBoxLayout()
+        self.tapes_layout.setSpacing(2)
+        left_layout.addLayout(self.tapes_layout)
+        self.set_tape_rows(1)
 
         info_layout = QHBoxLayout()
         self.state_label = QLabel("Estado: q0")
         self.state_label.setStyleSheet("font-weight: bold; font-size: 14px;")
         self.status_label = QLabel("Status: Ready")
         self.status_label.setStyleSheet("font-weight: bold; font-size: 14px;")
+        self.rate_label = QLabel("")
         info_layout.addWidget(self.state_label)
         info_layout.addStretch()
+        info_layout.addWidget(self.rate_label)
+        info_layout.addStretch()
+        self.zoom_out_button = QPushButton("Zoom −")
+        self.zoom_out_button.clicked.connect(lambda: self.zoom_tapes(TapeWidget.zoom_out))
+        self.zoom_in_button = QPushButton("Zoom +")
+        self.zoom_in_button.clicked.connect(lambda: self.zoom_tapes(TapeWidget.zoom_in))
+        info_layout.addWidget(self.zoom_out_button)
+        info_layout.addWidget(self.zoom_in_button)
         info_layout.addWidget(self.status_label)
         left_layout.addLayout(info_layout)
 
+        # Linha do tempo: volta a qualquer passo registrado no histórico
+        timeline_layout = QHBoxLayout()
+        self.timeline_slider = QSlider(Qt.Horizontal)
+        self.timeline_slider.setRange(0, 0)
+        self.timeline_slider.valueChanged.connect(self.seek_to)
+        self.timeline_label = QLabel("Passo 0 / 0")
+        timeline_layout.addWidget(QLabel("Linha do tempo:"))
+        timeline_layout.addWidget(self.timeline_slider, 1)
+        timeline_layout.addWidget(self.timeline_label)
+        left_layout.addLayout(timeline_layout)
+
         control_layout = QHBoxLayout()
         self.run_button = QPushButton("Run")
         self.run_button.clicked.connect(self.run_machine)
         self.step_button = QPushButton("Step")
         self.step_button.clicked.connect(self.step_machine)
+        self.step_back_button = QPushButton("Step Back")
+        self.step_back_button.clicked.connect(self.step_back)
         self.reset_button = QPushButton("Reset")
         self.reset_button.clicked.connect(self.reset_machine)
+        self.pause_button = QPushButton("Pausar")
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.pause_button.setEnabled(False)
+        self.cancel_button = QPushButton("Cancelar")
+        self.cancel_button.clicked.connect(self.cancel_run)
+        self.cancel_button.setEnabled(False)
+        self.profile_button = QPushButton("Perfil")
+        self.profile_button.setCheckable(True)
+        self.profile_button.setToolTip("Conta passos por regra, estado e célula da fita")
+        self.profile_button.toggled.connect(self.toggle_profile)
         self.toggle_hist_button = QPushButton("Mostrar/Esconder Histórico")
         self.toggle_hist_button.clicked.connect(self.toggle_history)
         control_layout.addWidget(self.run_button)
+        control_layout.addWidget(self.step_back_button)
         control_layout.addWidget(self.step_button)
         control_layout.addWidget(self.reset_button)
+        control_layout.addWidget(self.pause_button)
+        control_layout.addWidget(self.cancel_button)
+        control_layout.addWidget(self.profile_button)
         control_layout.addWidget(self.toggle_hist_button)
         left_layout.addLayout(control_layout)
 
@@ -353,7 +582,15 @@ class TuringMachineGUI(QMainWindow):
         blank_symbol_layout.addWidget(QLabel("Símbolo Branco (□):"))
         blank_symbol_layout.addWidget(self.blank_symbol_field)
         machine_layout.addLayout(blank_symbol_layout)
-        
+
+        # Número de fitas; com k > 1 cada campo das regras tem k símbolos
+        tapes_layout = QHBoxLayout()
+        self.tapes_field = QLineEdit("1")
+        self.tapes_field.setPlaceholderText("Ex: 2")
+        tapes_layout.addWidget(QLabel("Fitas (k):"))
+        tapes_layout.addWidget(self.tapes_field)
+        machine_layout.addLayout(tapes_layout)
+
         left_layout.addWidget(machine_group)
 
         config_group = QWidget()
@@ -363,8 +600,14 @@ class TuringMachineGUI(QMainWindow):
         input_layout = QHBoxLayout()
         self.input_field = QLineEdit()
         self.input_field.setPlaceholderText("Insira o conteúdo inicial da fita (w)")
+        self.input_field.textEdited.connect(self.clear_input_file)
+        self.load_input_button = QPushButton("Load Input")
+        self.load_input_button.setToolTip("Carrega a entrada de um arquivo de texto (UTF-8), "
+                                          "direto para a fita")
+        self.load_input_button.clicked.connect(self.load_input_file)
         input_layout.addWidget(QLabel("Conteúdo Inicial:"))
         input_layout.addWidget(self.input_field)
+        input_layout.addWidget(self.load_input_button)
         config_layout.addLayout(input_layout)
 
         halting_layout = QHBoxLayout()
@@ -388,9 +631,12 @@ class TuringMachineGUI(QMainWindow):
             "Digite regras, uma por linha, no formato:\n"
             "q0 a x R q1\n"
             "q0 a x Y qH   # Aceita\n"
-            "q0 b _ N qR   # Rejeita"
+            "q0 b _ N qR   # Rejeita\n"
+            "q0 a,_ a,a R,R q1   # Com 2 fitas"
         )
         rules_layout.addWidget(self.rules_edit)
+        self.rules_status_label = QLabel("")
+        rules_layout.addWidget(self.rules_status_label)
         config_layout.addLayout(rules_layout)
 
         # Botões para salvar/carregar configuração completa
@@ -405,21 +651,88 @@ class TuringMachineGUI(QMainWindow):
 
         left_layout.addWidget(config_group)
 
-        self.history_box = QTextEdit()
-        self.history_box.setObjectName("historyBox")  # Para aplicar o estilo CSS
-        self.history_box.setReadOnly(True)
-        self.history_box.setStyleSheet("""
+        # Histórico virtualizado: as linhas são formatadas só quando aparecem
+        self.history_model = HistoryModel(self.tm)
+        self.history_view = QListView()
+        self.history_view.setObjectName("historyBox")  # Para aplicar o estilo CSS
+        self.history_view.setModel(self.history_model)
+        self.history_view.setItemDelegate(HtmlDelegate(self.history_view))
+        self.history_view.setUniformItemSizes(True)
+        self.history_view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.history_view.setStyleSheet("""
             background-color: #1e1e1e; 
             color: #dcdcdc; 
             font-family: monospace;
             border: 1px solid #444;
         """)
-        main_layout.addWidget(self.history_box, 1)
+
+        jump_layout = QHBoxLayout()
+        self.jump_field = QLineEdit()
+        self.jump_field.setPlaceholderText("Ir para o passo...")
+        self.jump_field.returnPressed.connect(self.jump_to_step)
+        self.jump_button = QPushButton("Ir")
+        self.jump_button.clicked.connect(self.jump_to_step)
+        jump_layout.addWidget(self.jump_field)
+        jump_layout.addWidget(self.jump_button)
+
+        self.history_panel = QWidget()
+        history_layout = QVBoxLayout()
+        history_layout.setContentsMargins(0, 0, 0, 0)
+        history_layout.addLayout(jump_layout)
+        history_layout.addWidget(self.history_view)
+
+        # Relatório do perfil (transições mais executadas), visível com o perfil ligado
+        self.profile_view = QTextEdit()
+        self.profile_view.setReadOnly(True)
+        self.profile_view.setLineWrapMode(QTextEdit.NoWrap)
+        self.profile_view.setStyleSheet("font-family: monospace;")
+        self.profile_view.setVisible(False)
+        history_layout.addWidget(self.profile_view)
+        self.history_panel.setLayout(history_layout)
+        main_layout.addWidget(self.history_panel, 1)
+
+        for field in (self.states_field, self.tape_alphabet_field, self.initial_state_field,
+                      self.blank_symbol_field, self.tapes_field, self.halting_field,
+                      self.rules_edit):
+            field.textChanged.connect(self.mark_definition_dirty)
+
+        # Validação ao digitar: as linhas alteradas entram no validador na hora,
+        # e os destaques (e a carga da máquina) saem 300 ms depois da última edição
+        self.rules_validator.set_text(self.rules_edit.toPlainText())
+        self.rules_edit.document().contentsChange.connect(self.rules_changed)
+        self.validation_timer = QTimer(self)
+        self.validation_timer.setSingleShot(True)
+        self.validation_timer.setInterval(300)
+        self.validation_timer.timeout.connect(self.live_validate)
 
         self.update_display()
 
+    def set_tape_rows(self, count):
+        while len(self.tape_widgets) < count:
+            widget = TapeWidget()
+            if self.tape_widgets:
+                widget.set_cell_width(self.tape_widgets[0].cell_width)
+            self.tape_widgets.append(widget)
+            self.tapes_layout.addWidget(widget)
+        while len(self.tape_widgets) > count:
+            widget = self.tape_widgets.pop()
+            self.tapes_layout.removeWidget(widget)
+            widget.deleteLater()
+        self.tape_widget = self.tape_widgets[0]
+
+    def zoom_tapes(self, zoom):
+        for widget in self.tape_widgets:
+            zoom(widget)
+
+    def update_tapes(self, tapes, heads, visits=None):
+        # As visitas do perfil são as do cabeçote da fita 1
+        for i, (widget, tape, head_pos) in enumerate(zip(self.tape_widgets, tapes, heads)):
+            widget.update_tape(tape, head_pos, visits if i == 0 else None)
+
     def update_display(self):
-        self.tape_widget.update_tape(self.tm.tape, self.tm.head_pos, self.tm.blank_symbol)
+        profile = self.tm.profile
+        self.update_tapes(self.tm.tapes, self.tm.heads,
+                          dict(profile.visits) if profile is not None else None)
         self.state_label.setText(f"Estado: {self.tm.state}")
 
         if self.tm.halted:
@@ -433,21 +746,67 @@ class TuringMachineGUI(QMainWindow):
             else:
                 self.status_label.setText("Status: Running")
 
-        cell_width = 40
-        center_index = self.tape_widget.visible_cells // 2
-        center_pixel = center_index * cell_width
-        half_view = self.tape_scroll.viewport().width() // 2
-        target = center_pixel - half_view + (cell_width // 2)
-        if target < 0:
-            target = 0
-        max_scroll = self.tape_scroll.horizontalScrollBar().maximum()
-        if target > max_scroll:
-            target = max_scroll
-        self.tape_scroll.horizontalScrollBar().setValue(target)
+        self.update_timeline()
+        if profile is not None:
+            self.profile_view.setPlainText("\n".join(profile.report(self.tm.rules)))
+
+    def toggle_profile(self, checked):
+        # As contagens valem a partir daqui; Run e o primeiro Step recomeçam do zero
+        self.tm.profile = ExecutionProfile() if checked else None
+        self.profile_view.setVisible(checked)
+        self.profile_view.clear()
+        self.update_display()
+
+    def restart_profile(self):
+        if self.profile_button.isChecked():
+            self.tm.profile = ExecutionProfile()
+
+    def update_timeline(self):
+        total = self.tm.history.steps if len(self.tm.history) else 0
+        self.timeline_slider.blockSignals(True)
+        self.timeline_slider.setRange(0, total)
+        self.timeline_slider.setValue(min(self.tm.steps, total))
+        self.timeline_slider.blockSignals(False)
+        self.timeline_label.setText(f"Passo {min(self.tm.steps, total)} / {total}")
+        self.step_back_button.setEnabled(self.run_worker is None and 0 < self.tm.steps <= total)
+
+    def seek_to(self, passo):
+        # Reconstrói a configuração a partir do checkpoint mais próximo; o
+        # histórico adiante só é descartado se a máquina der um novo passo
+        if self.run_worker is not None or not len(self.tm.history):
+            return
+        self.tm.seek(min(max(passo, 0), self.tm.history.steps))
+        self.setup_done = True
+        self.update_display()
+        rows = self.history_model.rowCount()
+        if rows:
+            index = self.history_model.index(min(self.tm.steps + 1, rows - 1))
+            self.history_view.scrollTo(index, QAbstractItemView.PositionAtCenter)
+            self.history_view.setCurrentIndex(index)
+
+    def step_back(self):
+        if self.tm.steps > 0:
+            self.seek_to(self.tm.steps - 1)
 
     def toggle_history(self):
         self.history_visible = not self.history_visible
-        self.history_box.setVisible(self.history_visible)
+        self.history_panel.setVisible(self.history_visible)
+
+    def jump_to_step(self):
+        try:
+            passo = int(self.jump_field.text().strip())
+        except ValueError:
+            return
+        rows = self.history_model.rowCount()
+        if not rows:
+            return
+        index = self.history_model.index(min(max(passo, 0), rows - 1))
+        self.history_view.scrollTo(index, QAbstractItemView.PositionAtCenter)
+        self.history_view.setCurrentIndex(index)
+
+    def refresh_history(self, final=False):
+        self.history_model.refresh(final)
+        self.history_view.scrollToBottom()
 
     def confirm_continue(self, X):
         reply = QMessageBox.question(
@@ -497,49 +856,108 @@ class TuringMachineGUI(QMainWindow):
         if undefined_halting:
             errors.append(f"Estados de parada não definidos: {', '.join(undefined_halting)}")
         
-        # 4. Verificar alfabeto da fita
+        # 4. Verificar número de fitas
+        tapes_text = self.tapes_field.text().strip()
+        if tapes_text and (not tapes_text.isdigit() or int(tapes_text) < 1):
+            errors.append(f"Número de fitas inválido: '{tapes_text}'")
+
+        # 5. Verificar alfabeto da fita
         gamma = set(self.tape_alphabet_field.text().split(','))
         if not gamma:
             warnings.append("Alfabeto da fita está vazio")
 
-        # 5. Verificar regras
-        rules_text = self.rules_edit.toPlainText().strip()
-        if rules_text:
-            # Verificar estados usados nas regras
-            used_states = set()
-            undefined_states = set()
-            undefined_symbols = set()
-            
-            for line in rules_text.split('\n'):
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                parts = line.split()
-                if len(parts) != 5:
-                    continue
-                
-                e_from, sym_read, sym_write, move, e_to = parts
-                used_states.add(e_from)
-                used_states.add(e_to)
-                
-                # Verificar se símbolos pertencem ao alfabeto
-                if sym_read != '_' and sym_read not in gamma:
-                    undefined_symbols.add(sym_read)
-                if sym_write != '_' and sym_write not in gamma:
-                    undefined_symbols.add(sym_write)
-            
-            # Estados usados mas não definidos
-            undefined_states = used_states - states
-            if undefined_states:
-                errors.append(f"Estados usados nas regras mas não definidos: {', '.join(undefined_states)}")
-            
-            # Símbolos não pertencentes ao alfabeto
-            if undefined_symbols:
-                errors.append(f"Símbolos usados nas regras não pertencem ao alfabeto Γ: {', '.join(undefined_symbols)}")
-        
+        # 6. Verificar regras: o validador já acompanha cada linha editada e
+        # guarda os estados e símbolos usados, então nada é reanalisado aqui
+        self.sync_rules_validator()
+        errors.extend(self.rules_validator.errors())
+
         return errors, warnings
 
-    def load_rules(self):
+    def current_config(self):
+        # Todos os campos da interface, no formato do arquivo .tmc
+        return {
+            "states": self.states_field.text().strip(),
+            "tape_alphabet": self.tape_alphabet_field.text().strip(),
+            "initial_state": self.initial_state_field.text().strip(),
+            "blank_symbol": self.blank_symbol_field.text().strip(),
+            "tapes": self.tapes_field.text().strip(),
+            "halting_states": self.halting_field.text().strip(),
+            "step_limit": self.step_limit_field.text().strip(),
+            "rules": self.rules_edit.toPlainText().strip(),
+            "input": self.input_field.text().strip()
+        }
+
+    def mark_definition_dirty(self):
+        self.definition_dirty = True
+        self.validation_timer.start()
+
+    def rules_changed(self, position, removed, added):
+        # Repassa ao validador só os blocos (linhas) tocados pela edição
+        doc = self.rules_edit.document()
+        first = doc.findBlock(position).blockNumber()
+        last_block = doc.findBlock(position + added)
+        last = last_block.blockNumber() if last_block.isValid() else doc.blockCount() - 1
+        count = last - first + 1
+        removed_lines = len(self.rules_validator.lines) - doc.blockCount() + count
+        block = doc.findBlockByNumber(first)
+        texts = []
+        for _ in range(count):
+            texts.append(block.text())
+            block = block.next()
+        self.rules_validator.replace_lines(first, removed_lines, texts)
+
+    def sync_rules_validator(self):
+        self.rules_validator.set_definition(set(self.states_field.text().split()),
+                                            set(self.tape_alphabet_field.text().split(',')),
+                                            tape_count(self.current_config()))
+
+    def live_validate(self):
+        """Destaca as linhas com problemas e, sem erros, já deixa a máquina carregada"""
+        self.sync_rules_validator()
+        problems = self.rules_validator.line_problems()
+        doc = self.rules_edit.document()
+        selections = []
+        for line, (severity, _) in problems[:self.MAX_HIGHLIGHTS]:
+            selection = QTextEdit.ExtraSelection()
+            selection.format.setBackground(QColor("#5a2a2a" if severity == ERROR else "#5a4a1a"))
+            selection.format.setProperty(QTextFormat.FullWidthSelection, True)
+            selection.cursor = QTextCursor(doc.findBlockByNumber(line))
+            selections.append(selection)
+        self.rules_edit.setExtraSelections(selections)
+
+        if problems:
+            line, (severity, message) = problems[0]
+            color = "#ff7777" if severity == ERROR else "#e0c060"
+            self.rules_status_label.setStyleSheet(f"color: {color};")
+            self.rules_status_label.setText(
+                f"{len(problems)} linha(s) com problemas. Linha {line + 1}: {message}")
+        else:
+            self.rules_status_label.setStyleSheet("color: #77dd77;")
+            self.rules_status_label.setText("Regras válidas" if any(self.rules_validator.parsed)
+                                            else "")
+
+        if self.run_worker is None and self.load_rules(interactive=False):
+            if self.tm.compiled is None:
+                self.tm.compile()
+
+    def load_rules(self, interactive=True):
+        # Com interactive=False (validação ao digitar) nenhum diálogo é aberto
+        try:
+            self.tm.step_limit = int(self.step_limit_field.text().strip())
+        except ValueError:
+            self.tm.step_limit = 1000
+
+        # Se nenhum campo da definição mudou, a máquina já carregada (com a
+        # tabela compilada) continua valendo: nada é revalidado. O hash só é
+        # recalculado depois de alguma edição
+        if not self.definition_dirty and self.definition_key is not None:
+            return True
+        key = definition_key(self.current_config())
+        self.definition_dirty = False
+        if key == self.definition_key:
+            return True
+        self.definition_key = None
+
         # Carregar definição da máquina
         states = self.states_field.text().strip()
         tape_alphabet = self.tape_alphabet_field.text().strip()
@@ -547,38 +965,49 @@ class TuringMachineGUI(QMainWindow):
         blank_symbol = self.blank_symbol_field.text().strip()
         
         if not states or not tape_alphabet or not initial_state or not blank_symbol:
-            QMessageBox.warning(self, "Warning", "Definição incompleta da máquina.")
+            if interactive:
+                QMessageBox.warning(self, "Warning", "Definição incompleta da máquina.")
             return False
             
         # Validar definição antes de carregar
         errors, warnings = self.validate_machine_definition()
         
-        if warnings:
+        if warnings and interactive:
             QMessageBox.warning(self, "Avisos", "\n".join(warnings))
             
         if errors:
-            QMessageBox.critical(self, "Erros de Validação", "\n".join(errors))
+            if interactive:
+                QMessageBox.critical(self, "Erros de Validação", "\n".join(errors))
             return False
             
+        self.set_tape_count(tape_count(self.current_config()))
         self.tm.load_machine_definition(states, tape_alphabet, initial_state, blank_symbol)
         
         # Carregar regras de transição
         rules_text = self.rules_edit.toPlainText().strip()
         if not rules_text:
-            QMessageBox.warning(self, "Warning", "Nenhuma regra foi carregada.")
+            if interactive:
+                QMessageBox.warning(self, "Warning", "Nenhuma regra foi carregada.")
             return False
 
         halting_text = self.halting_field.text().strip()
-        step_text = self.step_limit_field.text().strip()
-        
-        try:
-            self.tm.step_limit = int(step_text)
-        except:
-            self.tm.step_limit = 1000
-
         self.tm.load_rules(rules_text, halting_text)
+        self.tm.definition_key = self.definition_key = key
         return True
 
+    def set_tape_count(self, k):
+        # Troca a máquina quando o número de fitas muda
+        if k == self.tm.tape_count:
+            return
+        tm = MultiTapeTuringMachine(k) if k > 1 else TuringMachine()
+        tm.step_limit = self.tm.step_limit
+        tm.profile = self.tm.profile
+        self.tm = tm
+        self.history_model.tm = tm
+        self.history_model.clear()
+        self.setup_done = False
+        self.set_tape_rows(k)
+
     def save_config_file(self):
         file_name, _ = QFileDialog.getSaveFileName(
             self, "Salvar Configuração Completa", "", "Turing Machine Config (*.tmc);;All Files (*)"
@@ -586,16 +1015,7 @@ class TuringMachineGUI(QMainWindow):
         if file_name:
             try:
                 # Coletar todas as configurações
-                config = {
-                    "states": self.states_field.text().strip(),
-                    "tape_alphabet": self.tape_alphabet_field.text().strip(),
-                    "initial_state": self.initial_state_field.text().strip(),
-                    "blank_symbol": self.blank_symbol_field.text().strip(),
-                    "halting_states": self.halting_field.text().strip(),
-                    "step_limit": self.step_limit_field.text().strip(),
-                    "rules": self.rules_edit.toPlainText().strip(),
-                    "input": self.input_field.text().strip()
-                }
+                config = self.current_config()
                 
                 with open(file_name, 'w') as f:
                     json.dump(config, f, indent=4)
@@ -618,89 +1038,145 @@ class TuringMachineGUI(QMainWindow):
                 self.tape_alphabet_field.setText(config.get("tape_alphabet", ""))
                 self.initial_state_field.setText(config.get("initial_state", "q0"))
                 self.blank_symbol_field.setText(config.get("blank_symbol", "_"))
+                self.tapes_field.setText(config.get("tapes", "1"))
                 self.halting_field.setText(config.get("halting_states", ""))
                 self.step_limit_field.setText(config.get("step_limit", "1000"))
                 self.rules_edit.setPlainText(config.get("rules", ""))
                 self.input_field.setText(config.get("input", ""))
+                self.clear_input_file()
                 
                 QMessageBox.information(self, "Success", "Configuração completa carregada com sucesso!")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Falha ao carregar configuração: {str(e)}")
 
-    def append_to_history(self, estado, fita_str, head_pos, trans_info=None, is_setup=False):
-        # Formata a fita destacando a célula atual
-        formatted_tape = ""
-        for i, char in enumerate(fita_str):
-            if i == head_pos:
-                formatted_tape += f"[<b style='color: #ff5555'>{char}</b>]"
-            else:
-                formatted_tape += char
-                
-        # Adiciona detalhes da transição se disponível
-        trans_details = f"<br><i style='color: #888'>{trans_info}</i>" if trans_info else ""
-        
-        if is_setup:
-            # Passo de setup
-            linha = (f"<b>Setup</b>: Estado = <b style='color: #55ff55'>{estado}</b>, "
-                     f"Fita = {formatted_tape}{trans_details}")
+    def load_input(self):
+        """Escreve a entrada (do campo ou do arquivo carregado) na fita; False se inválida"""
+        if self.input_file is not None:
+            try:
+                invalids = self.tm.load_content_file(self.input_file)
+            except OSError as e:
+                QMessageBox.critical(self, "Error", f"Falha ao ler a entrada: {str(e)}")
+                return False
         else:
-            # Passo normal
-            passo = len(self.tm.transition_history)
-            linha = (f"<b>Passo {passo}</b>: Estado = <b style='color: #55ff55'>{estado}</b>, "
-                     f"Fita = {formatted_tape}{trans_details}")
-            
-        self.history_box.append(linha)
-        self.history_box.verticalScrollBar().setValue(self.history_box.verticalScrollBar().maximum())
+            w = self.input_field.text().strip()
+            valid, invalids = self.validate_input(w)
+            if valid:
+                # Entrada vazia vira a configuração (⊳⊔)
+                self.tm.load_content(w)
+        if invalids:
+            symbols_str = ", ".join(sorted(invalids))
+            QMessageBox.warning(self, "Símbolos inválidos",
+                                f"Os símbolos '{symbols_str}' não fazem parte do alfabeto Γ definido.")
+            return False
+        return True
+
+    def load_input_file(self):
+        file_name, _ = QFileDialog.getOpenFileName(
+            self, "Carregar Entrada", "", "Text Files (*.txt);;All Files (*)"
+        )
+        if not file_name:
+            return
+        self.input_file = file_name
+        self.input_field.clear()
+        self.input_field.setPlaceholderText(f"Entrada do arquivo {os.path.basename(file_name)}")
+
+        # Já deixa a fita pronta para o primeiro Step
+        self.history_model.clear()
+        self.setup_done = False
+        if self.load_rules() and self.load_input():
+            self.restart_profile()
+            self.setup_done = True
+            self.refresh_history()
+            self.rate_label.setText(f"Entrada: {os.path.getsize(file_name):,} bytes")
+        self.update_display()
+
+    def clear_input_file(self):
+        # Digitar no campo volta a usar a entrada digitada
+        if self.input_file is not None:
+            self.input_file = None
+            self.input_field.setPlaceholderText("Insira o conteúdo inicial da fita (w)")
 
     def run_machine(self):
-        self.history_box.clear()
+        self.history_model.clear()
         self.setup_done = False
 
         if not self.load_rules():
             return
 
-        w = self.input_field.text().strip()
-        valid, invalids = self.validate_input(w)
-        if not valid:
-            symbols_str = ", ".join(sorted(invalids))
-            QMessageBox.warning(self, "Símbolos inválidos",
-                                f"Os símbolos '{symbols_str}' não fazem parte do alfabeto Γ definido.")
+        if not self.load_input():
             return
+        self.restart_profile()
 
-        if w:
-            self.tm.load_content(w)
-        else:
-            # Tratar entrada vazia como configuração (⊳⊔)
-            self.tm.load_content("")
-            
-        estado0 = self.tm.state
-        fita0 = self.tm.get_tape_content()
-        head0 = self.tm.head_pos
-        self.tm.history.append((estado0, fita0, head0))
-        # Registro especial para o setup
-        self.append_to_history(estado0, fita0, head0, "Configuração inicial", True)
+        self.refresh_history()
         self.update_display()
 
-        passos = 0
-        while not self.tm.halted:
-            if passos >= self.tm.step_limit:
-                resp = self.confirm_continue(self.tm.step_limit)
-                if not resp:
-                    break
-                passos = 0
-            executou = self.tm.step()
-            if not executou:
-                break
-            estado_atual, fita_atual, head_atual = self.tm.history[-1]
-            trans_info = self.tm.transition_history[-1] if self.tm.transition_history else None
-            self.append_to_history(estado_atual, fita_atual, head_atual, trans_info)
-            self.update_display()
-            passos += 1
+        self.start_worker()
+
+    def start_worker(self):
+        # A simulação roda numa QThread; a interface só recebe cópias da
+        # configuração, limitadas a 30 atualizações por segundo
+        self.run_thread = QThread(self)
+        self.run_worker = RunWorker(self.tm)
+        self.run_worker.moveToThread(self.run_thread)
+        self.run_thread.started.connect(self.run_worker.run)
+        self.run_worker.progress.connect(self.show_progress)
+        self.run_worker.limit_reached.connect(self.ask_continue)
+        self.run_worker.finished.connect(self.finish_run)
+        self.set_running(True)
+        self.run_thread.start()
+
+    def set_running(self, running):
+        for button in (self.run_button, self.step_button, self.reset_button,
+                       self.load_config_button, self.save_config_button,
+                       self.load_input_button, self.profile_button):
+            button.setEnabled(not running)
+        self.step_back_button.setEnabled(not running)
+        self.timeline_slider.setEnabled(not running)
+        self.pause_button.setEnabled(running)
+        self.cancel_button.setEnabled(running)
+        self.pause_button.setText("Pausar")
+
+    def show_progress(self, snapshot):
+        self.update_tapes(snapshot["tapes"], snapshot["heads"], snapshot["visits"])
+        self.state_label.setText(f"Estado: {snapshot['state']}")
+        paused = self.pause_button.text() == "Continuar"
+        self.status_label.setText("Status: Paused" if paused else "Status: Running")
+        self.rate_label.setText(f"Passos: {snapshot['steps']}  ({snapshot['rate']:,.0f} passos/s)")
+
+    def toggle_pause(self):
+        if self.run_worker is None:
+            return
+        if self.pause_button.text() == "Pausar":
+            self.run_worker.pause()
+            self.pause_button.setText("Continuar")
+            self.status_label.setText("Status: Paused")
+        else:
+            self.run_worker.resume()
+            self.pause_button.setText("Pausar")
 
-        estado_final = self.tm.state
-        fita_final = self.tm.get_tape_content()
-        head_final = self.tm.head_pos
-        self.append_to_history(estado_final, fita_final, head_final, "Configuração final")
+    def cancel_run(self):
+        if self.run_worker is not None:
+            self.run_worker.cancel()
+
+    def ask_continue(self):
+        if self.run_worker.cancelled:
+            return
+        if self.confirm_continue(self.tm.step_limit):
+            self.run_worker.resume()
+        else:
+            self.run_worker.cancel()
+
+    def finish_run(self):
+        self.run_thread.quit()
+        self.run_thread.wait()
+        self.run_thread = None
+        self.run_worker = None
+        self.set_running(False)
+
+        # Só as linhas visíveis do histórico serão formatadas
+        self.refresh_history(final=True)
+        self.update_display()
+        fita_final = self.final_tape()
 
         # Exibe resultado com tipo de parada
         resultado = self.tm.result if self.tm.result else "Rejected"
@@ -712,6 +1188,24 @@ class TuringMachineGUI(QMainWindow):
             f"<b>Fita final</b>: {fita_final}"
         )
 
+    def final_tape(self):
+        """Fita final para o diálogo de resultado; de uma fita longa, só os arredores do cabeçote"""
+        lo, hi = self.tm.tape_bounds()
+        if hi - lo < self.RESULT_CELLS:
+            return self.tm.get_tape_content()
+        radius = self.RESULT_CELLS // 2
+        head = min(max(self.tm.head_pos, lo), hi)
+        start, stop = max(lo, head - radius), min(hi, head + radius)
+        return (("…" if start > lo else "") + self.tm.window(start, stop + 1)
+                + ("…" if stop < hi else ""))
+
+    def closeEvent(self, event):
+        if self.run_worker is not None:
+            self.run_worker.cancel()
+            self.run_thread.quit()
+            self.run_thread.wait()
+        super().closeEvent(event)
+
     def step_machine(self):
         if not self.load_rules():
             return
@@ -723,38 +1217,23 @@ class TuringMachineGUI(QMainWindow):
                 "Resultado",
                 f"<b>Resultado</b>: <span style='color: #ff5555'>{resultado}</span><br>"
                 f"<b>Estado final</b>: {self.tm.state}<br>"
-                f"<b>Fita final</b>: {self.tm.get_tape_content()}"
+                f"<b>Fita final</b>: {self.final_tape()}"
             )
             return
 
         if not self.setup_done:
-            w = self.input_field.text().strip()
-            valid, invalids = self.validate_input(w)
-            if not valid:
-                symbols_str = ", ".join(sorted(invalids))
-                QMessageBox.warning(self, "Símbolos inválidos",
-                                    f"Os símbolos '{symbols_str}' não fazem parte do alfabeto Γ definido.")
+            if not self.load_input():
                 return
-            if w:
-                self.tm.load_content(w)
-            else:
-                # Tratar entrada vazia como configuração (⊳⊔)
-                self.tm.load_content("")
-                
-            estado0 = self.tm.state
-            fita0 = self.tm.get_tape_content()
-            head0 = self.tm.head_pos
-            self.tm.history.append((estado0, fita0, head0))
-            self.append_to_history(estado0, fita0, head0, "Configuração inicial", True)
+            self.restart_profile()
+
+            self.refresh_history()
             self.update_display()
             self.setup_done = True
             return
 
-        executou = self.tm.step()
+        self.tm.step()
         self.update_display()
-        estado_atual, fita_atual, head_atual = self.tm.history[-1]
-        trans_info = self.tm.transition_history[-1] if self.tm.transition_history else None
-        self.append_to_history(estado_atual, fita_atual, head_atual, trans_info)
+        self.refresh_history(final=self.tm.halted)
 
         if self.tm.halted:
             # Verificar se a máquina parou em estado não definido como de parada
@@ -762,12 +1241,8 @@ class TuringMachineGUI(QMainWindow):
                 self.tm.result = "Rejeita (sem transição)"
                 QMessageBox.warning(self, "Parada não planejada", 
                                     f"A máquina parou no estado '{self.tm.state}' que não é um estado de parada definido.")
-            
-            # Adiciona configuração final ao histórico
-            estado_final = self.tm.state
-            fita_final = self.tm.get_tape_content()
-            head_final = self.tm.head_pos
-            self.append_to_history(estado_final, fita_final, head_final, "Configuração final")
+
+            fita_final = self.final_tape()
             
             resultado = self.tm.result if self.tm.result else "Rejected"
             QMessageBox.information(
@@ -780,8 +1255,10 @@ class TuringMachineGUI(QMainWindow):
 
     def reset_machine(self):
         self.tm.reset()
-        self.history_box.clear()
+        self.restart_profile()
+        self.history_model.clear()
         self.setup_done = False
+        self.rate_label.setText("")
         self.update_display()
 
 
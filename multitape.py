@@ -0,0 +1,386 @@
+"""Máquinas de Turing com k fitas.
+
+As regras continuam com cinco campos, e os três do meio passam a ser tuplas
+de k elementos separados por vírgula, um por fita:
+
+    q0 a,_ a,a R,R q0      # lê 'a' na fita 1 e branco na 2, copia e avança as duas
+
+Com k = 1 é a sintaxe de sempre. Um movimento Y (ou N) em qualquer fita
+aceita (ou rejeita) e para, sem mover os cabeçotes. No .tmc o número de fitas
+fica no campo "tapes". A entrada é escrita na fita 1 (⊳⊔w); as demais
+começam com ⊳⊔, e todos os cabeçotes começam na posição 1.
+"""
+from bisect import bisect_right
+
+from turing_machine import (
+    ExecutionHistory, RunResult, Tape,
+    MOVE_CONTINUE, MOVE_ACCEPT, MOVE_REJECT, MOVE_HALT,
+)
+
+
+class MultiTapeHistory(ExecutionHistory):
+    """Histórico de uma máquina de k fitas, com os mesmos deltas e checkpoints de ExecutionHistory.
+
+    Mesma leitura (len, configuration, [i], transition_info), com listas de
+    fitas e de cabeçotes no lugar de uma fita e um cabeçote. O intervalo
+    entre checkpoints cresce com a soma dos buffers das k fitas.
+    """
+
+    def _add_checkpoint(self, state, tapes, heads):
+        self.checkpoints.append((state, [tape.copy() for tape in tapes], list(heads)))
+        self.checkpoint_steps.append(self.steps)
+        self._next_checkpoint = self.steps + max(self.checkpoint_interval, self._cells(tapes))
+
+    @staticmethod
+    def _cells(tapes):
+        return sum(len(tape.cells) for tape in tapes)
+
+    def configuration(self, index):
+        """Retorna (estado, fitas, cabeçotes) após `index` passos"""
+        index = self._index(index)
+        j = bisect_right(self.checkpoint_steps, index) - 1
+        if self._cursor is not None and self.checkpoint_steps[j] <= self._cursor[0] <= index:
+            pos, state, tapes, heads = self._cursor
+        else:
+            state, tapes, heads = self.checkpoints[j]
+            pos, tapes, heads = self.checkpoint_steps[j], [tape.copy() for tape in tapes], list(heads)
+
+        blank = self.blank_symbol
+        for _, _, sym_write, move, next_state in self.deltas[pos:index]:
+            moves = move.split(",")
+            for i, symbol in enumerate(sym_write.split(",")):
+                if symbol != blank:
+                    tapes[i][heads[i]] = symbol
+                else:
+                    tapes[i].pop(heads[i])
+            if "Y" in moves or "N" in moves:
+                continue
+            for i, m in enumerate(moves):
+                if m == "R":
+                    heads[i] += 1
+                elif m == "L":
+                    heads[i] -= 1
+            state = next_state
+
+        self._cursor = (index, state, tapes, heads)
+        return state, [tape.copy() for tape in tapes], list(heads)
+
+    def __getitem__(self, index):
+        state, tapes, heads = self.configuration(index)
+        return state, [tape.content() for tape in tapes], heads
+
+    def transition_info(self, index):
+        state, sym_read, sym_write, move, next_state = self.deltas[index]
+        return f"δ({state}, ({sym_read})) = {next_state}, ({sym_write}), ({move})"
+
+
+class MultiTapeTuringMachine:
+    """Máquina de Turing com `tape_count` fitas.
+
+    As regras ficam em `rules` com os campos originais como texto, por
+    exemplo ('q0', 'a,_') -> [('a,a', 'R,R', 'q0')], como em
+    TuringMachine.rules. Para executar, compile() empacota o estado e os k
+    códigos lidos num único inteiro, então cada passo faz uma só busca num
+    dicionário, qualquer que seja k. As fitas compartilham a tabela de
+    símbolos.
+    """
+
+    def __init__(self, tape_count=2):
+        self.tape_count = tape_count
+        first = Tape()
+        self.tapes = [first]
+        for _ in range(tape_count - 1):
+            tape = Tape()
+            tape.symbols = first.symbols
+            tape.codes = first.codes
+            self.tapes.append(tape)
+        self.heads = [0] * tape_count
+        self.rules = {}
+        self.state = "q0"
+        self.halting_states = set()
+        self.halted = False
+        self.history = MultiTapeHistory()
+        self.step_limit = 1000
+        self.result = None
+        self.states = set()
+        self.tape_alphabet = set()
+        self.initial_state = "q0"
+        self.blank_symbol = "_"
+        self.steps = 0
+        self.compiled = None
+        self.profile = None  # profiler.ExecutionProfile (visitas da fita 1)
+        self.definition_key = None
+        self._tip = None
+
+    # Fita e cabeçote principais, para quem só conhece máquinas de uma fita
+    @property
+    def tape(self):
+        return self.tapes[0]
+
+    @property
+    def head_pos(self):
+        return self.heads[0]
+
+    def reset(self):
+        for tape in self.tapes:
+            tape.clear()
+        self.heads = [0] * self.tape_count
+        self.state = self.initial_state
+        self.halted = False
+        self.history.clear()
+        self.result = None
+        self.steps = 0
+        self._tip = None
+
+    def load_machine_definition(self, states, tape_alphabet, initial_state, blank_symbol):
+        self.states = set(states.split())
+        self.tape_alphabet = set(tape_alphabet.split(','))
+        self.initial_state = initial_state
+        self.blank_symbol = blank_symbol
+        self.tapes[0].blank_symbol = blank_symbol  # Tabela de símbolos compartilhada
+        self.tape_alphabet.update(['⊳', '_', self.blank_symbol])
+
+    def load_rules(self, rules_text, halting_states_str):
+        self.rules = {}
+        self.compiled = None
+        self.halting_states = set(halting_states_str.split())
+        k = self.tape_count
+        for line in rules_text.split('\n'):
+            linha = line.strip()
+            if not linha or linha.startswith('#'):
+                continue
+            parts = linha.split()
+            if len(parts) != 5:
+                continue
+            e_from, sym_read, sym_write, move, e_to = parts
+            move = move.upper()
+            if not all(len(field.split(',')) == k for field in (sym_read, sym_write, move)):
+                continue
+            self.rules.setdefault((e_from, sym_read), []).append((sym_write, move, e_to))
+
+    def compile(self):
+        """Monta a tabela {(estado, códigos lidos empacotados): entrada}.
+
+        A chave é estado << 8k | c1 << 8(k-1) | ... | ck. As entradas são
+        (códigos escritos, deslocamentos, próximo estado, tipo). Uma regra que
+        lê branco numa fita vale tanto para a célula vazia (código 0) quanto
+        para o branco escrito explicitamente, então gera uma chave para cada
+        combinação.
+        """
+        tape = self.tapes[0]
+        k = self.tape_count
+        state_names = []
+        state_codes = {}
+
+        def state_code(name):
+            code = state_codes.get(name)
+            if code is None:
+                code = state_codes[name] = len(state_names)
+                state_names.append(name)
+            return code
+
+        state_code(self.initial_state)
+        table = {}
+        for (e_from, sym_read), transitions in self.rules.items():
+            sym_write, move, e_to = transitions[0]
+            writes = tuple(0 if s == self.blank_symbol else tape.intern(s)
+                           for s in sym_write.split(','))
+            moves = move.split(',')
+            if "Y" in moves or "N" in moves:
+                kind = MOVE_ACCEPT if "Y" in moves else MOVE_REJECT
+                entry = (writes, (0,) * k, state_code(e_from), kind)
+            else:
+                deltas = tuple(1 if m == "R" else -1 if m == "L" else 0 for m in moves)
+                kind = MOVE_HALT if e_to in self.halting_states else MOVE_CONTINUE
+                entry = (writes, deltas, state_code(e_to), kind)
+
+            keys = [state_code(e_from)]
+            for symbol in sym_read.split(','):
+                codes = [tape.intern(symbol)]
+                if symbol == self.blank_symbol:
+                    codes.append(0)
+                keys = [(key << 8) | code for key in keys for code in codes]
+            for key in keys:
+                table[key] = entry
+        for name in self.halting_states:
+            state_code(name)
+
+        halting = [name in self.halting_states for name in state_names]
+        self.compiled = (table, halting, state_codes, state_names)
+        return self.compiled
+
+    def run(self, max_steps, record=False, detect_loops=False):
+        """Executa até parar ou até `max_steps` passos.
+
+        Com record=True (ou com perfil ligado) cada passo passa por step().
+        A detecção de laços ainda não cobre máquinas de várias fitas e
+        `detect_loops` é ignorado.
+        """
+        if record or self.profile is not None:
+            steps = 0
+            while steps < max_steps and not self.halted and self.step():
+                steps += 1
+            return RunResult(self.result, self.halted, steps, self.state, self.tape, self.head_pos)
+
+        table, halting, state_codes, state_names = self.compiled or self.compile()
+        self.history.clear()
+        state = state_codes.get(self.state)
+        if self.halted or state is None or halting[state]:
+            self.halted = True
+            return RunResult(self.result, True, 0, self.state, self.tape, self.head_pos)
+
+        lanes = range(self.tape_count)
+        code_at = [tape.code_at for tape in self.tapes]
+        set_code = [tape._set_code for tape in self.tapes]
+        heads = self.heads
+        get = table.get
+        kind = MOVE_CONTINUE
+        halted = False
+        steps = 0
+        while steps < max_steps:
+            key = state
+            for i in lanes:
+                key = (key << 8) | code_at[i](heads[i])
+            entry = get(key)
+            if entry is None:
+                halted = True
+                break
+            writes, deltas, state, kind = entry
+            for i in lanes:
+                set_code[i](heads[i], writes[i])
+                heads[i] += deltas[i]
+            steps += 1
+            if kind:
+                halted = True
+                break
+
+        self.state = state_names[state]
+        self.halted = halted
+        if kind == MOVE_ACCEPT:
+            self.result = "Aceita"
+        elif kind == MOVE_REJECT:
+            self.result = "Rejeita"
+        self.steps += steps
+        return RunResult(self.result, halted, steps, self.state, self.tape, self.head_pos)
+
+    def step(self):
+        if self.state in self.halting_states:
+            self.halted = True
+            return False
+
+        current = ",".join(tape[head] for tape, head in zip(self.tapes, self.heads))
+        transitions = self.rules.get((self.state, current))
+        if transitions is None:
+            self.halted = True
+            return False
+        sym_write, move, next_state = transitions[0]
+        if self.profile is not None:
+            self.profile.hit(self.state, current, self.heads[0])
+
+        if self.steps < self.history.steps:
+            self.history.truncate(self.steps)
+            self._tip = None
+        self.history.record(self.state, current, sym_write, move, next_state)
+
+        for tape, head, symbol in zip(self.tapes, self.heads, sym_write.split(',')):
+            if symbol != self.blank_symbol:
+                tape[head] = symbol
+            else:
+                tape.pop(head)
+
+        moves = move.split(',')
+        if "Y" in moves:
+            self.halted = True
+            self.result = "Aceita"
+        elif "N" in moves:
+            self.halted = True
+            self.result = "Rejeita"
+        else:
+            for i, m in enumerate(moves):
+                if m == "R":
+                    self.heads[i] += 1
+                elif m == "L":
+                    self.heads[i] -= 1
+            self.state = next_state
+            if self.state in self.halting_states:
+                self.halted = True
+
+        self.steps += 1
+        self.history.maybe_checkpoint(self.state, self.tapes, self.heads)
+        return True
+
+    def seek(self, index):
+        """Leva a máquina à configuração registrada após `index` passos"""
+        history = self.history
+        index = history._index(index)
+        if self.steps == history.steps:
+            self._tip = (self.halted, self.result)
+        self.state, tapes, self.heads = history.configuration(index)
+        for tape, restored in zip(self.tapes, tapes):
+            tape.cells, tape.origin, tape.lo, tape.hi = (
+                restored.cells, restored.origin, restored.lo, restored.hi)
+        self.steps = index
+        moves = history.deltas[index - 1][3].split(",") if index else []
+        if index == history.steps and self._tip is not None:
+            self.halted, self.result = self._tip
+        elif "Y" in moves or "N" in moves:
+            self.halted = True
+            self.result = "Aceita" if "Y" in moves else "Rejeita"
+        else:
+            self.halted = self.state in self.halting_states
+            self.result = None
+
+    def get_tape_content(self):
+        return self.tapes[0].content()
+
+    def tape_contents(self):
+        return [tape.content() for tape in self.tapes]
+
+    def iter_tape_content(self, chunk_size=1 << 16, tape=0):
+        return self.tapes[tape].iter_content(chunk_size)
+
+    def tape_bounds(self, tape=0):
+        """(primeira, última) posição escrita da fita `tape` (0 = fita 1)"""
+        return self.tapes[tape].lo, self.tapes[tape].hi
+
+    def window(self, lo, hi, tape=0):
+        return "".join(self.tapes[tape].window(lo, hi))
+
+    def around_head(self, radius, tape=0):
+        head = self.heads[tape]
+        return self.window(head - radius, head + radius + 1, tape)
+
+    def verdict(self):
+        if self.result == "Aceita":
+            return "accept"
+        if self.halted:
+            return "reject"
+        return "timeout"
+
+    def invalid_symbols(self, input_str):
+        return set(input_str) - self.tape_alphabet
+
+    def load_content_file(self, path):
+        """Entrada da fita 1 lida de um arquivo; veja TuringMachine.load_content_file()"""
+        self.load_content("")
+        _, invalids = self.tapes[0].write_file(2, path, self.tape_alphabet)
+        if invalids:
+            self.load_content("")
+        else:
+            self.history.start(self.tapes, self.heads, self.state, self.blank_symbol)
+        return invalids
+
+    def load_content(self, input_str):
+        for tape in self.tapes:
+            tape.clear()
+            tape[0] = "⊳"
+            tape[1] = "_"
+        self.tapes[0].blank_symbol = self.blank_symbol
+        self.tapes[0].write_string(2, input_str)
+        self.heads = [1] * self.tape_count
+        self.state = self.initial_state
+        self.halted = False
+        self.result = None
+        self.steps = 0
+        self._tip = None
+        self.history.start(self.tapes, self.heads, self.state, self.blank_symbol)
@@ -0,0 +1,207 @@
+"""Execução não determinística por busca na árvore de configurações.
+
+Cada configuração guarda a fita como um zíper: a célula sob o cabeçote mais
+duas pilhas persistentes (esquerda e direita), feitas de células
+(código, resto, hash). Uma transição cria no máximo uma célula nova e
+reaproveita todo o resto, de modo que ramos irmãos compartilham a fita
+(cópia na escrita). Cada célula carrega o hash da sua pilha, e assim a
+configuração inteira se resume a um inteiro para eliminar duplicatas.
+Colisões de hash (64 bits) podem, em teoria, descartar um ramo válido.
+"""
+from collections import namedtuple
+
+from turing_machine import MOVE_ACCEPT, MOVE_HALT, MOVE_REJECT
+
+# Resultado da busca: veredito 'accept', 'reject' ou 'limit'
+SearchResult = namedtuple("SearchResult", "verdict depth configs reason")
+
+
+def _branch_table(tm):
+    """Como TuringMachine.compile(), mas com todas as transições de cada chave"""
+    table, halting, state_codes, state_names = tm.compiled or tm.compile()
+    tape = tm.tape
+    branches = {}
+    for (e_from, sym_read), transitions in tm.rules.items():
+        entries = []
+        for sym_write, move, e_to in transitions:
+            write = 0 if sym_write == tm.blank_symbol else tape.intern(sym_write)
+            if move in ("Y", "N"):
+                kind = MOVE_ACCEPT if move == "Y" else MOVE_REJECT
+                entries.append((write, 0, state_codes[e_from], kind))
+            else:
+                delta = 1 if move == "R" else -1 if move == "L" else 0
+                kind = MOVE_HALT if e_to in tm.halting_states else 0
+                entries.append((write, delta, state_codes[e_to], kind))
+        row = state_codes[e_from] << 8
+        branches[row | tape.intern(sym_read)] = tuple(entries)
+        if sym_read == tm.blank_symbol:
+            branches[row] = tuple(entries)
+    return branches, halting, state_codes, state_names
+
+
+def _push(code, stack):
+    # Brancos sobre a pilha vazia continuam vazios: a forma canônica da fita
+    if stack is None and code == 0:
+        return None
+    return (code, stack, hash((code, stack[2] if stack else 0)))
+
+
+def _initial(tm, state_codes):
+    """Converte a configuração atual de `tm` em (estado, símbolo, esquerda, direita, cabeçote)"""
+    tape = tm.tape
+    head = tm.head_pos
+    left = right = None
+    if tape:
+        for pos in range(tape.lo, head):
+            left = _push(tape.code_at(pos), left)
+        for pos in range(tape.hi, head, -1):
+            right = _push(tape.code_at(pos), right)
+    return (state_codes[tm.state], tape.code_at(head), left, right, head)
+
+
+def _key(config):
+    state, cur, left, right, _ = config
+    return hash((state, cur, left[2] if left else 0, right[2] if right else 0))
+
+
+def _successors(config, entries):
+    state, cur, left, right, head = config
+    for write, delta, next_state, kind in entries:
+        if delta == 1:
+            if right is None:
+                succ = (next_state, 0, _push(write, left), None, head + 1)
+            else:
+                succ = (next_state, right[0], _push(write, left), right[1], head + 1)
+        elif delta == -1:
+            if left is None:
+                succ = (next_state, 0, None, _push(write, right), head - 1)
+            else:
+                succ = (next_state, left[0], left[1], _push(write, right), head - 1)
+        else:
+            succ = (next_state, write, left, right, head)
+        yield succ, kind
+
+
+def _apply(tm, config, state_names):
+    """Copia uma configuração da busca para a máquina (fita, cabeçote e estado)"""
+    state, cur, left, right, head = config
+    tape = tm.tape
+    tape.clear()
+    pos = head - 1
+    while left is not None:
+        tape._set_code(pos, left[0])
+        left, pos = left[1], pos - 1
+    pos = head + 1
+    while right is not None:
+        tape._set_code(pos, right[0])
+        right, pos = right[1], pos + 1
+    tape._set_code(head, cur)
+    tm.head_pos = head
+    tm.state = state_names[state]
+
+
+def run_nondeterministic(tm, max_steps, strategy="bfs", max_configs=1_000_000, max_branches=100_000):
+    """Explora todos os ramos a partir da configuração atual de `tm`.
+
+    Aceita assim que algum ramo executa uma transição Y; rejeita quando todos
+    os ramos param sem aceitar. `max_steps` limita a profundidade,
+    `max_configs` o número de configurações distintas guardadas (memória) e
+    `max_branches` a largura da fronteira. Ao aceitar, `tm` fica na
+    configuração de aceitação.
+    """
+    if strategy == "bfs":
+        return _bfs(tm, max_steps, max_configs, max_branches)
+    if strategy == "iddfs":
+        return _iddfs(tm, max_steps, max_configs, max_branches)
+    raise ValueError(f"Estratégia desconhecida: {strategy}")
+
+
+def _finish(tm, verdict, depth, configs, reason, config=None, state_names=None):
+    if config is not None:
+        _apply(tm, config, state_names)
+    if verdict == "accept":
+        tm.halted = True
+        tm.result = "Aceita"
+    elif verdict == "reject":
+        tm.halted = True
+        tm.result = "Rejeita"
+    tm.steps = depth
+    tm.history.clear()
+    return SearchResult(verdict, depth, configs, reason)
+
+
+def _bfs(tm, max_steps, max_configs, max_branches):
+    branches, halting, state_codes, state_names = _branch_table(tm)
+    start = _initial(tm, state_codes)
+    if tm.halted or halting[start[0]]:
+        return _finish(tm, "reject", 0, 1, "estado de parada")
+
+    frontier = [start]
+    seen = {_key(start)}
+    depth = 0
+    while frontier:
+        if depth >= max_steps:
+            return _finish(tm, "limit", depth, len(seen), "limite de passos")
+        depth += 1
+        next_frontier = []
+        for config in frontier:
+            entries = branches.get((config[0] << 8) | config[1])
+            if not entries:
+                continue
+            for succ, kind in _successors(config, entries):
+                if kind == MOVE_ACCEPT:
+                    return _finish(tm, "accept", depth, len(seen), "Y", succ, state_names)
+                if kind:
+                    continue  # Rejeição ou estado de parada: o ramo termina
+                key = _key(succ)
+                if key in seen:
+                    continue
+                seen.add(key)
+                next_frontier.append(succ)
+            if len(seen) > max_configs:
+                return _finish(tm, "limit", depth, len(seen), "limite de configurações")
+            if len(next_frontier) > max_branches:
+                return _finish(tm, "limit", depth, len(seen), "limite de ramos")
+        frontier = next_frontier
+    return _finish(tm, "reject", depth, len(seen), "todos os ramos pararam")
+
+
+def _iddfs(tm, max_steps, max_configs, max_branches):
+    branches, halting, state_codes, state_names = _branch_table(tm)
+    start = _initial(tm, state_codes)
+    if tm.halted or halting[start[0]]:
+        return _finish(tm, "reject", 0, 1, "estado de parada")
+
+    limit = 1
+    while True:
+        # Profundidade restante com que cada configuração já foi explorada
+        visited = {_key(start): limit}
+        stack = [(start, limit)]
+        cut = False
+        while stack:
+            config, budget = stack.pop()
+            entries = branches.get((config[0] << 8) | config[1])
+            if not entries:
+                continue
+            if budget == 0:
+                cut = True
+                continue
+            for succ, kind in _successors(config, entries):
+                if kind == MOVE_ACCEPT:
+                    depth = limit - budget + 1
+                    return _finish(tm, "accept", depth, len(visited), "Y", succ, state_names)
+                if kind:
+                    continue
+                key = _key(succ)
+                if visited.get(key, -1) >= budget - 1:
+                    continue
+                if len(visited) < max_configs:
+                    visited[key] = budget - 1
+                stack.append((succ, budget - 1))
+            if len(stack) > max_branches:
+                return _finish(tm, "limit", limit, len(visited), "limite de ramos")
+        if not cut:
+            return _finish(tm, "reject", limit, len(visited), "todos os ramos pararam")
+        if limit >= max_steps:
+            return _finish(tm, "limit", limit, len(visited), "limite de passos")
+        limit = min(limit * 2, max_steps)
@@ -0,0 +1,219 @@
+"""Análise e otimização estática de uma máquina carregada, antes de executar.
+
+optimize(tm) reescreve `tm.rules` com a primeira transição de cada par
+(estado, símbolo lido), a mesma usada pela execução determinística, e aplica:
+
+1. Alcançabilidade: a partir do estado inicial lendo o ⊔ da posição 1
+   (load_content), calcula os pares (estado, símbolo) que podem ocorrer.
+   Depois de um movimento L/R qualquer símbolo da fita pode estar sob o
+   cabeçote; depois de uma transição que não move o cabeçote, só o símbolo
+   que acabou de ser escrito. Regras de pares que nunca ocorrem saem.
+2. Cadeias de renomeação: uma transição que não move o cabeçote nem muda a
+   célula só troca de estado; ela é substituída pela transição que o estado
+   seguinte faria sobre o mesmo símbolo.
+3. Estados equivalentes: refinamento de partições como na minimização de
+   AFDs (Moore). Estados com as mesmas escritas e movimentos para cada
+   símbolo e próximos estados equivalentes viram um só. Estados de parada
+   nunca são fundidos, já que o estado final faz parte do resultado.
+
+O relatório também lista os laços comprováveis sem executar: pares
+alcançáveis que entram num ciclo de transições que não movem o cabeçote
+(como `q1 _ _ S q1`). Fora os passos de renomeação, que deixam de ser
+contados, e os nomes dos estados fundidos, a execução dá o mesmo resultado.
+"""
+from collections import namedtuple
+
+from turing_machine import TRAP_STATIONARY
+
+OptimizationReport = namedtuple(
+    "OptimizationReport",
+    "rules_before rules_after unreachable_states dead_rules collapsed bypassed_states merged "
+    "loops",
+)
+
+_HALT_MOVES = ("Y", "N")
+_HEAD_MOVES = ("R", "L")
+
+
+def _effective_rules(tm):
+    # Só a primeira transição de cada par conta na execução determinística
+    return {key: transitions[0] for key, transitions in tm.rules.items()}
+
+
+def _tape_symbols(tm, rules):
+    """Símbolos que podem estar numa célula: Γ, ⊳, ⊔, o branco e tudo que as regras escrevem"""
+    symbols = set(tm.tape_alphabet) | {"⊳", "_", tm.blank_symbol}
+    symbols.update(write for write, _, _ in rules.values())
+    return symbols
+
+
+def reachable_pairs(tm, rules):
+    """Pares (estado, símbolo) que podem ocorrer numa execução a partir de load_content()"""
+    symbols = _tape_symbols(tm, rules)
+    halting = tm.halting_states
+    pairs = set()
+    entered = set()  # Estados alcançados depois de um movimento: qualquer símbolo
+    pending = [(tm.initial_state, "_")]
+
+    while pending:
+        pair = pending.pop()
+        if pair in pairs:
+            continue
+        pairs.add(pair)
+        rule = rules.get(pair)
+        if pair[0] in halting or rule is None:
+            continue
+        write, move, e_to = rule
+        if move in _HALT_MOVES:
+            continue
+        if move not in _HEAD_MOVES:
+            pending.append((e_to, write))
+        elif e_to not in entered:
+            entered.add(e_to)
+            pending.extend((e_to, symbol) for symbol in symbols)
+    return pairs
+
+
+def _prune(tm, rules):
+    pairs = reachable_pairs(tm, rules)
+    kept = {key: rule for key, rule in rules.items() if key in pairs}
+    return kept, sorted(set(rules) - set(kept))
+
+
+def _entered_states(tm, rules):
+    """Estados em que a execução pode estar: o inicial e os de origem ou destino das regras"""
+    states = {tm.initial_state} | {e_from for e_from, _ in rules}
+    states.update(e_to for _, move, e_to in rules.values() if move not in _HALT_MOVES)
+    return states
+
+
+def _collapse_renames(tm, rules):
+    """Substitui transições que só renomeiam o estado.
+
+    Devolve (regras, {(estado, símbolo): [estados pulados]}).
+    """
+    halting = tm.halting_states
+    collapsed = {}
+    skipped = {}
+    for (e_from, symbol), rule in rules.items():
+        write, move, e_to = rule
+        seen = {e_from}
+        chain = []
+        while (write == symbol and move not in _HEAD_MOVES + _HALT_MOVES
+               and e_to not in halting and e_to not in seen):
+            following = rules.get((e_to, symbol))
+            if following is None or following[1] in _HALT_MOVES:
+                # Sem regra (ou aceitando/rejeitando) o estado final seria outro
+                break
+            seen.add(e_to)
+            chain.append(e_to)
+            write, move, e_to = following
+        if chain:
+            skipped[(e_from, symbol)] = chain
+        collapsed[(e_from, symbol)] = (write, move, e_to)
+    return collapsed, skipped
+
+
+def _merge_states(tm, rules):
+    """Funde estados equivalentes; devolve (regras, {representante: [estados fundidos]})"""
+    halting = tm.halting_states
+    states = _entered_states(tm, rules)
+    by_state = {}
+    for (e_from, symbol), rule in rules.items():
+        by_state.setdefault(e_from, []).append((symbol, rule))
+
+    # Estados de parada ficam em classes próprias
+    classes = {state: ("halt", state) if state in halting else () for state in states}
+    count = len(set(classes.values()))
+    while True:
+        refined = {}
+        for state in states:
+            if state in halting:
+                refined[state] = classes[state]
+                continue
+            refined[state] = (classes[state], tuple(sorted(
+                (symbol, write, move, None if move in _HALT_MOVES else classes[e_to])
+                for symbol, (write, move, e_to) in by_state.get(state, ())
+            )))
+        classes = refined
+        new_count = len(set(classes.values()))
+        if new_count == count:
+            break
+        count = new_count
+
+    groups = {}
+    for state in sorted(states, key=lambda s: (s != tm.initial_state, s)):
+        groups.setdefault(classes[state], []).append(state)
+    representative = {}
+    merged = {}
+    for members in groups.values():
+        for state in members:
+            representative[state] = members[0]
+        if len(members) > 1:
+            merged[members[0]] = members[1:]
+
+    result = {}
+    for (e_from, symbol), (write, move, e_to) in rules.items():
+        if representative[e_from] == e_from:
+            result[(e_from, symbol)] = (write, move, representative.get(e_to, e_to))
+    return result, merged
+
+
+def static_loops(tm):
+    """Pares (estado, símbolo) alcançáveis a partir dos quais a máquina comprovadamente não para"""
+    table, halting, state_codes, state_names = tm.compiled or tm.compile()
+    pairs = reachable_pairs(tm, _effective_rules(tm))
+    symbols = tm.tape.symbols
+    loops = set()
+    for index, trap in enumerate(tm.loop_traps):
+        if trap == TRAP_STATIONARY:
+            pair = (state_names[index >> 8], symbols[index & 0xFF])
+            if pair in pairs:
+                loops.add(pair)
+    return sorted(loops)
+
+
+def optimize(tm):
+    """Reescreve as regras de `tm` (uma fita) com a versão otimizada; devolve o relatório"""
+    if tm.tape_count > 1:
+        raise ValueError("A otimização só se aplica a máquinas de uma fita")
+    rules_before = sum(len(transitions) for transitions in tm.rules.values())
+    rules = _effective_rules(tm)
+    rules, dead_rules = _prune(tm, rules)
+    # Inalcançáveis na máquina original; os que somem nas etapas seguintes
+    # são contornados pelas renomeações ou fundidos
+    reachable = _entered_states(tm, rules)
+    unreachable = sorted(tm.states - reachable - tm.halting_states)
+    rules, collapsed = _collapse_renames(tm, rules)
+    rules, _ = _prune(tm, rules)  # As renomeações encurtadas podem deixar estados de fora
+    rules, merged = _merge_states(tm, rules)
+    rules, _ = _prune(tm, rules)
+
+    merged_states = {state for states in merged.values() for state in states}
+    bypassed = sorted(reachable - _entered_states(tm, rules) - tm.halting_states
+                      - merged_states)
+
+    tm.rules = {key: [rule] for key, rule in rules.items()}
+    tm.compiled = None
+    tm.definition_key = None  # A tabela não corresponde mais ao .tmc
+    return OptimizationReport(rules_before, len(rules), unreachable, dead_rules, collapsed,
+                              bypassed, merged, static_loops(tm))
+
+
+def report_lines(report):
+    """Relatório em texto de optimize()"""
+    lines = [f"Otimização: {report.rules_before} regra(s) -> {report.rules_after}"]
+    if report.unreachable_states:
+        lines.append(f"  Estados inalcançáveis: {', '.join(report.unreachable_states)}")
+    if report.dead_rules:
+        pairs = ", ".join(f"δ({state}, {symbol})" for state, symbol in report.dead_rules)
+        lines.append(f"  Regras que nunca se aplicam: {pairs}")
+    for (state, symbol), skipped in sorted(report.collapsed.items()):
+        lines.append(f"  Renomeação encurtada em δ({state}, {symbol}): pula {', '.join(skipped)}")
+    if report.bypassed_states:
+        lines.append(f"  Estados que só renomeavam: {', '.join(report.bypassed_states)}")
+    for state, merged in sorted(report.merged.items()):
+        lines.append(f"  Estados equivalentes fundidos em {state}: {', '.join(merged)}")
+    for state, symbol in report.loops:
+        lines.append(f"  Laço comprovado: δ({state}, {symbol}) não move o cabeçote e não para")
+    return lines
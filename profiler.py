@@ -0,0 +1,119 @@
+"""Perfil de execução: quais transições, estados e células dominam uma execução.
+
+Para ligar o perfil basta atribuir um ExecutionProfile a `tm.profile` antes de
+executar. Com `tm.profile` igual a None (o padrão) o laço de execução não muda.
+
+    tm.profile = ExecutionProfile()
+    tm.load_content("aabbcc")
+    tm.run(1_000_000)
+    print("\\n".join(tm.profile.report(tm.rules)))
+"""
+import math
+from collections import Counter
+
+# Caracteres do mapa de calor em texto, do menos ao mais visitado
+HEAT_CHARS = " .:-=+*#%@"
+
+
+class ExecutionProfile:
+    """Contagens de passos por regra, por estado e por posição do cabeçote.
+
+    As regras são identificadas pela chave (estado, símbolo lido) de
+    TuringMachine.rules; as visitas contam em que posição o cabeçote estava
+    a cada passo executado.
+    """
+
+    def __init__(self):
+        self.rule_hits = Counter()  # (estado, símbolo lido) -> passos
+        self.visits = Counter()  # posição -> passos com o cabeçote ali
+
+    @property
+    def steps(self):
+        return sum(self.rule_hits.values())
+
+    def hit(self, state, symbol, pos):
+        self.rule_hits[(state, symbol)] += 1
+        self.visits[pos] += 1
+
+    def add_table_hits(self, hits, state_names, symbols):
+        """Soma contagens por índice da tabela compilada ((estado << 8) | código)"""
+        rule_hits = self.rule_hits
+        for index, count in enumerate(hits):
+            if count:
+                rule_hits[(state_names[index >> 8], symbols[index & 0xFF])] += count
+
+    def state_hits(self):
+        counts = Counter()
+        for (state, _), count in self.rule_hits.items():
+            counts[state] += count
+        return counts
+
+    def hot_transitions(self, rules, limit=None):
+        """Regras da mais para a menos executada, com a fração dos passos"""
+        total = self.steps or 1
+        result = []
+        for (state, symbol), count in self.rule_hits.most_common(limit):
+            sym_write, move, next_state = rules.get((state, symbol), [("?", "?", "?")])[0]
+            result.append({
+                "state": state,
+                "read": symbol,
+                "write": sym_write,
+                "move": move,
+                "next": next_state,
+                "hits": count,
+                "share": count / total,
+            })
+        return result
+
+    def heatmap(self, buckets=64):
+        """(primeira posição, última posição, visitas por faixa) da região visitada"""
+        if not self.visits:
+            return 0, -1, []
+        lo = min(self.visits)
+        hi = max(self.visits)
+        span = hi - lo + 1
+        buckets = min(buckets, span)
+        counts = [0] * buckets
+        for pos, count in self.visits.items():
+            counts[(pos - lo) * buckets // span] += count
+        return lo, hi, counts
+
+    def to_dict(self, rules, limit=None, buckets=100):
+        lo, hi, counts = self.heatmap(buckets)
+        return {
+            "steps": self.steps,
+            "transitions": self.hot_transitions(rules, limit),
+            "states": dict(self.state_hits().most_common()),
+            "heatmap": {"lo": lo, "hi": hi, "counts": counts},
+        }
+
+    def report(self, rules, limit=10, width=64):
+        return report_lines(self.to_dict(rules, buckets=width), limit)
+
+
+def heatmap_text(counts):
+    """Mapa de calor numa linha de texto, em escala logarítmica"""
+    if not counts or not max(counts):
+        return ""
+    top = math.log1p(max(counts))
+    last = len(HEAT_CHARS) - 1
+    return "".join(HEAT_CHARS[max(1, math.ceil(math.log1p(c) / top * last))] if c else " "
+                   for c in counts)
+
+
+def report_lines(data, limit=10):
+    """Relatório em texto a partir de ExecutionProfile.to_dict(): transições
+    mais executadas, passos por estado e mapa de calor das visitas"""
+    steps = data["steps"]
+    lines = [f"Perfil: {steps} passos", "Transições mais executadas:"]
+    for t in data["transitions"][:limit]:
+        lines.append(f"  {t['hits']:>12} {t['share']:7.2%}  "
+                     f"δ({t['state']}, {t['read']}) = {t['next']}, {t['write']}, {t['move']}")
+    lines.append("Passos por estado:")
+    for state, count in data["states"].items():
+        lines.append(f"  {count:>12} {count / (steps or 1):7.2%}  {state}")
+    heatmap = data["heatmap"]
+    if heatmap["counts"]:
+        lines.append(f"Visitas do cabeçote (posições {heatmap['lo']} a {heatmap['hi']}):")
+        lines.append(f"  |{heatmap_text(heatmap['counts'])}|")
+    return lines
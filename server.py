@@ -0,0 +1,473 @@
+"""Serviço local de simulação: JSON sobre HTTP, só com a biblioteca padrão.
+
+    python server.py --port 8765 --workers 8
+
+Rotas (corpos e respostas em JSON):
+
+    POST   /machines          {"machine": {campos do .tmc}} -> {"definition": hash}
+    POST   /jobs              {"machine": {...} ou "definition": hash, "input": "aabbcc",
+                               "max_steps": 1000000, "timeout": 10, "detect_loops": false,
+                               "backend": "table"} -> {"id": ..., "status": "queued", ...}
+    POST   /run               mesmo corpo de /jobs; responde quando o job termina
+    GET    /jobs/<id>         estado do job e, quando terminou, o registro final
+    GET    /jobs/<id>/events  eventos do job, um objeto JSON por linha, até "done"
+    DELETE /jobs/<id>         cancela o job
+    GET    /status            jobs na fila e em execução, definições em cache
+
+As máquinas compiladas ficam em cache pelo hash da definição
+(turing_machine.definition_key): jobs com a mesma definição reaproveitam
+máquinas já compiladas, uma por job em execução, sem reenviar o .tmc. Os
+jobs rodam num pool de threads, em fatias de passos; entre uma fatia e outra
+são verificados o cancelamento e o limite de tempo e é publicado o
+progresso. O registro final tem os campos de batch.evaluate_input(), com o
+veredito 'cancelled' para jobs cancelados e 'timeout' com "reason": "time"
+quando acaba o tempo. Como as threads dividem o GIL, o pool limita quantos
+jobs avançam juntos, sem acelerar o cálculo.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from batch import result_record
+from turing_machine import definition_key, machine_from_config, tape_count
+
+CHUNK_STEPS = 100_000  # Passos entre verificações de cancelamento, tempo e progresso
+MAX_BODY = 64 << 20  # Maior corpo de requisição aceito, em bytes
+FINISHED_JOBS = 10_000  # Jobs terminados que continuam disponíveis para consulta
+
+REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+class RequestError(Exception):
+    """Erro de uma requisição, respondido com `status` e {"error": mensagem}"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MachineCache:
+    """Máquinas compiladas por hash da definição, emprestadas a um job de cada vez"""
+
+    def __init__(self, max_definitions=256):
+        self.max_definitions = max_definitions
+        self._configs = OrderedDict()  # hash -> .tmc, do uso menos ao mais recente
+        self._idle = {}  # hash -> máquinas livres, já compiladas
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._configs)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._configs
+
+    def add(self, config):
+        """Registra a definição de `config` e devolve o hash; erros de definição sobem aqui"""
+        key = definition_key(config)
+        with self._lock:
+            known = key in self._configs
+        if not known:
+            tm = machine_from_config(config)
+            tm.compile()
+        with self._lock:
+            if not known and key not in self._configs:
+                self._idle[key] = [tm]
+            self._configs[key] = config
+            self._configs.move_to_end(key)
+            while len(self._configs) > self.max_definitions:
+                old, _ = self._configs.popitem(last=False)
+                self._idle.pop(old, None)
+        return key
+
+    def config(self, key):
+        with self._lock:
+            config = self._configs.get(key)
+            if config is not None:
+                self._configs.move_to_end(key)
+            return config
+
+    def acquire(self, key, config):
+        """Uma máquina livre da definição `key` (compilada agora se não houver)"""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+        tm = machine_from_config(config)
+        tm.compile()
+        return tm
+
+    def release(self, tm):
+        with self._lock:
+            if tm.definition_key in self._configs:
+                self._idle.setdefault(tm.definition_key, []).append(tm)
+
+
+class Job:
+    """Uma entrada a executar; os campos mudam só na thread do laço de eventos"""
+
+    def __init__(self, job_id, key, config, input_str, max_steps, timeout, detect_loops,
+                 backend):
+        self.id = job_id
+        self.key = key
+        self.config = config
+        self.input = input_str
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.detect_loops = detect_loops
+        self.backend = backend
+        self.status = "queued"  # queued, running, done ou cancelled
+        self.cancelled = False  # Lido pelo worker entre as fatias
+        self.future = None
+        self.progress = None  # Último evento de progresso
+        self.record = None
+        self.done = asyncio.Event()
+        self.listeners = []  # Filas de quem acompanha /events
+
+    def publish(self, event):
+        if event["event"] == "progress":
+            self.progress = event
+        if self.status == "queued" and event["event"] in ("started", "progress"):
+            self.status = "running"
+        for queue in self.listeners:
+            queue.put_nowait(event)
+
+    def summary(self):
+        summary = {"id": self.id, "status": self.status, "definition": self.key}
+        if self.progress is not None and self.record is None:
+            summary["progress"] = self.progress
+        if self.record is not None:
+            summary["record"] = self.record
+        return summary
+
+
+def _option(body, name, default, kinds, check=None, message=None):
+    # Campo opcional do corpo, com tipo (bool não conta como número) e faixa válidas
+    value = body.get(name, default)
+    if value is None and default is None:
+        return None
+    if isinstance(value, bool) != (kinds is bool) or not isinstance(value, kinds):
+        raise RequestError(400, message or f"Campo '{name}' inválido")
+    if check is not None and not check(value):
+        raise RequestError(400, message or f"Campo '{name}' inválido")
+    return value
+
+
+class SimulationServer:
+    """Estado do serviço: cache de máquinas, pool de workers e jobs"""
+
+    def __init__(self, workers=None, max_definitions=256, default_timeout=10.0,
+                 chunk_steps=CHUNK_STEPS):
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.cache = MachineCache(max_definitions)
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="tm-job")
+        self.default_timeout = default_timeout
+        self.chunk_steps = chunk_steps
+        self.jobs = {}
+        self.finished = deque()
+        self._ids = itertools.count(1)
+        self.loop = None
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self.loop = asyncio.get_running_loop()
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self):
+        for job in self.jobs.values():
+            job.cancelled = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # Jobs
+
+    def register(self, body):
+        """Hash da definição pedida em `body` ("machine" ou "definition")"""
+        if not isinstance(body, dict):
+            raise RequestError(400, "O corpo deve ser um objeto JSON")
+        machine = body.get("machine")
+        if machine is not None:
+            if not isinstance(machine, dict):
+                raise RequestError(400, "Campo 'machine' deve ser um objeto com os campos do .tmc")
+            try:
+                return self.cache.add(machine)
+            except (ValueError, TypeError, AttributeError) as e:
+                raise RequestError(400, f"Máquina inválida: {e}")
+        key = body.get("definition")
+        if not isinstance(key, str):
+            raise RequestError(400, "Informe 'machine' ou 'definition'")
+        if key not in self.cache:
+            raise RequestError(404, f"Definição desconhecida: {key}")
+        return key
+
+    def submit(self, body):
+        key = self.register(body)
+        config = self.cache.config(key)
+        if config is None:
+            raise RequestError(404, f"Definição desconhecida: {key}")
+        input_str = _option(body, "input", "", str)
+        max_steps = _option(body, "max_steps", 1_000_000, int, lambda v: v > 0)
+        timeout = _option(body, "timeout", self.default_timeout, (int, float), lambda v: v > 0)
+        detect_loops = _option(body, "detect_loops", False, bool)
+        backend = _option(body, "backend", "table", str, lambda v: v in ("table", "codegen"),
+                          "Campo 'backend' deve ser 'table' ou 'codegen'")
+        if backend == "codegen" and (detect_loops or tape_count(config) > 1):
+            raise RequestError(400, "O backend codegen não se aplica a detect_loops nem a "
+                                    "máquinas de várias fitas")
+
+        job = Job(str(next(self._ids)), key, config, input_str, max_steps, timeout,
+                  detect_loops, backend)
+        self.jobs[job.id] = job
+        job.future = self.executor.submit(self._execute, job)
+        return job
+
+    def cancel(self, job):
+        if job.record is not None:
+            return
+        job.cancelled = True
+        if job.future.cancel():
+            # Ainda estava na fila: termina sem ter rodado
+            self._finish(job, {"input": job.input, "verdict": "cancelled", "steps": 0})
+
+    def _execute(self, job):
+        # Roda na thread do worker; o estado do job muda pelo laço de eventos
+        publish = self.loop.call_soon_threadsafe
+        if job.cancelled:
+            publish(self._finish, job, {"input": job.input, "verdict": "cancelled", "steps": 0})
+            return
+        publish(job.publish, {"event": "started", "id": job.id})
+        start = time.perf_counter()
+        deadline = start + job.timeout if job.timeout else None
+        tm = None
+        try:
+            tm = self.cache.acquire(job.key, job.config)
+            invalids = tm.invalid_symbols(job.input)
+            if invalids:
+                record = {"input": job.input, "verdict": "invalid",
+                          "invalid_symbols": sorted(invalids)}
+            else:
+                record = self._run(tm, job, start, deadline, publish)
+        except Exception as e:
+            # Um job com problema não derruba o worker
+            record = {"input": job.input, "verdict": "error", "error": str(e)}
+        finally:
+            if tm is not None:
+                tm.backend = "table"
+                self.cache.release(tm)
+        publish(self._finish, job, record)
+
+    def _run(self, tm, job, start, deadline, publish):
+        tm.load_content(job.input)
+        tm.backend = job.backend
+        verdict = reason = None
+        while not tm.halted and tm.steps < job.max_steps:
+            if job.cancelled:
+                verdict = "cancelled"
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                verdict, reason = "timeout", "time"
+                break
+            tm.run(min(job.max_steps - tm.steps, self.chunk_steps), detect_loops=job.detect_loops)
+            if not tm.halted:
+                publish(job.publish, {
+                    "event": "progress",
+                    "id": job.id,
+                    "steps": tm.steps,
+                    "state": tm.state,
+                    "head": tm.head_pos,
+                    "elapsed": time.perf_counter() - start,
+                })
+        record = result_record(tm, job.input, verdict or tm.verdict(), start)
+        if reason:
+            record["reason"] = reason
+        return record
+
+    def _finish(self, job, record):
+        if job.record is not None:
+            return
+        record["id"] = job.id
+        job.record = record
+        job.status = "cancelled" if record["verdict"] == "cancelled" else "done"
+        job.publish(dict(record, event="done"))
+        job.done.set()
+        self.finished.append(job.id)
+        while len(self.finished) > FINISHED_JOBS:
+            self.jobs.pop(self.finished.popleft(), None)
+
+    def status(self):
+        counts = {"queued": 0, "running": 0}
+        for job in self.jobs.values():
+            if job.status in counts:
+                counts[job.status] += 1
+        return dict(counts, workers=self.workers, definitions=len(self.cache),
+                    finished=len(self.finished))
+
+    # HTTP
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except RequestError as e:
+                    await self._send(writer, e.status, {"error": str(e)}, False)
+                    break
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                try:
+                    await self._dispatch(method, path, body, writer, keep_alive)
+                except RequestError as e:
+                    await self._send(writer, e.status, {"error": str(e)}, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise RequestError(400, "Linha de requisição inválida")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise RequestError(400, "Content-Length inválido")
+        if length > MAX_BODY:
+            raise RequestError(413, "Corpo da requisição grande demais")
+        body = None
+        if length:
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except ValueError:
+                raise RequestError(400, "Corpo não é JSON válido")
+        keep_alive = (version == "HTTP/1.1"
+                      and headers.get("connection", "").lower() != "close")
+        return method.upper(), urlsplit(target).path, body, keep_alive
+
+    async def _dispatch(self, method, path, body, writer, keep_alive):
+        parts = [part for part in path.split("/") if part]
+        if parts == ["machines"] and method == "POST":
+            await self._send(writer, 200, {"definition": self.register(body)}, keep_alive)
+        elif parts == ["jobs"] and method == "POST":
+            await self._send(writer, 202, self.submit(body).summary(), keep_alive)
+        elif parts == ["run"] and method == "POST":
+            job = self.submit(body)
+            await job.done.wait()
+            await self._send(writer, 200, job.record, keep_alive)
+        elif parts == ["status"] and method == "GET":
+            await self._send(writer, 200, self.status(), keep_alive)
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                raise RequestError(404, f"Job desconhecido: {parts[1]}")
+            if len(parts) == 3 and parts[2] == "events" and method == "GET":
+                await self._stream(writer, job)
+            elif len(parts) == 2 and method == "GET":
+                await self._send(writer, 200, job.summary(), keep_alive)
+            elif len(parts) == 2 and method == "DELETE":
+                self.cancel(job)
+                await self._send(writer, 200, job.summary(), keep_alive)
+            else:
+                raise RequestError(405, "Método não permitido")
+        else:
+            raise RequestError(404, f"Rota desconhecida: {method} {path}")
+
+    async def _send(self, writer, status, payload, keep_alive):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [f"HTTP/1.1 {status} {REASONS[status]}",
+                "Content-Type: application/json; charset=utf-8",
+                f"Content-Length: {len(data)}"]
+        if not keep_alive:
+            head.append("Connection: close")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+        await writer.drain()
+
+    async def _stream(self, writer, job):
+        # Resposta chunked: um evento JSON por linha, até o evento "done"
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson; charset=utf-8\r\n"
+                     b"Transfer-Encoding: chunked\r\n\r\n")
+        queue = asyncio.Queue()
+        if job.record is not None:
+            queue.put_nowait(dict(job.record, event="done"))
+        else:
+            job.listeners.append(queue)
+            if job.progress is not None:
+                queue.put_nowait(job.progress)
+        try:
+            while True:
+                event = await queue.get()
+                line = json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n"
+                writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+                await writer.drain()
+                if event["event"] == "done":
+                    break
+        finally:
+            if queue in job.listeners:
+                job.listeners.remove(queue)
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Serviço local (JSON sobre HTTP) para executar Máquinas de Turing."
+    )
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="endereço de escuta (padrão: 127.0.0.1, só a máquina local)")
+    parser.add_argument("--port", type=int, default=8765, help="porta (padrão: 8765)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="threads que executam jobs (padrão: núcleos + 4, até 32)")
+    parser.add_argument("--timeout", type=float, default=10.0,
+                        help="limite de tempo por job em segundos, quando o job não "
+                             "informa 'timeout' (padrão: 10)")
+    parser.add_argument("--max-definitions", type=int, default=256,
+                        help="definições de máquina mantidas no cache (padrão: 256)")
+    return parser
+
+
+async def serve(server, host, port):
+    listener = await server.start(host, port)
+    print(f"Servindo em http://{host}:{port}", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers deve ser pelo menos 1")
+    server = SimulationServer(args.workers, args.max_definitions, args.timeout)
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        parser.error(str(e))
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
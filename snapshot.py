@@ -0,0 +1,168 @@
+"""Snapshots da configuração de uma execução, para retomá-la em outro processo.
+
+Formato:
+    MAGIC, tamanho do cabeçalho (uint32 little-endian), cabeçalho JSON e,
+    depois, os códigos da região escrita de cada fita, em ordem.
+
+O cabeçalho traz a definição da máquina (os campos de um .tmc, remontados a
+partir das regras carregadas), o hash do .tmc original, a tabela de
+símbolos da fita, estado, cabeçotes, passos, resultado, a região escrita de
+cada fita e, opcionalmente, a entrada e a posição correspondente num rastro
+(trace_file). Os códigos são copiados direto do buffer da fita, sem
+conversão, então gravar custa pouco mais que o tamanho da região escrita.
+
+O arquivo é gravado num temporário e trocado com os.replace(): quem lê vê o
+snapshot anterior ou o novo, nunca um pela metade.
+
+    tm.load_content("aabbcc")
+    run_with_snapshots(tm, "execucao.tms", 10_000_000_000, interval=60)
+    # ... em outro processo:
+    tm, header = load_snapshot("execucao.tms")
+    run_with_snapshots(tm, "execucao.tms", 10_000_000_000, interval=60)
+"""
+import json
+import os
+import struct
+import time
+
+from trace_file import TraceRecorder
+from turing_machine import machine_from_config
+
+MAGIC = b"TMSNAP01"
+
+FORMAT_VERSION = 1
+
+# Passos executados entre verificações do intervalo de snapshots
+CHUNK_STEPS = 1 << 20
+
+
+def machine_config(tm):
+    """Campos de .tmc que recriam a definição carregada em `tm`"""
+    rules = [f"{e_from} {sym_read} {sym_write} {move} {e_to}"
+             for (e_from, sym_read), transitions in tm.rules.items()
+             for sym_write, move, e_to in transitions]
+    return {
+        "states": " ".join(sorted(tm.states)),
+        "tape_alphabet": ",".join(sorted(tm.tape_alphabet)),
+        "initial_state": tm.initial_state,
+        "blank_symbol": tm.blank_symbol,
+        "halting_states": " ".join(sorted(tm.halting_states)),
+        "rules": "\n".join(rules),
+        "tapes": str(tm.tape_count),
+    }
+
+
+def save_snapshot(tm, path, input_str=None, trace=None):
+    """Grava a configuração atual de `tm` em `path`, de forma atômica.
+
+    `trace` é um dicionário opcional guardado como está; run_with_snapshots()
+    guarda ali a posição do rastro (TraceWriter.position()).
+    """
+    regions = []
+    for tape in tm.tapes:
+        lo = tape.lo if tape else 0
+        hi = tape.hi if tape else -1
+        regions.append((lo, tape.origin + lo, tape.origin + hi + 1))
+    header = {
+        "format": FORMAT_VERSION,
+        "definition": tm.definition_key,
+        "machine": machine_config(tm),
+        "symbols": tm.tape.symbols,
+        "state": tm.state,
+        "heads": list(tm.heads),
+        "steps": tm.steps,
+        "halted": tm.halted,
+        "result": tm.result,
+        "tapes": [[lo, stop - start] for lo, start, stop in regions],
+    }
+    if input_str is not None:
+        header["input"] = input_str
+    if trace is not None:
+        header["trace"] = trace
+    data = json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(data)) + data)
+        for tape, (_, start, stop) in zip(tm.tapes, regions):
+            f.write(memoryview(tape.cells)[start:stop])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_snapshot(path):
+    """(cabeçalho, [códigos de cada fita]) de um snapshot"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} não é um snapshot de máquina de Turing")
+        size, = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(size).decode("utf-8"))
+        if header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Versão de snapshot não suportada: {header.get('format')}")
+        cells = [f.read(length) for _, length in header["tapes"]]
+    if any(len(data) != length for data, (_, length) in zip(cells, header["tapes"])):
+        raise ValueError(f"Snapshot truncado: {path}")
+    return header, cells
+
+
+def load_snapshot(path):
+    """(nova máquina com a definição e a configuração gravadas em `path`, cabeçalho)"""
+    header, cells = read_snapshot(path)
+    tm = machine_from_config(header["machine"])
+    tm.definition_key = header["definition"]
+
+    # Os códigos gravados valem para a tabela de símbolos do snapshot, que as
+    # fitas compartilham
+    tape = tm.tape
+    tape.symbols[:] = header["symbols"]
+    tape.codes.clear()
+    tape.codes.update((symbol, code) for code, symbol in enumerate(tape.symbols) if code)
+    for tape, (lo, _), data in zip(tm.tapes, header["tapes"], cells):
+        tape.clear()
+        tape.write_codes(lo, data)
+
+    heads = header["heads"]
+    if tm.tape_count > 1:
+        tm.heads = list(heads)
+    else:
+        tm.head_pos = heads[0]
+    tm.state = header["state"]
+    tm.steps = header["steps"]
+    tm.halted = header["halted"]
+    tm.result = header["result"]
+    tm.history.clear()
+    return tm, header
+
+
+def run_with_snapshots(tm, path, max_steps, interval=60.0, detect_loops=False,
+                       input_str=None, trace=None, trace_position=None):
+    """Executa `tm` até parar ou chegar a `max_steps` passos no total (contando
+    os já feitos), gravando um snapshot em `path` a cada `interval` segundos e
+    no fim. Devolve os passos executados nesta chamada.
+
+    Com `trace`, a execução também é gravada nesse rastro (trace_file) e cada
+    snapshot guarda a posição dele. `trace_position`, o campo "trace" de um
+    snapshot carregado, faz o rastro continuar de onde esse snapshot parou.
+    """
+    recorder = None
+    if trace is not None:
+        recorder = TraceRecorder(tm, trace, detect_loops, position=trace_position)
+    try:
+        start_steps = tm.steps
+        last = time.monotonic()
+        while not tm.halted and tm.steps < max_steps:
+            steps = min(max_steps - tm.steps, CHUNK_STEPS)
+            if recorder is None:
+                tm.run(steps, detect_loops=detect_loops)
+            else:
+                recorder.run(steps)
+            now = time.monotonic()
+            if now - last >= interval:
+                save_snapshot(tm, path, input_str, recorder and recorder.position())
+                last = now
+        save_snapshot(tm, path, input_str, recorder and recorder.position())
+    finally:
+        if recorder is not None:
+            recorder.close()
+    return tm.steps - start_steps
@@ -0,0 +1,461 @@
+"""Rastro binário de execução gravado em disco e lido via mmap.
+
+Formato do rastro:
+    MAGIC, tamanho do cabeçalho (uint32 little-endian), cabeçalho JSON com os
+    símbolos da fita e os nomes dos estados (na ordem dos códigos) e, depois,
+    um registro RECORD de 8 bytes por passo.
+
+O índice de checkpoints fica ao lado, em <rastro>.idx: para cada checkpoint,
+um CHECKPOINT_HEADER (passo, cabeçote, estado, início e tamanho da região
+escrita) seguido dos códigos da fita nessa região. O checkpoint do passo 0 é
+a configuração inicial.
+
+Um rastro pode ser continuado por outro processo a partir da posição
+guardada num snapshot (TraceWriter.position()); o que foi gravado depois
+dessa posição é descartado.
+
+Uso para inspecionar um rastro:
+    python trace_file.py rastro.tmt 0 1000 -1
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_right
+from collections import namedtuple
+
+from turing_machine import (
+    LoopDetector, Tape,
+    MOVE_ACCEPT, MOVE_REJECT, RESULT_LOOP,
+)
+
+MAGIC = b"TMTRACE1"
+
+# Código lido, código escrito, deslocamento, tipo (MOVE_*), estado de origem e
+# estado de destino da regra. Em Aceita/Rejeita o estado após o passo continua
+# sendo o de origem, como em ExecutionHistory
+RECORD = struct.Struct("<BBbBHH")
+
+# Passo, cabeçote, estado, início da região escrita, número de células
+CHECKPOINT_HEADER = struct.Struct("<QqHqQ")
+
+# Um passo do rastro, com símbolos e estados já decodificados
+TraceStep = namedtuple("TraceStep", "state sym_read sym_write move next_state")
+
+
+def _move_name(delta, kind):
+    if kind == MOVE_ACCEPT:
+        return "Y"
+    if kind == MOVE_REJECT:
+        return "N"
+    return "R" if delta > 0 else "L" if delta < 0 else "S"
+
+
+class TraceWriter:
+    """Grava os registros e os checkpoints de uma execução enquanto ela avança.
+
+    Os registros vão para `buffer` e são descarregados no arquivo a cada
+    `buffer_size` bytes, então a memória usada não cresce com a execução.
+
+    Com `position` (o dicionário de position()), reabre o rastro em `path` e
+    continua a partir dali; o rastro precisa ser da mesma máquina.
+    """
+
+    def __init__(self, path, tape, state_names, checkpoint_interval=1 << 16,
+                 buffer_size=1 << 20, position=None):
+        self.path = path
+        header = json.dumps({"symbols": tape.symbols, "states": state_names},
+                            ensure_ascii=False).encode("utf-8")
+        header = MAGIC + struct.pack("<I", len(header)) + header
+        if position is None:
+            self.file = open(path, "wb")
+            self.index = open(path + ".idx", "wb")
+            self.file.write(header)
+            self.steps = 0
+        else:
+            self.file = open(path, "r+b")
+            self.index = open(path + ".idx", "r+b")
+            self.steps = position["steps"]
+            end = len(header) + self.steps * RECORD.size
+            index_end = position["index"]
+            if (self.file.read(len(header)) != header
+                    or os.fstat(self.file.fileno()).st_size < end
+                    or os.fstat(self.index.fileno()).st_size < index_end):
+                self.file.close()
+                self.index.close()
+                raise ValueError(f"{path} não é o rastro gravado com o snapshot")
+            self.file.truncate(end)
+            self.file.seek(end)
+            self.index.truncate(index_end)
+            self.index.seek(index_end)
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+        self.checkpoint_interval = checkpoint_interval
+        self.next_checkpoint = 0
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+
+    def checkpoint(self, steps, state, tape, head_pos):
+        """Grava a configuração após `steps` passos do rastro"""
+        lo = tape.lo if tape else 0
+        data = tape.code_window(lo, tape.hi + 1)
+        self.index.write(CHECKPOINT_HEADER.pack(steps, head_pos, state, lo, len(data)))
+        self.index.write(data)
+        # Como no histórico em memória, o intervalo cresce com a fita
+        self.next_checkpoint = steps + max(self.checkpoint_interval, len(data))
+
+    def position(self):
+        """Descarrega o rastro no disco e devolve {"path", "steps", "index"}: o
+        ponto de onde TraceWriter(position=...) continua a gravação"""
+        self.flush()
+        for f in (self.file, self.index):
+            f.flush()
+            os.fsync(f.fileno())
+        return {"path": self.path, "steps": self.steps, "index": self.index.tell()}
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def record_trace(tm, path, max_steps, detect_loops=False, checkpoint_interval=1 << 16):
+    """Executa `tm` por até `max_steps` passos gravando o rastro em `path`.
+
+    Usa a tabela compilada, como TuringMachine.run(); o histórico em memória
+    é descartado. Devolve os passos executados.
+    """
+    with TraceRecorder(tm, path, detect_loops, checkpoint_interval) as recorder:
+        return recorder.run(max_steps)
+
+
+class TraceRecorder:
+    """Executa `tm` gravando o rastro em `path`, em quantas chamadas de run()
+    forem precisas (record_trace() faz uma só).
+
+    Cada entrada da tabela compilada já tem seu registro de 8 bytes pronto,
+    então gravar um passo é só acrescentá-lo ao buffer. Com `position`, o
+    rastro continua de onde um snapshot parou (ver TraceWriter).
+    """
+
+    def __init__(self, tm, path, detect_loops=False, checkpoint_interval=1 << 16,
+                 position=None):
+        self.tm = tm
+        self.compiled = tm.compiled or tm.compile()
+        table, _, state_codes, state_names = self.compiled
+        # Em Aceita/Rejeita a tabela repete o estado de origem; o registro guarda
+        # o destino escrito na regra, que transition_info() mostra
+        targets = {}
+        for (e_from, sym_read), transitions in tm.rules.items():
+            _, move, e_to = transitions[0]
+            if move in ("Y", "N"):
+                row = state_codes[e_from] << 8
+                targets[row | tm.tape.intern(sym_read)] = state_codes[e_to]
+                if sym_read == tm.blank_symbol:
+                    targets[row] = state_codes[e_to]
+        self.records = [None if entry is None else
+                        RECORD.pack(index & 0xFF, entry[0], entry[1], entry[3], index >> 8,
+                                    targets.get(index, entry[2]))
+                        for index, entry in enumerate(table)]
+        tm.history.clear()
+        tm.loop_detector = None
+        self.detector = LoopDetector(tm) if detect_loops else None
+        self.writer = TraceWriter(path, tm.tape, state_names, checkpoint_interval,
+                                  position=position)
+        # Configuração de partida; ao continuar um rastro, os checkpoints
+        # seguintes contam a partir dela
+        self.writer.checkpoint(self.writer.steps, state_codes[tm.state], tm.tape, tm.head_pos)
+
+    def run(self, max_steps):
+        """Executa até `max_steps` passos gravando-os; devolve os passos executados"""
+        tm = self.tm
+        table, halting, state_codes, state_names = self.compiled
+        records = self.records
+        detector = self.detector
+        writer = self.writer
+        base = writer.steps  # Passos já gravados no rastro
+
+        tape = tm.tape
+        head = tm.head_pos
+        state = state_codes[tm.state]
+        kind = None
+        halted = tm.halted or halting[state]
+        looped = False
+        steps = 0
+        buffer = writer.buffer
+        if detector is None and not halted:
+            steps, state, head, kind, halted = _record_fast(
+                writer, table, records, tape, state, head, max_steps)
+        while steps < max_steps and not halted:
+            old = tape.code_at(head)
+            index = (state << 8) | old
+            if detector is not None and detector.trapped(index, head):
+                looped = True
+                break
+            entry = table[index]
+            if entry is None:
+                halted = True
+                break
+            write, delta, state, kind = entry
+            buffer += records[index]
+            tape._set_code(head, write)
+            pos = head
+            head += delta
+            steps += 1
+            if kind:
+                halted = True
+                break
+            if detector is not None and detector.observe(pos, old, write, state, head):
+                looped = True
+                break
+            if len(buffer) >= writer.buffer_size:
+                writer.flush()
+            if base + steps >= writer.next_checkpoint:
+                writer.checkpoint(base + steps, state, tape, head)
+        writer.steps = base + steps
+
+        tm.head_pos = head
+        tm.state = state_names[state]
+        tm.steps += steps
+        if looped:
+            tm.halted = True
+            tm.result = RESULT_LOOP
+        else:
+            tm.halted = halted
+            if kind == MOVE_ACCEPT:
+                tm.result = "Aceita"
+            elif kind == MOVE_REJECT:
+                tm.result = "Rejeita"
+        return steps
+
+    def position(self):
+        return self.writer.position()
+
+    def close(self):
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _record_fast(writer, table, records, tape, state, head, max_steps):
+    """Laço de record_trace() sem detecção de laços, no estilo de TuringMachine.run().
+
+    Acessa o buffer da fita diretamente e só acerta os limites da região
+    escrita antes de cada checkpoint e no fim.
+    """
+    buffer = writer.buffer
+    tape._reserve(head, head)
+    cells = tape.cells
+    origin = tape.origin
+    size = len(cells)
+    i = head + origin
+    lo = hi = i  # Extremos visitados pelo cabeçote (índices do buffer)
+
+    def settle():
+        if tape:
+            tape.lo, tape.hi = min(lo - origin, tape.lo), max(hi - origin, tape.hi)
+        else:
+            tape.lo, tape.hi = lo - origin, hi - origin
+        tape._shrink()
+
+    kind = None
+    halted = False
+    steps = 0
+    base = writer.steps
+    next_checkpoint = writer.next_checkpoint - base
+    while steps < max_steps:
+        index = (state << 8) | cells[i]
+        entry = table[index]
+        if entry is None:
+            halted = True
+            break
+        write, delta, state, kind = entry
+        buffer += records[index]
+        cells[i] = write
+        steps += 1
+        i += delta
+        if kind:
+            halted = True
+            break
+        if i > hi or i < lo:
+            if i > hi:
+                hi = i
+            else:
+                lo = i
+            if i < 0 or i >= size:
+                tape._reserve(i - origin, i - origin)
+                shift = tape.origin - origin
+                cells = tape.cells
+                origin = tape.origin
+                size = len(cells)
+                i += shift
+                lo += shift
+                hi += shift
+        if steps >= next_checkpoint:
+            if len(buffer) >= writer.buffer_size:
+                writer.flush()
+            settle()
+            writer.checkpoint(base + steps, state, tape, i - origin)
+            next_checkpoint = writer.next_checkpoint - base
+        elif len(buffer) >= writer.buffer_size:
+            writer.flush()
+    settle()
+    return steps, state, i - origin, kind, halted
+
+
+class TraceReader:
+    """Lê um rastro gravado por record_trace() sem carregá-lo na memória.
+
+    Os registros são lidos direto do mmap; configuration(i) parte do
+    checkpoint anterior a i e refaz no máximo um intervalo de passos. Oferece
+    a mesma leitura que ExecutionHistory: len(), configuration(),
+    [i] e transition_info().
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} não é um rastro de execução")
+        size, = struct.unpack_from("<I", self.map, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self.map[start:start + size].decode("utf-8"))
+        self.symbols = header["symbols"]
+        self.state_names = header["states"]
+        self.blank_symbol = self.symbols[0]
+        self.data_offset = start + size
+        # Um registro incompleto no fim (gravação interrompida) é ignorado
+        self.steps = (len(self.map) - self.data_offset) // RECORD.size
+
+        self.empty_tape = Tape(self.blank_symbol)
+        self.empty_tape.symbols = list(self.symbols)
+        self.empty_tape.codes = {symbol: code for code, symbol in enumerate(self.symbols) if code}
+
+        with open(path + ".idx", "rb") as f:
+            self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.checkpoint_steps = []
+        self.checkpoint_offsets = []
+        offset = 0
+        while offset + CHECKPOINT_HEADER.size <= len(self.index):
+            step, _, _, _, length = CHECKPOINT_HEADER.unpack_from(self.index, offset)
+            if step > self.steps or offset + CHECKPOINT_HEADER.size + length > len(self.index):
+                break
+            self.checkpoint_steps.append(step)
+            self.checkpoint_offsets.append(offset)
+            offset += CHECKPOINT_HEADER.size + length
+        if not self.checkpoint_steps:
+            raise ValueError(f"{path}.idx não tem a configuração inicial")
+        self._cursor = None
+
+    def close(self):
+        self.map.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.steps + 1
+
+    def _index(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("configuração fora do rastro")
+        return index
+
+    def _checkpoint(self, j):
+        offset = self.checkpoint_offsets[j]
+        _, head_pos, state, lo, length = CHECKPOINT_HEADER.unpack_from(self.index, offset)
+        start = offset + CHECKPOINT_HEADER.size
+        tape = self.empty_tape.copy()
+        tape.write_codes(lo, self.index[start:start + length])
+        return state, tape, head_pos
+
+    def record(self, index):
+        """Registro cru do passo `index` (base 0), como tupla de RECORD"""
+        if not 0 <= index < self.steps:
+            raise IndexError("passo fora do rastro")
+        return RECORD.unpack_from(self.map, self.data_offset + index * RECORD.size)
+
+    def step(self, index):
+        """Passo `index` (base 0) decodificado em TraceStep"""
+        read, write, delta, kind, state, next_state = self.record(index)
+        return TraceStep(self.state_names[state], self.symbols[read], self.symbols[write],
+                         _move_name(delta, kind), self.state_names[next_state])
+
+    def configuration(self, index):
+        """Retorna (estado, fita, cabeçote) após `index` passos"""
+        index = self._index(index)
+        j = bisect_right(self.checkpoint_steps, index) - 1
+        if self._cursor is not None and self.checkpoint_steps[j] <= self._cursor[0] <= index:
+            pos, state, tape, head_pos = self._cursor
+        else:
+            state, tape, head_pos = self._checkpoint(j)
+            pos = self.checkpoint_steps[j]
+
+        start = self.data_offset + pos * RECORD.size
+        stop = self.data_offset + index * RECORD.size
+        for _, write, delta, kind, _, next_state in RECORD.iter_unpack(self.map[start:stop]):
+            tape._set_code(head_pos, write)
+            head_pos += delta
+            if kind != MOVE_ACCEPT and kind != MOVE_REJECT:
+                state = next_state
+
+        self._cursor = (index, state, tape, head_pos)
+        return self.state_names[state], tape.copy(), head_pos
+
+    def __getitem__(self, index):
+        # Mesmo formato de ExecutionHistory: (estado, fita_str, cabeçote)
+        state, tape, head_pos = self.configuration(index)
+        return state, tape.content(), head_pos
+
+    def transition_info(self, index):
+        """Descrição da transição aplicada no passo `index` (base 0)"""
+        state, sym_read, sym_write, move, next_state = self.step(index)
+        return f"δ({state}, {sym_read}) = {next_state}, {sym_write}, {move}"
+
+    def result(self):
+        """Aceita/Rejeita conforme o último passo gravado, ou None"""
+        if not self.steps:
+            return None
+        kind = self.record(self.steps - 1)[3]
+        return "Aceita" if kind == MOVE_ACCEPT else "Rejeita" if kind == MOVE_REJECT else None
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("uso: python trace_file.py RASTRO [PASSO ...]", file=sys.stderr)
+        return 2
+    with TraceReader(argv[0]) as reader:
+        print(f"{reader.steps} passos, {len(reader.checkpoint_steps)} checkpoints, "
+              f"resultado: {reader.result()}")
+        for value in argv[1:]:
+            index = reader._index(int(value))
+            state, content, head_pos = reader[index]
+            print(f"Passo {index}: estado {state}, cabeçote {head_pos}, fita {content}")
+            if index < reader.steps:
+                print(f"  {reader.transition_info(index)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1127 @@
+"""Núcleo do simulador de Máquina de Turing, sem dependência de Qt.
+
+Usado pela interface gráfica (main.py) e pela linha de comando (cli.py).
+"""
+import codecs
+import hashlib
+import json
+import mmap
+import os
+from bisect import bisect_right
+from collections import namedtuple
+
+
+class Tape:
+    """Fita bidirecional sobre um bytearray com símbolos internados.
+
+    Cada célula guarda um código pequeno (1 byte). O código 0 representa uma
+    célula vazia, lida como o símbolo branco; os demais símbolos recebem
+    códigos a partir de 1 na primeira vez em que são escritos. O buffer cresce
+    nas duas direções e os limites da região escrita são mantidos a cada
+    escrita, sem varrer a fita.
+    """
+
+    def __init__(self, blank_symbol="_"):
+        self.symbols = [blank_symbol]  # código -> símbolo
+        self.codes = {}  # símbolo -> código
+        self.cells = bytearray(64)
+        self.origin = 32  # Índice em `cells` correspondente à posição 0
+        self.lo = 0  # Limites da região escrita (vazia quando lo > hi)
+        self.hi = -1
+
+    @property
+    def blank_symbol(self):
+        return self.symbols[0]
+
+    @blank_symbol.setter
+    def blank_symbol(self, symbol):
+        self.symbols[0] = symbol
+
+    def intern(self, symbol):
+        code = self.codes.get(symbol)
+        if code is None:
+            if len(self.symbols) > 255:
+                raise ValueError("A fita suporta no máximo 255 símbolos distintos")
+            code = len(self.symbols)
+            self.symbols.append(symbol)
+            self.codes[symbol] = code
+        return code
+
+    def clear(self):
+        # Mantém a tabela de símbolos para que os códigos continuem estáveis
+        self.cells = bytearray(64)
+        self.origin = 32
+        self.lo = 0
+        self.hi = -1
+
+    def copy(self):
+        tape = Tape.__new__(Tape)
+        tape.symbols = self.symbols
+        tape.codes = self.codes
+        tape.cells = bytearray(self.cells)
+        tape.origin = self.origin
+        tape.lo = self.lo
+        tape.hi = self.hi
+        return tape
+
+    def _reserve(self, lo, hi):
+        # Garante que as posições lo..hi cabem no buffer, dobrando o tamanho
+        start = lo + self.origin
+        stop = hi + self.origin + 1
+        size = len(self.cells)
+        if start >= 0 and stop <= size:
+            return
+        left = max(0, -start)
+        right = max(0, stop - size)
+        if left:
+            left = max(left, size)
+        if right:
+            right = max(right, size)
+        self.cells = bytearray(left) + self.cells + bytearray(right)
+        self.origin += left
+
+    def code_at(self, pos):
+        i = pos + self.origin
+        if 0 <= i < len(self.cells):
+            return self.cells[i]
+        return 0
+
+    def _set_code(self, pos, code):
+        self._reserve(pos, pos)
+        self.cells[pos + self.origin] = code
+        if code:
+            if self.lo > self.hi:
+                self.lo = self.hi = pos
+            elif pos < self.lo:
+                self.lo = pos
+            elif pos > self.hi:
+                self.hi = pos
+        elif pos == self.lo or pos == self.hi:
+            # Apagar no meio da região não muda os limites
+            self._shrink()
+
+    def _shrink(self):
+        # Recolhe os limites após apagar células nas bordas da região escrita,
+        # varrendo só as células vazias a partir de cada borda
+        if self.lo > self.hi:
+            return
+        cells = self.cells
+        start = self.lo + self.origin
+        stop = self.hi + self.origin + 1
+        width = 16
+        while start < stop:
+            end = min(start + width, stop)
+            rest = len(cells[start:end].lstrip(b"\0"))
+            if rest:
+                start = end - rest
+                break
+            start = end
+            width = min(width << 1, 1 << 16)
+        else:
+            self.lo, self.hi = 0, -1
+            return
+        width = 16
+        while True:
+            begin = max(stop - width, start)
+            rest = len(cells[begin:stop].rstrip(b"\0"))
+            if rest:
+                stop = begin + rest
+                break
+            stop = begin
+            width = min(width << 1, 1 << 16)
+        self.lo = start - self.origin
+        self.hi = stop - self.origin - 1
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            lo = self.lo if pos.start is None else pos.start
+            hi = self.hi + 1 if pos.stop is None else pos.stop
+            return "".join(self.window(lo, hi))
+        return self.symbols[self.code_at(pos)]
+
+    def get(self, pos, default=None):
+        code = self.code_at(pos)
+        return self.symbols[code] if code else default
+
+    def __setitem__(self, pos, symbol):
+        self._set_code(pos, self.intern(symbol))
+
+    def pop(self, pos, default=None):
+        code = self.code_at(pos)
+        if not code:
+            return default
+        self._set_code(pos, 0)
+        return self.symbols[code]
+
+    def __contains__(self, pos):
+        return self.code_at(pos) != 0
+
+    def __bool__(self):
+        return self.lo <= self.hi
+
+    def write_string(self, start, text):
+        """Escreve `text` a partir de `start`, um símbolo por caractere.
+
+        Caracteres iguais ao branco deixam a célula vazia. A conversão para
+        códigos é feita por `str.translate`, sem laço em Python por célula.
+        """
+        if not text:
+            return
+        table = {}
+        for ch in set(text):
+            table[ord(ch)] = 0 if ch == self.blank_symbol else self.intern(ch)
+        self.write_codes(start, text.translate(table).encode("latin-1"))
+
+    def write_codes(self, start, data):
+        """Copia códigos já internados (bytes) para as posições a partir de `start`"""
+        if not data:
+            return
+        data = bytes(data)  # Aceita também bytearray e memoryview (mmap)
+        stop = start + len(data) - 1
+        self._reserve(start, stop)
+        i = start + self.origin
+        self.cells[i:i + len(data)] = data
+
+        # Atualiza os limites com o primeiro/último código não vazio
+        first = len(data) - len(data.lstrip(b"\0"))
+        if first == len(data):
+            return
+        last = len(data.rstrip(b"\0")) - 1
+        if self.lo > self.hi:
+            self.lo, self.hi = start + first, start + last
+        else:
+            self.lo = min(self.lo, start + first)
+            self.hi = max(self.hi, start + last)
+
+    def write_file(self, start, path, alphabet=None, chunk_size=1 << 20):
+        """Escreve o conteúdo de um arquivo UTF-8 a partir de `start`, um símbolo por caractere.
+
+        O arquivo é lido via mmap em blocos de `chunk_size` bytes, e quebras de
+        linha no final são ignoradas. Blocos só com ASCII são convertidos e
+        validados por `bytes.translate`; os demais são decodificados e
+        escritos como em write_string(). Com `alphabet`, caracteres fora dele
+        interrompem a escrita (a validação continua até o fim). Devolve
+        (caracteres lidos, símbolos fora de `alphabet`).
+        """
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if not size:
+                return 0, set()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                end = size
+                while end and data[end - 1] in b"\r\n":
+                    end -= 1
+                self._reserve(start, start + end)
+
+                allowed = None
+                if alphabet is not None:
+                    allowed = bytes(b for b in range(128) if chr(b) in alphabet)
+                codes = bytearray(range(256))
+                interned = bytearray()  # Bytes já presentes em `codes`
+                decoder = codecs.getincrementaldecoder("utf-8")()
+                invalid = set()
+                pos = start
+                for offset in range(0, end, chunk_size):
+                    raw = data[offset:min(offset + chunk_size, end)]
+                    if raw.isascii():
+                        if allowed is not None:
+                            invalid.update(raw.translate(None, allowed).decode("ascii"))
+                        if invalid:
+                            pos += len(raw)
+                            continue
+                        for b in set(raw.translate(None, interned)):
+                            ch = chr(b)
+                            codes[b] = 0 if ch == self.blank_symbol else self.intern(ch)
+                            interned.append(b)
+                        self.write_codes(pos, raw.translate(codes))
+                        pos += len(raw)
+                    else:
+                        text = decoder.decode(raw, offset + chunk_size >= end)
+                        if alphabet is not None:
+                            invalid.update(set(text) - alphabet)
+                        if not invalid:
+                            self.write_string(pos, text)
+                        pos += len(text)
+        return pos - start, invalid
+
+    def code_window(self, lo, hi):
+        """Códigos das posições lo..hi-1 como bytes (0 = vazia)"""
+        if hi <= lo:
+            return b""
+        start = lo + self.origin
+        stop = hi + self.origin
+        inner_start = max(start, 0)
+        inner_stop = min(stop, len(self.cells))
+        if inner_start >= inner_stop:
+            return bytes(hi - lo)
+        return (bytes(inner_start - start) + self.cells[inner_start:inner_stop]
+                + bytes(stop - inner_stop))
+
+    def window(self, lo, hi):
+        """Lista dos símbolos nas posições lo..hi-1"""
+        return list(map(self.symbols.__getitem__, self.code_window(lo, hi)))
+
+    def iter_content(self, chunk_size=1 << 16):
+        """Conteúdo da região escrita em pedaços de até `chunk_size` símbolos"""
+        pos = self.lo
+        while pos <= self.hi:
+            stop = min(pos + chunk_size, self.hi + 1)
+            yield "".join(self.window(pos, stop))
+            pos = stop
+
+    def content(self):
+        """Conteúdo da região escrita como string"""
+        return "".join(self.iter_content())
+
+
+class ExecutionHistory:
+    """Histórico de execução codificado em deltas, com checkpoints periódicos.
+
+    Guarda, para cada passo, apenas o que mudou (estado anterior, símbolo
+    lido, símbolo escrito, movimento e próximo estado) e, a cada
+    `checkpoint_interval` passos, uma cópia da configuração. Qualquer
+    configuração passada é reconstruída a partir do checkpoint anterior, com
+    no máximo um intervalo de passos refeitos. O intervalo cresce com o buffer
+    da fita, para que as cópias não ocupem mais memória que a própria execução.
+    """
+
+    def __init__(self, checkpoint_interval=1024):
+        self.checkpoint_interval = checkpoint_interval
+        self.clear()
+
+    def clear(self):
+        self.initial = None  # (estado, fita, cabeçote) antes do primeiro passo
+        self.blank_symbol = "_"
+        self.deltas = []
+        self.checkpoints = []  # (estado, fita, cabeçote) nos passos de checkpoint_steps
+        self.checkpoint_steps = []
+        self._next_checkpoint = 0
+        self._cursor = None  # Última configuração reconstruída (índice, estado, fita, cabeçote)
+
+    def start(self, tape, head_pos, state, blank_symbol):
+        self.clear()
+        self.blank_symbol = blank_symbol
+        self._add_checkpoint(state, tape, head_pos)
+        self.initial = self.checkpoints[0]
+
+    def record(self, state, sym_read, sym_write, move, next_state):
+        self.deltas.append((state, sym_read, sym_write, move, next_state))
+
+    def _add_checkpoint(self, state, tape, head_pos):
+        self.checkpoints.append((state, tape.copy(), head_pos))
+        self.checkpoint_steps.append(self.steps)
+        self._next_checkpoint = self.steps + max(self.checkpoint_interval, self._cells(tape))
+
+    @staticmethod
+    def _cells(tape):
+        # Células copiadas por checkpoint
+        return len(tape.cells)
+
+    def maybe_checkpoint(self, state, tape, head_pos):
+        """Guarda a configuração atual (após o último passo) se um checkpoint venceu"""
+        if self.initial is not None and self.steps >= self._next_checkpoint:
+            self._add_checkpoint(state, tape, head_pos)
+
+    def truncate(self, steps):
+        """Descarta os passos após `steps` (ao seguir outro caminho a partir dali)"""
+        del self.deltas[steps:]
+        keep = bisect_right(self.checkpoint_steps, steps)
+        del self.checkpoints[keep:]
+        del self.checkpoint_steps[keep:]
+        state, tape, _ = self.checkpoints[-1]
+        self._next_checkpoint = self.checkpoint_steps[-1] + max(self.checkpoint_interval,
+                                                                self._cells(tape))
+        if self._cursor is not None and self._cursor[0] > steps:
+            self._cursor = None
+
+    @property
+    def steps(self):
+        return len(self.deltas)
+
+    def __len__(self):
+        # Número de configurações registradas: a inicial mais uma por passo
+        if self.initial is None:
+            return 0
+        return len(self.deltas) + 1
+
+    def _index(self, index):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("configuração fora do histórico")
+        return index
+
+    def configuration(self, index):
+        """Retorna (estado, fita, cabeçote) após `index` passos"""
+        index = self._index(index)
+
+        # Reaproveita a última reconstrução quando ela está entre o checkpoint
+        # mais próximo e o passo pedido (acesso sequencial)
+        j = bisect_right(self.checkpoint_steps, index) - 1
+        if self._cursor is not None and self.checkpoint_steps[j] <= self._cursor[0] <= index:
+            pos, state, tape, head_pos = self._cursor
+        else:
+            state, tape, head_pos = self.checkpoints[j]
+            pos, tape = self.checkpoint_steps[j], tape.copy()
+
+        blank = self.blank_symbol
+        for _, _, sym_write, move, next_state in self.deltas[pos:index]:
+            if sym_write != blank:
+                tape[head_pos] = sym_write
+            else:
+                tape.pop(head_pos)
+            if move == "R":
+                head_pos += 1
+            elif move == "L":
+                head_pos -= 1
+            if move not in ("Y", "N"):
+                state = next_state
+
+        self._cursor = (index, state, tape, head_pos)
+        return state, tape.copy(), head_pos
+
+    def __getitem__(self, index):
+        # Mesmo formato dos antigos snapshots: (estado, fita_str, cabeçote)
+        state, tape, head_pos = self.configuration(index)
+        return state, tape.content(), head_pos
+
+    def transition_info(self, index):
+        """Descrição da transição aplicada no passo `index` (base 0)"""
+        state, sym_read, sym_write, move, next_state = self.deltas[index]
+        return f"δ({state}, {sym_read}) = {next_state}, {sym_write}, {move}"
+
+
+# Configuração final devolvida por TuringMachine.run()
+RunResult = namedtuple("RunResult", "result halted steps state tape head_pos")
+
+# Tipos de transição na tabela compilada
+MOVE_CONTINUE, MOVE_ACCEPT, MOVE_REJECT, MOVE_HALT = 0, 1, 2, 3
+
+# Resultado de uma execução interrompida por LoopDetector
+RESULT_LOOP = "Não termina"
+
+# Armadilhas de laço pré-calculadas por índice da tabela compilada
+TRAP_STATIONARY, TRAP_DRIFT_RIGHT, TRAP_DRIFT_LEFT = 1, 2, 3
+
+_HASH_MASK = (1 << 64) - 1
+
+# Maior bloco de passos do laço de run() entre duas reservas do buffer
+RUN_CHUNK = 1 << 16
+
+# Intervalo entre amostras de LoopDetector.sample(): começa curto, para
+# achar cedo os ciclos curtos, e dobra a cada janela de Brent até este valor
+SAMPLE_STEPS = 1 << 8
+
+
+def _reaches_cycle(nodes, successor):
+    """Nós de um grafo funcional (um sucessor ou None) que levam a um ciclo"""
+    result = {}
+    for node in nodes:
+        path = []
+        on_path = set()
+        cur = node
+        while cur is not None and cur not in result and cur not in on_path:
+            on_path.add(cur)
+            path.append(cur)
+            cur = successor(cur)
+        loops = cur in on_path or result.get(cur, False)
+        for visited in path:
+            result[visited] = loops
+    return {node for node, loops in result.items() if loops}
+
+
+def find_loop_traps(table):
+    """Marca os índices (estado << 8) | código a partir dos quais a máquina nunca para.
+
+    TRAP_STATIONARY: ciclo de transições que não movem o cabeçote.
+    TRAP_DRIFT_RIGHT/LEFT: lendo uma célula vazia, a máquina só escreve branco
+    e anda sempre no mesmo sentido; só é um laço se não houver nada escrito
+    adiante do cabeçote.
+    """
+    traps = bytearray(len(table))
+    used = [i for i, entry in enumerate(table) if entry is not None]
+
+    def stationary(index):
+        write, delta, next_state, kind = table[index]
+        if kind or delta:
+            return None
+        nxt = (next_state << 8) | write
+        return nxt if table[nxt] is not None else None
+
+    for index in _reaches_cycle(used, stationary):
+        traps[index] = TRAP_STATIONARY
+
+    for direction, trap in ((1, TRAP_DRIFT_RIGHT), (-1, TRAP_DRIFT_LEFT)):
+        def drift(index):
+            write, delta, next_state, kind = table[index]
+            if kind or write or delta not in (0, direction):
+                return None
+            nxt = next_state << 8
+            return nxt if table[nxt] is not None else None
+
+        blank_rows = [i for i in used if not i & 0xFF]
+        for index in _reaches_cycle(blank_rows, drift):
+            traps[index] = traps[index] or trap
+    return traps
+
+
+def _zobrist(pos, code):
+    # Contribuição de uma célula para o hash da fita; células vazias valem 0
+    return hash((pos, code)) & _HASH_MASK if code else 0
+
+
+class LoopDetector:
+    """Prova que uma execução não termina, com memória limitada.
+
+    Combina as armadilhas de find_loop_traps() com o algoritmo de Brent sobre
+    um hash incremental (Zobrist) da configuração (estado, cabeçote, fita).
+    Só uma configuração fica guardada; coincidências de hash são confirmadas
+    comparando a fita de verdade. Passo a passo usa observe(); o laço enxuto
+    de run() usa sample(), que aplica o mesmo Brent a amostras espaçadas.
+    """
+
+    def __init__(self, tm):
+        tape = tm.tape
+        self.tape = tape
+        self.traps = tm.loop_traps
+        self.steps = tm.steps
+        # O hash só é comparado entre configurações da mesma execução, então
+        # pode partir de 0 em vez da soma das células já escritas
+        self.hash = 0
+        self.power = 1
+        self.lam = 0
+        self.saved_key = None
+        self.saved = None
+        self.interval = 16
+        self.next_sample = self.steps + self.interval
+
+    def trapped(self, index, head):
+        trap = self.traps[index]
+        if trap == TRAP_STATIONARY:
+            return True
+        if trap == TRAP_DRIFT_RIGHT:
+            return not self.tape or head > self.tape.hi
+        if trap == TRAP_DRIFT_LEFT:
+            return not self.tape or head < self.tape.lo
+        return False
+
+    def _snapshot(self, state, head):
+        tape = self.tape
+        if not tape:
+            return state, head, 0, b""
+        start = tape.lo + tape.origin
+        return state, head, tape.lo, bytes(tape.cells[start:tape.hi + tape.origin + 1])
+
+    def observe(self, pos, old, new, state, head):
+        """Registra um passo (escrita de `old` para `new` em `pos`); True se repetiu"""
+        self.steps += 1
+        if old != new:
+            self.hash = (self.hash + _zobrist(pos, new) - _zobrist(pos, old)) & _HASH_MASK
+        key = hash((self.hash, state, head))
+        if key == self.saved_key and self._snapshot(state, head) == self.saved:
+            return True
+        self.lam += 1
+        if self.lam == self.power:
+            self.saved_key = key
+            self.saved = self._snapshot(state, head)
+            self.power *= 2
+            self.lam = 0
+        return False
+
+    def sample(self, state, head):
+        """Compara a configuração atual (no passo next_sample) com a guardada; True se repetiu.
+
+        Se duas amostras coincidem, a execução repete dali em diante. O
+        intervalo entre amostras nunca diminui e cresce com a região escrita,
+        para que copiar a fita custe pouco por passo; dentro de um ciclo as
+        amostras acabam igualmente espaçadas e Brent o encontra.
+        """
+        snapshot = self._snapshot(state, head)
+        if snapshot == self.saved:
+            return True
+        self.lam += 1
+        if self.lam == self.power:
+            self.saved_key = None  # Sem hash: observe() só compara a partir da próxima
+            self.saved = snapshot
+            self.power *= 2
+            self.lam = 0
+            self.interval = max(self.interval, min(self.interval << 1, SAMPLE_STEPS))
+        # Copiar e comparar a fita corre em C: basta um intervalo de 1/64 da região
+        while self.interval < len(snapshot[3]) >> 6:
+            self.interval <<= 1
+        self.next_sample = self.steps + self.interval
+        return False
+
+
+class TuringMachine:
+    tape_count = 1  # Máquinas de várias fitas ficam em multitape.py
+
+    def __init__(self):
+        self.tape = Tape()
+        self.head_pos = 0
+        self.rules = {}
+        self.state = "q0"
+        self.halting_states = set()
+        self.halted = False
+        self.history = ExecutionHistory()  # Deltas por passo, reconstruídos sob demanda
+        self.step_limit = 1000
+        self.result = None  # Aceita, Rejeita ou None
+        self.states = set()
+        self.tape_alphabet = set()
+        self.initial_state = "q0"
+        self.blank_symbol = "_"
+        self.steps = 0
+        self.compiled = None  # Tabela densa gerada por compile(); None quando desatualizada
+        self.loop_traps = None  # Gerado junto com a tabela compilada
+        self.run_table = None  # Idem, no formato do laço de run()
+        self.watch_table = None  # run_table sem as armadilhas de laço
+        self.loop_detector = None
+        self._tip = None  # (halted, result) do último passo, guardado por seek()
+        self.profile = None  # profiler.ExecutionProfile quando o perfil está ligado
+        self.backend = "table"  # "codegen" executa run() com código gerado (veja codegen)
+        self.generated = None  # (tabela compilada, função gerada) usados por codegen
+        self.definition_key = None  # definition_key() do .tmc carregado, quando conhecido
+
+    def __getstate__(self):
+        # A função gerada por codegen não é serializável (pool de processos)
+        state = self.__dict__.copy()
+        state["generated"] = None
+        return state
+
+    # Mesma interface de MultiTapeTuringMachine, com uma fita só
+    @property
+    def tapes(self):
+        return [self.tape]
+
+    @property
+    def heads(self):
+        return [self.head_pos]
+
+    def reset(self):
+        self.tape.clear()
+        self.head_pos = 0
+        self.state = self.initial_state
+        self.halted = False
+        self.history.clear()
+        self.result = None
+        self.steps = 0
+        self.loop_detector = None
+        self._tip = None
+
+    def load_machine_definition(self, states, tape_alphabet, initial_state, blank_symbol):
+        self.states = set(states.split())
+        self.tape_alphabet = set(tape_alphabet.split(','))
+        self.initial_state = initial_state
+        self.blank_symbol = blank_symbol
+        self.tape.blank_symbol = blank_symbol
+        self.definition_key = None
+        
+        # Adicionar símbolos especiais obrigatórios
+        self.tape_alphabet.update(['⊳', '_', self.blank_symbol])
+        
+    def load_rules(self, rules_text, halting_states_str):
+        self.rules = {}
+        self.compiled = None
+        self.definition_key = None
+        self.halting_states = set(halting_states_str.split())
+        for line in rules_text.split('\n'):
+            linha = line.strip()
+            if not linha or linha.startswith('#'):
+                continue
+            parts = linha.split()
+            if len(parts) != 5:
+                continue
+            e_from, sym_read, sym_write, move, e_to = parts
+            move = move.upper()
+            key = (e_from, sym_read)
+            if key not in self.rules:
+                self.rules[key] = []
+            self.rules[key].append((sym_write, move, e_to))
+
+    def compile(self):
+        """Interna estados e símbolos em inteiros e monta a tabela densa de transições.
+
+        A tabela é uma lista indexada por (estado << 8) | código do símbolo, com
+        entradas (código escrito, deslocamento, próximo estado, tipo) ou None.
+        Transições para estados de parada já vêm marcadas com MOVE_HALT.
+        """
+        tape = self.tape
+        state_names = []
+        state_codes = {}
+
+        def state_code(name):
+            code = state_codes.get(name)
+            if code is None:
+                code = state_codes[name] = len(state_names)
+                state_names.append(name)
+            return code
+
+        state_code(self.initial_state)
+        for (e_from, _), transitions in self.rules.items():
+            state_code(e_from)
+            for _, _, e_to in transitions:
+                state_code(e_to)
+        for name in self.halting_states:
+            state_code(name)
+
+        table = [None] * (len(state_names) << 8)
+        for (e_from, sym_read), transitions in self.rules.items():
+            # Mesmo critério de step(): a primeira transição da lista
+            sym_write, move, e_to = transitions[0]
+            write = 0 if sym_write == self.blank_symbol else tape.intern(sym_write)
+            if move in ("Y", "N"):
+                # Aceita/Rejeita: o cabeçote e o estado não mudam
+                kind = MOVE_ACCEPT if move == "Y" else MOVE_REJECT
+                entry = (write, 0, state_code(e_from), kind)
+            else:
+                delta = 1 if move == "R" else -1 if move == "L" else 0
+                kind = MOVE_HALT if e_to in self.halting_states else MOVE_CONTINUE
+                entry = (write, delta, state_code(e_to), kind)
+            row = state_code(e_from) << 8
+            table[row | tape.intern(sym_read)] = entry
+            if sym_read == self.blank_symbol:
+                table[row] = entry  # Células vazias (código 0) são lidas como branco
+
+        halting = [name in self.halting_states for name in state_names]
+        self.compiled = (table, halting, state_codes, state_names)
+        self.loop_traps = find_loop_traps(table)
+        # Cópia usada por run(), com o próximo estado já deslocado (estado << 8)
+        self.run_table = [entry and (entry[0], entry[1], entry[2] << 8, entry[3])
+                          for entry in table]
+        # Mesma tabela sem as entradas das armadilhas: com detect_loops o laço
+        # de run() para nelas e a armadilha é conferida fora dele
+        self.watch_table = [None if trap else entry
+                            for entry, trap in zip(self.run_table, self.loop_traps)]
+        return self.compiled
+
+    def run(self, max_steps, record=False, detect_loops=False):
+        """Executa até a máquina parar ou até `max_steps` passos.
+
+        Com record=True cada passo passa por step() e entra no histórico. Sem
+        registro, usa a tabela compilada num laço enxuto, sem histórico nem
+        formatação; o histórico anterior é descartado. Com backend "codegen"
+        esse laço é substituído pelo código gerado em codegen. Com detect_loops=True
+        uma execução que comprovadamente não termina para com o resultado
+        RESULT_LOOP (veja LoopDetector); sem registro, a detecção usa o mesmo
+        laço enxuto, com uma amostra da configuração a cada tantos passos. Com
+        um perfil em `self.profile` os passos são contados por regra e por
+        posição (veja profiler).
+        """
+        if detect_loops:
+            return self._run_detecting_loops(max_steps, record)
+        if self.profile is not None and not record:
+            return self._run_profiled(max_steps)
+        if record:
+            steps = 0
+            while steps < max_steps and not self.halted and self.step():
+                steps += 1
+            return RunResult(self.result, self.halted, steps, self.state, self.tape, self.head_pos)
+        if self.backend == "codegen":
+            from codegen import run_generated
+            return run_generated(self, max_steps)
+
+        self.compiled or self.compile()
+        self.history.clear()
+        steps = self._run_rows(self.run_table, max_steps)
+        return RunResult(self.result, self.halted, steps, self.state, self.tape, self.head_pos)
+
+    def _run_rows(self, rows, max_steps):
+        """Laço enxuto de run() sobre `rows` (run_table ou watch_table); devolve os passos.
+
+        Para, sem aplicar a transição, num índice sem entrada em `rows`. Os
+        passos andam em blocos: antes de cada um o buffer é reservado para
+        tantas células quantos passos houver no bloco, de cada lado do
+        cabeçote, e o laço não precisa conferir os limites a cada passo.
+        """
+        table, halting, state_codes, state_names = self.compiled or self.compile()
+        state = state_codes.get(self.state)
+        if self.halted or state is None or halting[state]:
+            # Já parada, ou num estado sem regras ou de parada: nenhum passo possível
+            self.halted = True
+            return 0
+
+        tape = self.tape
+        head = self.head_pos
+        state <<= 8
+        kind = MOVE_CONTINUE
+        halted = False
+        steps = 0
+        chunk = 64  # Cresce até RUN_CHUNK: execuções curtas reservam e varrem pouco
+        while steps < max_steps and not halted:
+            n = min(chunk, max_steps - steps)
+            chunk = min(chunk << 1, RUN_CHUNK)
+            tape._reserve(head - n, head + n)
+            cells = tape.cells
+            origin = tape.origin
+            i = head + origin
+            done = n
+            for k in range(n):
+                entry = rows[state | cells[i]]
+                if entry is None:
+                    done = k
+                    halted = True
+                    break
+                write, delta, state, kind = entry
+                cells[i] = write
+                i += delta
+                if kind:
+                    done = k + 1
+                    halted = True
+                    break
+
+            # Toda escrita do bloco caiu a menos de `done` células da posição
+            # inicial; _shrink() recolhe os limites até as células ocupadas
+            if done:
+                lo, hi = head - done, head + done
+                if tape:
+                    lo = min(lo, tape.lo)
+                    hi = max(hi, tape.hi)
+                tape.lo, tape.hi = lo, hi
+                tape._shrink()
+            head = i - origin
+            steps += done
+
+        self.head_pos = head
+        self.state = state_names[state >> 8]
+        self.halted = halted
+        if kind == MOVE_ACCEPT:
+            self.result = "Aceita"
+        elif kind == MOVE_REJECT:
+            self.result = "Rejeita"
+        self.steps += steps
+        return steps
+
+    def _run_profiled(self, max_steps):
+        # Mesmo caminho de run() sem registro, contando cada índice da tabela
+        table, halting, state_codes, state_names = self.compiled or self.compile()
+        self.history.clear()
+        state = state_codes.get(self.state)
+        if self.halted or state is None or halting[state]:
+            self.halted = True
+            return RunResult(self.result, True, 0, self.state, self.tape, self.head_pos)
+
+        tape = self.tape
+        hits = [0] * len(table)
+        visits = self.profile.visits
+        head = self.head_pos
+        kind = MOVE_CONTINUE
+        halted = False
+        steps = 0
+        while steps < max_steps:
+            index = (state << 8) | tape.code_at(head)
+            entry = table[index]
+            if entry is None:
+                halted = True
+                break
+            hits[index] += 1
+            visits[head] += 1
+            write, delta, state, kind = entry
+            tape._set_code(head, write)
+            head += delta
+            steps += 1
+            if kind:
+                halted = True
+                break
+        self.profile.add_table_hits(hits, state_names, tape.symbols)
+
+        self.head_pos = head
+        self.state = state_names[state]
+        self.halted = halted
+        if kind == MOVE_ACCEPT:
+            self.result = "Aceita"
+        elif kind == MOVE_REJECT:
+            self.result = "Rejeita"
+        self.steps += steps
+        return RunResult(self.result, halted, steps, self.state, tape, head)
+
+    def _loop_detector(self):
+        detector = self.loop_detector
+        if detector is None or detector.steps != self.steps:
+            # A configuração mudou por outro caminho (step(), load_content...)
+            detector = self.loop_detector = LoopDetector(self)
+        return detector
+
+    def _run_detecting_loops(self, max_steps, record):
+        # O laço enxuto roda sobre watch_table, que não tem as entradas das
+        # armadilhas: ele para antes de aplicar uma delas, e só ali e a cada
+        # `interval` passos (LoopDetector.sample) a detecção custa algo
+        if record or self.profile is not None:
+            return self._step_detecting_loops(max_steps, record)
+        table, halting, state_codes, state_names = self.compiled or self.compile()
+        self.history.clear()
+        detector = self._loop_detector()
+        traps = self.loop_traps
+        tape = self.tape
+        steps = 0
+        while steps < max_steps and not self.halted:
+            if self.steps >= detector.next_sample and detector.sample(self.state, self.head_pos):
+                self.halted = True
+                self.result = RESULT_LOOP
+                break
+            limit = min(max_steps - steps, detector.next_sample - self.steps)
+            done = self._run_rows(self.watch_table, limit)
+            state = state_codes.get(self.state)
+            if self.halted and self.result is None and state is not None and not halting[state]:
+                head = self.head_pos
+                index = (state << 8) | tape.code_at(head)
+                trap = traps[index]
+                if trap:
+                    # Parou numa armadilha, não por falta de regra
+                    if detector.trapped(index, head):
+                        self.result = RESULT_LOOP
+                    else:
+                        # Deriva com algo escrito adiante: o laço segue sem
+                        # armadilhas até o cabeçote poder passar da borda
+                        self.halted = False
+                        ahead = tape.hi - head if trap == TRAP_DRIFT_RIGHT else head - tape.lo
+                        done += self._run_rows(self.run_table, min(limit - done, ahead + 1))
+            steps += done
+            detector.steps = self.steps
+        return RunResult(self.result, self.halted, steps, self.state, tape, self.head_pos)
+
+    def _step_detecting_loops(self, max_steps, record):
+        # Passo a passo, com LoopDetector.observe(): com registro ou perfil
+        table, halting, state_codes, state_names = self.compiled or self.compile()
+        if not record:
+            self.history.clear()
+        profile = self.profile
+        detector = self._loop_detector()
+
+        tape = self.tape
+        steps = 0
+        while steps < max_steps and not self.halted:
+            state = state_codes.get(self.state)
+            if state is None or halting[state]:
+                self.halted = True
+                break
+            pos = self.head_pos
+            old = tape.code_at(pos)
+            if detector.trapped((state << 8) | old, pos):
+                self.halted = True
+                self.result = RESULT_LOOP
+                break
+
+            if record:
+                if not self.step():
+                    break
+            else:
+                entry = table[(state << 8) | old]
+                if entry is None:
+                    self.halted = True
+                    break
+                if profile is not None:
+                    profile.hit(self.state, tape.symbols[old], pos)
+                write, delta, next_state, kind = entry
+                tape._set_code(pos, write)
+                self.head_pos = pos + delta
+                self.state = state_names[next_state]
+                self.steps += 1
+                if kind == MOVE_ACCEPT:
+                    self.halted = True
+                    self.result = "Aceita"
+                elif kind == MOVE_REJECT:
+                    self.halted = True
+                    self.result = "Rejeita"
+                elif kind == MOVE_HALT:
+                    self.halted = True
+            steps += 1
+
+            if not self.halted and detector.observe(pos, old, tape.code_at(pos),
+                                                    self.state, self.head_pos):
+                self.halted = True
+                self.result = RESULT_LOOP
+                break
+        return RunResult(self.result, self.halted, steps, self.state, tape, self.head_pos)
+
+    def step(self):
+        if self.state in self.halting_states:
+            self.halted = True
+            return False
+
+        current_symbol = self.tape[self.head_pos]
+        chave = (self.state, current_symbol)
+        
+        if chave not in self.rules:
+            self.halted = True
+            return False
+
+        transitions = self.rules[chave]
+        if len(transitions) > 1:
+            # Não determinismo - usamos a primeira transição; a busca por
+            # todos os ramos fica em nondeterministic.run_nondeterministic()
+            pass
+        
+        sym_write, move, next_state = transitions[0]
+        if self.profile is not None:
+            self.profile.hit(self.state, current_symbol, self.head_pos)
+
+        if self.steps < self.history.steps:
+            # Depois de seek() para trás, o caminho registrado adiante é descartado
+            self.history.truncate(self.steps)
+            self._tip = None
+
+        # Registra apenas o delta do passo; a configuração anterior é
+        # reconstruída pelo histórico quando necessário
+        self.history.record(self.state, current_symbol, sym_write, move, next_state)
+
+        # Aplica a transição
+        if sym_write != self.blank_symbol:
+            self.tape[self.head_pos] = sym_write
+        else:
+            self.tape.pop(self.head_pos)
+
+        # Trata os movimentos especiais
+        if move == "Y":
+            self.halted = True
+            self.result = "Aceita"
+        elif move == "N":
+            self.halted = True
+            self.result = "Rejeita"
+        else:  # R ou L
+            if move == "R":
+                self.head_pos += 1
+            elif move == "L":
+                self.head_pos -= 1
+            self.state = next_state
+
+            if self.state in self.halting_states:
+                self.halted = True
+
+        self.steps += 1
+        self.history.maybe_checkpoint(self.state, self.tape, self.head_pos)
+        return True
+
+    def seek(self, index):
+        """Leva a máquina à configuração registrada após `index` passos.
+
+        Vale para trás e para frente dentro do histórico; o histórico só é
+        cortado se step() for chamado antes de voltar ao último passo.
+        """
+        history = self.history
+        index = history._index(index)
+        if self.steps == history.steps:
+            self._tip = (self.halted, self.result)
+        self.state, self.tape, self.head_pos = history.configuration(index)
+        self.steps = index
+        self.loop_detector = None
+        if index == history.steps and self._tip is not None:
+            self.halted, self.result = self._tip
+        elif index and history.deltas[index - 1][3] in ("Y", "N"):
+            self.halted = True
+            self.result = "Aceita" if history.deltas[index - 1][3] == "Y" else "Rejeita"
+        else:
+            self.halted = self.state in self.halting_states
+            self.result = None
+
+    def get_tape_content(self):
+        return self.tape.content()
+
+    def iter_tape_content(self, chunk_size=1 << 16):
+        """Mesmo texto de get_tape_content(), em pedaços, sem montar a fita inteira"""
+        return self.tape.iter_content(chunk_size)
+
+    def tape_bounds(self):
+        """(primeira, última) posição escrita da fita; lo > hi quando está vazia"""
+        return self.tape.lo, self.tape.hi
+
+    def window(self, lo, hi):
+        """Símbolos das posições lo..hi-1 (células vazias como o branco)"""
+        return "".join(self.tape.window(lo, hi))
+
+    def around_head(self, radius):
+        """As 2 * radius + 1 células centradas no cabeçote"""
+        return self.window(self.head_pos - radius, self.head_pos + radius + 1)
+
+    def verdict(self):
+        """Resumo do resultado: 'accept', 'reject', 'loops' ou 'timeout' (ainda não parou)"""
+        if self.result == "Aceita":
+            return "accept"
+        if self.result == RESULT_LOOP:
+            return "loops"
+        if self.halted:
+            return "reject"
+        return "timeout"
+
+    def invalid_symbols(self, input_str):
+        """Símbolos da entrada que não pertencem a Γ (mesma regra de validate_input)"""
+        return set(input_str) - self.tape_alphabet
+
+    def load_content_file(self, path):
+        """Como load_content(), com a entrada lida de um arquivo (Tape.write_file).
+
+        Devolve os símbolos fora de Γ; se houver algum, a fita fica só com ⊳⊔.
+        """
+        self.load_content("")
+        _, invalids = self.tape.write_file(2, path, self.tape_alphabet)
+        if invalids:
+            self.load_content("")
+        else:
+            self.history.start(self.tape, self.head_pos, self.state, self.blank_symbol)
+        return invalids
+
+    def load_content(self, input_str):
+        self.tape.clear()
+        self.tape.blank_symbol = self.blank_symbol
+        self.tape[0] = "⊳"
+        self.tape[1] = "_"  # Símbolo de espaço
+        self.tape.write_string(2, input_str)  # Posição após ⊳⊔
+                
+        self.head_pos = 1  # Começa no ⊔ (posição 1)
+        self.state = self.initial_state
+        self.halted = False
+        self.result = None
+        self.steps = 0
+        self.loop_detector = None
+        self._tip = None
+        self.history.start(self.tape, self.head_pos, self.state, self.blank_symbol)
+
+
+# Campos de um .tmc que definem a máquina (entrada e limite de passos ficam de fora)
+DEFINITION_FIELDS = ("states", "tape_alphabet", "initial_state", "blank_symbol",
+                     "halting_states", "rules", "tapes")
+
+
+def tape_count(config):
+    """Número de fitas de um .tmc (campo "tapes"; 1 quando ausente ou inválido)"""
+    try:
+        return max(int(config.get("tapes", "") or 1), 1)
+    except ValueError:
+        return 1
+
+
+def definition_key(config):
+    """Hash dos campos que definem a máquina; igual enquanto a definição não muda"""
+    values = [config.get(field, "") for field in DEFINITION_FIELDS[:-1]]
+    values.append(tape_count(config))
+    payload = json.dumps(values, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_config(path):
+    """Lê um arquivo .tmc (JSON gravado por save_config_file)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def machine_from_config(config):
+    """Cria uma TuringMachine carregada com a definição e as regras de um .tmc"""
+    k = tape_count(config)
+    if k > 1:
+        from multitape import MultiTapeTuringMachine
+        tm = MultiTapeTuringMachine(k)
+    else:
+        tm = TuringMachine()
+    tm.load_machine_definition(
+        config.get("states", ""),
+        config.get("tape_alphabet", ""),
+        config.get("initial_state", "q0"),
+        config.get("blank_symbol", "_"),
+    )
+    tm.load_rules(config.get("rules", ""), config.get("halting_states", ""))
+    tm.definition_key = definition_key(config)
+    try:
+        tm.step_limit = int(config.get("step_limit", ""))
+    except ValueError:
+        tm.step_limit = 1000
+    return tm
@@ -0,0 +1,127 @@
+"""Validação incremental das regras, linha a linha, sem dependência de Qt.
+
+O editor informa só as linhas que mudaram (replace_lines); cada linha nova é
+analisada uma vez e os estados e símbolos usados ficam em contadores, então
+as mensagens agregadas (estados não definidos, símbolos fora de Γ) saem dos
+contadores, sem varrer o texto de novo. Só uma mudança na definição (K, Γ,
+número de fitas) reavalia todas as linhas.
+"""
+from collections import Counter
+
+# Gravidade dos problemas por linha
+ERROR, WARNING = "erro", "aviso"
+
+
+def parse_rule(line):
+    """Os cinco campos de uma linha de regra, None para linha vazia ou
+    comentário e () para uma linha que load_rules() ignora"""
+    linha = line.strip()
+    if not linha or linha.startswith('#'):
+        return None
+    parts = linha.split()
+    if len(parts) != 5:
+        return ()
+    return tuple(parts)
+
+
+class RulesValidator:
+    """Estado da validação das regras, atualizado por linhas alteradas.
+
+    `problems[i]` é None ou (gravidade, mensagem) para a linha i.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.parsed = []
+        self.problems = []
+        self.used_states = Counter()  # estado -> linhas que o usam
+        self.used_symbols = Counter()  # símbolo -> linhas que o usam
+        self.wrong_arity = 0
+        self.states = set()
+        self.gamma = set()
+        self.tape_count = 1
+
+    def set_definition(self, states, gamma, tape_count=1):
+        """Atualiza K, Γ e o número de fitas; devolve True se algo mudou"""
+        if (states, gamma, tape_count) == (self.states, self.gamma, self.tape_count):
+            return False
+        arity_changed = tape_count != self.tape_count
+        self.states, self.gamma, self.tape_count = states, gamma, tape_count
+        if arity_changed:
+            # A aridade muda quais símbolos contam: refaz os contadores
+            self.set_text("\n".join(self.lines))
+        else:
+            self.problems = [self._check(fields) for fields in self.parsed]
+        return True
+
+    def set_text(self, text):
+        self.lines, self.parsed, self.problems = [], [], []
+        self.used_states.clear()
+        self.used_symbols.clear()
+        self.wrong_arity = 0
+        self.replace_lines(0, 0, text.split('\n'))
+
+    def replace_lines(self, start, removed, new_lines):
+        """Troca as linhas start..start + removed - 1 por `new_lines`"""
+        stop = start + removed
+        for fields in self.parsed[start:stop]:
+            self._count(fields, -1)
+        parsed = [parse_rule(line) for line in new_lines]
+        for fields in parsed:
+            self._count(fields, 1)
+        self.lines[start:stop] = new_lines
+        self.parsed[start:stop] = parsed
+        self.problems[start:stop] = [self._check(fields) for fields in parsed]
+
+    def _arity_ok(self, fields):
+        k = self.tape_count
+        return all(len(field.split(',')) == k for field in fields[1:4])
+
+    def _symbols(self, fields):
+        return fields[1].split(',') + fields[2].split(',')
+
+    def _count(self, fields, sign):
+        if not fields:
+            return
+        self.used_states[fields[0]] += sign
+        self.used_states[fields[4]] += sign
+        if not self._arity_ok(fields):
+            self.wrong_arity += sign
+            return
+        for symbol in self._symbols(fields):
+            if symbol != '_':
+                self.used_symbols[symbol] += sign
+
+    def _check(self, fields):
+        if fields is None:
+            return None
+        if not fields:
+            return WARNING, "Linha ignorada: esperados 5 campos <estado> <read> <write> <move> <next>"
+        undefined = [state for state in (fields[0], fields[4]) if state not in self.states]
+        if undefined:
+            return ERROR, f"Estado não definido: {', '.join(undefined)}"
+        if not self._arity_ok(fields):
+            return ERROR, (f"Esperado {self.tape_count} componente(s) por campo "
+                           f"(uma por fita)")
+        symbols = [s for s in self._symbols(fields) if s != '_' and s not in self.gamma]
+        if symbols:
+            return ERROR, f"Símbolo fora de Γ: {', '.join(dict.fromkeys(symbols))}"
+        return None
+
+    def line_problems(self):
+        """Pares (número da linha a partir de 0, (gravidade, mensagem))"""
+        return [(i, problem) for i, problem in enumerate(self.problems) if problem]
+
+    def errors(self):
+        """Mensagens agregadas, no formato de validate_machine_definition()"""
+        errors = []
+        undefined_states = [s for s, n in self.used_states.items() if n and s not in self.states]
+        if undefined_states:
+            errors.append(f"Estados usados nas regras mas não definidos: {', '.join(undefined_states)}")
+        undefined_symbols = [s for s, n in self.used_symbols.items() if n and s not in self.gamma]
+        if undefined_symbols:
+            errors.append(f"Símbolos usados nas regras não pertencem ao alfabeto Γ: {', '.join(undefined_symbols)}")
+        if self.wrong_arity:
+            errors.append(f"{self.wrong_arity} regra(s) não têm {self.tape_count} componente(s) "
+                          f"por campo (uma por fita)")
+        return errors